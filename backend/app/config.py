@@ -35,6 +35,31 @@ class Settings(BaseSettings):
         "https://dclg-outfitrec.vercel.app",
     ]
 
+    # Tracing - requests slower than this are kept for /stats/slow-requests
+    slow_request_threshold_ms: float = 250.0
+    slow_request_buffer_size: int = 100
+
+    # Look generation executor: "none" (event loop), "thread" or "process"
+    look_executor: str = "none"
+    look_executor_workers: int = 2
+
+    # Shared catalog/graph snapshot (publish_snapshot.py); unset = use the database
+    snapshot_dir: Optional[str] = None
+    snapshot_check_seconds: float = 5.0
+
+    # Warm start file (catalog + stats), loaded at boot if the data is unchanged
+    warm_start_path: Optional[str] = None
+
+    # data_version listener: how often to reread the table in case a
+    # notification was missed (see services/data_version.py)
+    data_version_check_seconds: float = 30.0
+
+    # Image thumbnails - disk cache (default: system temp dir), widths offered,
+    # and an optional URL prefix (e.g. a CDN) for thumbnail_urls
+    image_cache_dir: Optional[str] = None
+    image_thumbnail_widths: list[int] = [160, 320, 640]
+    image_base_url: str = ""
+
     def get_database_url(self) -> str:
         """Get database URL - prefers DATABASE_URL env var, falls back to individual vars."""
         if self.database_url:
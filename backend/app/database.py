@@ -1,25 +1,56 @@
 import asyncpg
+import time
 from typing import Optional
 
 from app.config import get_settings
+from app.metrics import POOL_ACQUIRE_WAIT
 
 settings = get_settings()
 
 
+class _TimedAcquire:
+    """Wraps pool.acquire() to record how long callers wait for a connection."""
+
+    def __init__(self, ctx):
+        self._ctx = ctx
+
+    async def __aenter__(self) -> asyncpg.Connection:
+        start = time.perf_counter()
+        conn = await self._ctx.__aenter__()
+        POOL_ACQUIRE_WAIT.observe(time.perf_counter() - start)
+        return conn
+
+    async def __aexit__(self, *exc):
+        return await self._ctx.__aexit__(*exc)
+
+
+class InstrumentedPool:
+    """asyncpg pool proxy that records acquire wait time; everything else is delegated."""
+
+    def __init__(self, pool: asyncpg.Pool):
+        self._pool = pool
+
+    def acquire(self, *args, **kwargs) -> _TimedAcquire:
+        return _TimedAcquire(self._pool.acquire(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._pool, name)
+
+
 class Database:
-    pool: Optional[asyncpg.Pool] = None
+    pool: Optional[InstrumentedPool] = None
 
     @classmethod
     async def connect(cls):
         if cls.pool is None:
             database_url = settings.get_database_url()
             print(f"  Connecting to database...")
-            cls.pool = await asyncpg.create_pool(
+            cls.pool = InstrumentedPool(await asyncpg.create_pool(
                 database_url,
                 min_size=2,
                 max_size=10,
                 statement_cache_size=0,  # Required for pgbouncer/transaction mode
-            )
+            ))
 
     @classmethod
     async def disconnect(cls):
@@ -28,11 +59,11 @@ class Database:
             cls.pool = None
 
     @classmethod
-    async def get_pool(cls) -> asyncpg.Pool:
+    async def get_pool(cls) -> InstrumentedPool:
         if cls.pool is None:
             await cls.connect()
         return cls.pool
 
 
-async def get_db() -> asyncpg.Pool:
+async def get_db() -> InstrumentedPool:
     return await Database.get_pool()
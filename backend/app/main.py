@@ -1,15 +1,28 @@
 from contextlib import asynccontextmanager
 import time
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import get_settings
 from app.database import Database
+from app.metrics import MetricsMiddleware, render_metrics
+from app.tracing import TimingMiddleware
 from app.services.compatibility import get_compatibility_graph
+from app.services.data_version import get_data_version_bus
+from app.services.executor import get_cpu_executor
+from app.services.images import get_image_service
 from app.services.look_generator import get_look_generator
-from app.services.product import _get_cached_products
-from app.routers import products, outfits, stats
+from app.services.product import _get_cached_products, _invalidate_cached_products
+from app.services.snapshot import get_snapshot, get_snapshot_manager
+from app.services.warm_start import (
+    load_warm_start,
+    save_warm_start,
+    start_background_check,
+    start_background_save,
+    stop_background_task,
+)
+from app.routers import products, outfits, stats, images
 
 settings = get_settings()
 
@@ -22,24 +35,58 @@ async def lifespan(app: FastAPI):
     print("Connecting to database...")
     await Database.connect()
 
+    # Before anything is cached, so no change can slip in between
+    print("Listening for data version changes...")
+    bus = get_data_version_bus()
+    bus.subscribe("products", _invalidate_cached_products)
+    if settings.snapshot_dir:
+        bus.subscribe("snapshot", get_snapshot_manager().refresh)
+    await bus.start()
+    print(f"  Data versions: {bus.versions}")
+
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        print(f"Attached shared snapshot (generation {snapshot.generation}, "
+              f"{len(snapshot.catalog)} products, {snapshot.edge_count:,} edges)")
+
+    warm = await load_warm_start()
+    if warm:
+        print("Loaded warm start file (data unchanged since it was saved)")
+
     print("Pre-warming product cache...")
     cache = await _get_cached_products()
     print(f"  Cached {len(cache)} products")
 
     print("Initializing compatibility graph (DB-based)...")
     graph = await get_compatibility_graph()
-    graph_stats = await graph.get_stats()
-    print(f"  DB has {graph_stats.get('total_edges', 0):,} edges for {graph_stats.get('total_products', 0)} products")
+    graph_metadata = await graph.get_metadata()
+    print(f"  DB has {graph_metadata['edge_count']:,} edges for {graph_metadata['product_count']} products")
 
     print("Initializing look generator...")
     get_look_generator()
 
+    # Started last: process workers fork here and inherit the warmed caches
+    executor = get_cpu_executor()
+    print(f"Starting look executor ({executor.mode})...")
+    executor.start()
+
+    # Verify the warm start (or write one after a cold boot) off the boot path
+    if warm:
+        start_background_check()
+    else:
+        start_background_save()
+
     print(f"Startup complete in {time.time() - start:.2f}s!")
 
     yield
 
     # Shutdown
     print("Shutting down...")
+    await stop_background_task()
+    await save_warm_start()
+    await get_data_version_bus().stop()
+    get_cpu_executor().shutdown()
+    await get_image_service().close()
     await Database.disconnect()
 
 
@@ -59,10 +106,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Metrics - latency and status per route template
+app.add_middleware(MetricsMiddleware)
+
+# Tracing - Server-Timing header and slow request log
+app.add_middleware(TimingMiddleware)
+
 # Routers
 app.include_router(products.router, prefix="/api/v1")
 app.include_router(outfits.router, prefix="/api/v1")
 app.include_router(stats.router, prefix="/api/v1")
+app.include_router(images.router, prefix="/api/v1")
 
 
 @app.get("/")
@@ -73,3 +127,10 @@ async def root():
         "docs": "/docs",
         "health": "/api/v1/stats/health",
     }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -0,0 +1,178 @@
+"""
+Prometheus Metrics
+==================
+
+Process-wide metrics exposed at /metrics in the Prometheus text format.
+
+- Request latency per route template (ASGI middleware)
+- Latency per graph/product service method (@timed decorator)
+- Connection pool acquire wait and pool size
+- Cache hits/misses and hit ratios (product cache, precomputed looks)
+- generate_looks candidate counts
+- Look generation executor queue depth and wait/run latency
+
+Instrumentation is a histogram observe or counter increment on
+pre-resolved label children, so it is cheap enough to leave on.
+"""
+
+import time
+from functools import wraps
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route"],
+)
+
+REQUEST_COUNT = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status code",
+    ["method", "route", "status"],
+)
+
+SERVICE_LATENCY = Histogram(
+    "service_call_duration_seconds",
+    "Latency of graph/product service methods",
+    ["service", "method"],
+)
+
+POOL_ACQUIRE_WAIT = Histogram(
+    "db_pool_acquire_wait_seconds",
+    "Time spent waiting to acquire a database connection",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache and result (hit/miss)",
+    ["cache", "result"],
+)
+
+LOOK_CANDIDATES = Histogram(
+    "generate_looks_candidates",
+    "Candidates per generate_looks call (compatible = fetched, valid = after filtering)",
+    ["stage"],
+    buckets=(0, 10, 25, 50, 75, 100, 125, 150, 200, 300),
+)
+
+EXECUTOR_QUEUE_DEPTH = Gauge(
+    "look_executor_queue_depth",
+    "Look generation tasks submitted to the executor and not yet finished",
+)
+
+EXECUTOR_LATENCY = Histogram(
+    "look_executor_seconds",
+    "Look generation executor latency (wait = queued, run = executing)",
+    ["stage"],
+)
+
+
+def timed(service: str, method: str):
+    """Decorator recording an async function's latency in SERVICE_LATENCY."""
+    histogram = SERVICE_LATENCY.labels(service, method)
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return wrapper
+
+    return decorator
+
+
+def record_cache(cache: str, hit: bool):
+    """Record a cache lookup."""
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+class _RuntimeCollector:
+    """Gauges computed at scrape time: pool size and cache hit ratios."""
+
+    def describe(self):
+        # Lets the registry learn the metric names without calling collect()
+        yield GaugeMetricFamily("db_pool_connections", "", labels=["state"])
+        yield GaugeMetricFamily("cache_hit_ratio", "", labels=["cache"])
+
+    def collect(self):
+        from app.database import Database
+
+        pool = GaugeMetricFamily(
+            "db_pool_connections", "Database pool connections by state", labels=["state"]
+        )
+        if Database.pool is not None:
+            size = Database.pool.get_size()
+            idle = Database.pool.get_idle_size()
+            pool.add_metric(["open"], size)
+            pool.add_metric(["idle"], idle)
+            pool.add_metric(["in_use"], size - idle)
+            pool.add_metric(["max"], Database.pool.get_max_size())
+        yield pool
+
+        ratios = GaugeMetricFamily(
+            "cache_hit_ratio", "Cache hit ratio since process start", labels=["cache"]
+        )
+        totals: dict[str, list[float]] = {}
+        for metric in CACHE_REQUESTS.collect():
+            for sample in metric.samples:
+                if not sample.name.endswith("_total"):
+                    continue
+                counts = totals.setdefault(sample.labels["cache"], [0.0, 0.0])
+                counts[0 if sample.labels["result"] == "hit" else 1] += sample.value
+        for cache, (hits, misses) in totals.items():
+            if hits + misses:
+                ratios.add_metric([cache], hits / (hits + misses))
+        yield ratios
+
+
+REGISTRY.register(_RuntimeCollector())
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and status per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            # Use the route template so SKUs don't explode label cardinality
+            path = route.path if route is not None else "unmatched"
+            method = scope["method"]
+            REQUEST_LATENCY.labels(method, path).observe(time.perf_counter() - start)
+            REQUEST_COUNT.labels(method, path, str(status)).inc()
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Render all metrics in the Prometheus text format."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
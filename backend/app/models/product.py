@@ -1,8 +1,10 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, computed_field
 from typing import Optional
 from datetime import datetime
 from enum import Enum
 
+from app.services.images import thumbnail_urls
+
 
 class FunctionalSlot(str, Enum):
     BASE_TOP = "Base Top"
@@ -13,6 +15,19 @@ class FunctionalSlot(str, Enum):
     ACCESSORY = "Accessory"
 
 
+# Stable small-integer codes for normalized (lowercase) slot names.
+# Used wherever slots are stored compactly; never renumber existing codes.
+SLOT_CODES = {
+    "base top": 0,
+    "outerwear": 1,
+    "primary bottom": 2,
+    "secondary bottom": 3,
+    "footwear": 4,
+    "accessory": 5,
+}
+SLOT_NAMES = {code: name for name, code in SLOT_CODES.items()}
+
+
 class Gender(str, Enum):
     MEN = "Men"
     WOMEN = "Women"
@@ -57,6 +72,12 @@ class ProductResponse(ProductBase):
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
+    @computed_field
+    @property
+    def thumbnail_urls(self) -> dict[str, str]:
+        """Resized WebP image URL per width (served by /images)."""
+        return thumbnail_urls(self.sku_id, self.image_url)
+
     class Config:
         from_attributes = True
 
@@ -187,3 +208,51 @@ class LooksResponse(BaseModel):
     base_product: ProductResponse
     looks: list[Look]
     total_looks: int
+
+
+class BatchLooksRequest(BaseModel):
+    """Request to generate looks for many base products at once."""
+    base_skus: list[str] = Field(..., min_length=1, max_length=50)
+    num_looks: int = Field(10, ge=1, le=15)
+
+
+class BatchLooksResult(BaseModel):
+    """Looks for one base product in a batch, or the error that prevented them."""
+    base_sku: str
+    result: Optional[LooksResponse] = None
+    error: Optional[str] = None
+
+
+class BatchLooksResponse(BaseModel):
+    """Response containing per-SKU results for a batch look generation."""
+    results: list[BatchLooksResult]
+    total_succeeded: int
+    total_failed: int
+
+
+class CompleteOutfitRequest(BaseModel):
+    """Request to fill the open slots of a partial outfit."""
+    sku_ids: list[str] = Field(..., min_length=1, max_length=4)
+    slots: Optional[list[str]] = None
+    num_completions: int = Field(5, ge=1, le=20)
+    min_score: float = Field(0.0, ge=0.0, le=1.0)
+
+
+class CompletionItem(LookItem):
+    """Item added to a partial outfit, with its mean pair score with the chosen items."""
+    score: float
+
+
+class OutfitCompletion(BaseModel):
+    """One way to fill the open slots; score is the mean of the item scores."""
+    items: dict[str, CompletionItem]
+    score: float
+
+
+class CompleteOutfitResponse(BaseModel):
+    """Completions of a partial outfit, best first."""
+    sku_ids: list[str]
+    open_slots: list[str]
+    unfilled_slots: list[str]
+    completions: list[OutfitCompletion]
+    total_completions: int
@@ -0,0 +1,45 @@
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+
+from app.services.images import (
+    IMAGE_FORMATS,
+    IMMUTABLE_CACHE_CONTROL,
+    ImageFetchError,
+    get_image_service,
+    image_version,
+)
+from app.services.product import ProductService
+
+router = APIRouter(prefix="/images", tags=["Images"])
+
+
+@router.get("/{sku_id}/{width}.{fmt}")
+async def get_thumbnail(sku_id: str, width: int, fmt: str, v: Optional[str] = None):
+    """
+    Get a resized product image (WebP or JPEG) from the local image cache.
+
+    - **width**: One of the configured thumbnail widths
+    - **fmt**: `webp` or `jpg`
+    - **v**: Image version from `thumbnail_urls`; versioned URLs are served as immutable
+    """
+    product = await ProductService.get_by_sku(sku_id)
+    if not product or not product.get("image_url"):
+        raise HTTPException(status_code=404, detail="Product image not found")
+
+    image_url = product["image_url"]
+    try:
+        path = await get_image_service().get_variant(image_url, width, fmt)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ImageFetchError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+    # A stale version means the product's image changed: don't let it stick
+    cache_control = IMMUTABLE_CACHE_CONTROL if v == image_version(image_url) else "public, max-age=300"
+    return FileResponse(
+        path,
+        media_type=IMAGE_FORMATS[fmt][1],
+        headers={"Cache-Control": cache_control},
+    )
@@ -7,13 +7,20 @@ from app.models.product import (
     OutfitScoreRequest,
     OutfitScoreResponse,
     LooksResponse,
+    BatchLooksRequest,
+    BatchLooksResult,
+    BatchLooksResponse,
+    CompleteOutfitRequest,
+    CompleteOutfitResponse,
+    CompletionItem,
+    OutfitCompletion,
     Look,
     LookItem,
     ProductResponse,
 )
 from app.services.compatibility import get_compatibility_graph
 from app.services.product import ProductService
-from app.services.look_generator import get_look_generator
+from app.services.look_generator import ALL_SLOTS, get_look_generator, normalize_slot
 
 router = APIRouter(prefix="/outfits", tags=["Outfits"])
 
@@ -179,6 +186,61 @@ async def generate_outfit(
     }
 
 
+@router.post("/complete", response_model=CompleteOutfitResponse)
+async def complete_outfit(request: CompleteOutfitRequest):
+    """
+    Fill the remaining slots of a partial outfit (e.g. a cart).
+
+    - **sku_ids**: The items already chosen (1-4)
+    - **slots**: Slots to fill (defaults to every slot not taken by a chosen item)
+    - **num_completions**: Number of completions to return (1-20, default 5)
+    - **min_score**: Minimum compatibility score with each chosen item
+
+    Candidates must be compatible with every chosen item and are ranked by
+    their mean pair score with them; each completion's items are also valid
+    and color-harmonious with each other. Open slots nothing fits are listed
+    in `unfilled_slots`.
+    """
+    unknown = [slot for slot in request.slots or [] if normalize_slot(slot) not in ALL_SLOTS]
+    if unknown:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown slots: {', '.join(unknown)} (expected {', '.join(ALL_SLOTS)})",
+        )
+
+    look_generator = get_look_generator()
+
+    try:
+        open_slots, completions = await look_generator.complete_outfit(
+            sku_ids=request.sku_ids,
+            slots=request.slots,
+            num_completions=request.num_completions,
+            min_score=request.min_score,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    filled = {slot for completion in completions for slot in completion.items}
+    response_completions = []
+    for completion in completions:
+        completion_dict = completion.to_dict()
+        response_completions.append(OutfitCompletion(
+            items={
+                slot: CompletionItem(**item_data)
+                for slot, item_data in completion_dict["items"].items()
+            },
+            score=completion_dict["score"],
+        ))
+
+    return CompleteOutfitResponse(
+        sku_ids=request.sku_ids,
+        open_slots=open_slots,
+        unfilled_slots=[slot for slot in open_slots if slot not in filled],
+        completions=response_completions,
+        total_completions=len(response_completions),
+    )
+
+
 @router.get("/generate-looks", response_model=LooksResponse)
 async def generate_looks(
     base_sku: str,
@@ -205,7 +267,47 @@ async def generate_looks(
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
-    # Convert to response model
+    return _to_looks_response(base_product, looks)
+
+
+@router.post("/generate-looks/batch", response_model=BatchLooksResponse)
+async def generate_looks_batch(request: BatchLooksRequest):
+    """
+    Generate looks for up to 50 base products with one shared data fetch.
+
+    - **base_skus**: The starting item SKUs
+    - **num_looks**: Number of looks to generate per SKU (1-15, default 10)
+
+    Failures (e.g. unknown SKUs) are reported per SKU in `error` instead of
+    failing the whole batch.
+    """
+    look_generator = get_look_generator()
+    batch = await look_generator.generate_looks_batch(
+        base_skus=request.base_skus,
+        num_looks=request.num_looks,
+    )
+
+    results = []
+    for base_sku, outcome in batch.items():
+        if isinstance(outcome, Exception):
+            results.append(BatchLooksResult(base_sku=base_sku, error=str(outcome)))
+        else:
+            base_product, looks = outcome
+            results.append(BatchLooksResult(
+                base_sku=base_sku,
+                result=_to_looks_response(base_product, looks),
+            ))
+
+    failed = sum(1 for r in results if r.error is not None)
+    return BatchLooksResponse(
+        results=results,
+        total_succeeded=len(results) - failed,
+        total_failed=failed,
+    )
+
+
+def _to_looks_response(base_product: dict, looks: list) -> LooksResponse:
+    """Convert generated looks to the response model."""
     response_looks = []
     for look in looks:
         look_dict = look.to_dict()
@@ -1,8 +1,12 @@
-from fastapi import APIRouter
+from typing import Optional
+
+from fastapi import APIRouter, Query
 
 from app.models.product import GraphStats
 from app.services.compatibility import get_compatibility_graph
+from app.services.stats import get_stats_service
 from app.database import get_db
+from app.tracing import slow_requests
 
 router = APIRouter(prefix="/stats", tags=["Statistics"])
 
@@ -17,68 +21,7 @@ async def get_graph_stats():
 @router.get("/products")
 async def get_product_stats():
     """Get product inventory statistics."""
-    pool = await get_db()
-
-    async with pool.acquire() as conn:
-        total = await conn.fetchval("SELECT COUNT(*) FROM products")
-
-        categories = await conn.fetch(
-            """
-            SELECT category, COUNT(*) as count
-            FROM products
-            GROUP BY category
-            ORDER BY count DESC
-            """
-        )
-
-        slots = await conn.fetch(
-            """
-            SELECT functional_slot, COUNT(*) as count
-            FROM products
-            GROUP BY functional_slot
-            ORDER BY count DESC
-            """
-        )
-
-        genders = await conn.fetch(
-            """
-            SELECT gender, COUNT(*) as count
-            FROM products
-            GROUP BY gender
-            ORDER BY count DESC
-            """
-        )
-
-        top_brands = await conn.fetch(
-            """
-            SELECT brand, COUNT(*) as count
-            FROM products
-            WHERE brand IS NOT NULL
-            GROUP BY brand
-            ORDER BY count DESC
-            LIMIT 10
-            """
-        )
-
-        formality_dist = await conn.fetch(
-            """
-            SELECT formality_score, COUNT(*) as count
-            FROM products
-            GROUP BY formality_score
-            ORDER BY formality_score
-            """
-        )
-
-    return {
-        "total_products": total,
-        "by_category": {row["category"]: row["count"] for row in categories},
-        "by_slot": {row["functional_slot"]: row["count"] for row in slots},
-        "by_gender": {row["gender"]: row["count"] for row in genders},
-        "top_brands": {row["brand"]: row["count"] for row in top_brands},
-        "formality_distribution": {
-            str(row["formality_score"]): row["count"] for row in formality_dist
-        },
-    }
+    return await get_stats_service().get_product_stats()
 
 
 @router.get("/config")
@@ -92,6 +35,15 @@ async def get_site_config():
     }
 
 
+@router.get("/slow-requests")
+async def get_slow_requests(limit: Optional[int] = Query(None, ge=1)):
+    """Get the slowest recent requests with their phase timings."""
+    return {
+        "threshold_ms": slow_requests.threshold_ms,
+        "requests": slow_requests.slowest(limit),
+    }
+
+
 @router.get("/health")
 async def health_check():
     """Check API and database health."""
@@ -103,14 +55,16 @@ async def health_check():
     except Exception as e:
         db_status = f"unhealthy: {str(e)}"
 
-    graph = await get_compatibility_graph()
-    graph_stats = await graph.get_stats()
-    graph_loaded = graph_stats.get("total_edges", 0) > 0
-    graph_products = graph_stats.get("total_products", 0)
+    graph_metadata = {}
+    if db_status == "healthy":
+        graph = await get_compatibility_graph()
+        graph_metadata = await graph.get_metadata()
+    graph_loaded = graph_metadata.get("edge_count", 0) > 0
 
     return {
         "status": "ok" if db_status == "healthy" and graph_loaded else "degraded",
         "database": db_status,
         "compatibility_graph_loaded": graph_loaded,
-        "graph_products": graph_products,
+        "graph_products": graph_metadata.get("product_count", 0),
+        "graph_build_version": graph_metadata.get("build_version"),
     }
@@ -2,58 +2,219 @@
 Database-based Compatibility Graph Service
 ==========================================
 
-Queries compatibility_edges table with indexes for fast lookups.
-Preserves same interface as JSON-based service.
+Queries the compact compat_edges table (see edges.py) with index-only
+scans for fast lookups. Preserves same interface as JSON-based service.
 Uses sort_order column to maintain consistent ordering.
+
+When a shared snapshot is attached (see snapshot.py), lookups are served
+from its memory-mapped edge arrays instead, in the same order.
 """
 
 import logging
-import time
 from typing import Optional
 import asyncpg
+import numpy as np
 
 from app.database import get_db
+from app.metrics import timed
+from app.models.product import SLOT_CODES, SLOT_NAMES
+from app.services.edges import EDGE_SCORE
+from app.services.graph_metadata import read_graph_metadata, write_graph_metadata
+from app.services.snapshot import get_snapshot
+from app.services.stats import get_stats_service
 
 # Set up logging
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 logger.setLevel(logging.INFO)
 
+# Outgoing edges of one product, by SKU, as (slot code, sku, score) rows
+_EDGES_OF_SKU = f"""
+    SELECT e.slot, d.sku_id AS sku, {EDGE_SCORE} AS score
+    FROM product_ids s
+    JOIN compat_edges e ON e.src_id = s.id
+    JOIN product_ids d ON d.id = e.dst_id
+"""
+
+# First $2 edges per slot (scoring at least $3) of each product in $1,
+# one index-only LIMIT scan per (product, slot)
+_TOP_PER_SLOT = f"""
+    SELECT b.sku_id AS base, b.id AS base_id, sl.code AS slot, t.sort_order, t.dst_id, t.score
+    FROM product_ids b
+    CROSS JOIN edge_slots sl
+    CROSS JOIN LATERAL (
+        SELECT e.sort_order, e.dst_id, {EDGE_SCORE} AS score
+        FROM compat_edges e
+        WHERE e.src_id = b.id AND e.slot = sl.code AND {EDGE_SCORE} >= $3
+        ORDER BY e.sort_order
+        LIMIT $2
+    ) t
+    WHERE b.sku_id = ANY($1)
+"""
+
+
+def _candidates_with_cross_scores(batch: bool) -> str:
+    """
+    Top candidates per slot of each base ($1, $2 per slot), then the scores
+    between candidates of the same base, in one round trip.
+
+    Candidate rows have sku_1 NULL and come back unordered (see
+    _split_cross_rows), which spares sorting the cross rows.
+
+    For a batch, cross-scores are limited to candidates of the same base
+    and deduplicated, since bases can share candidate pairs.
+    """
+    if batch:
+        cross = "DISTINCT"
+        same_base = "c2.base_id = c1.base_id AND"
+    else:
+        cross = same_base = ""
+    return f"""
+        WITH top AS MATERIALIZED (
+            SELECT t.*, d.sku_id AS sku
+            FROM ({_TOP_PER_SLOT}) t
+            JOIN product_ids d ON d.id = t.dst_id
+        )
+        SELECT base, slot, sort_order, NULL::text AS sku_1, sku AS sku_2, score
+        FROM top
+        UNION ALL
+        SELECT {cross} NULL::text, NULL::smallint, NULL::integer, c1.sku, c2.sku, {EDGE_SCORE}
+        FROM top c1
+        JOIN compat_edges e ON e.src_id = c1.dst_id
+        JOIN top c2 ON {same_base} c2.dst_id = e.dst_id
+    """
+
+
+_CANDIDATES_WITH_CROSS_SCORES = _candidates_with_cross_scores(batch=False)
+_CANDIDATES_WITH_CROSS_SCORES_BATCH = _candidates_with_cross_scores(batch=True)
+
+# Outgoing edges of each product in $1 into the slots in $2 (scoring at
+# least $3), as adjacency lists sorted by candidate id
+_EDGES_INTO_SLOTS = f"""
+    SELECT s.sku_id AS src, e.slot, e.dst_id, {EDGE_SCORE} AS score
+    FROM product_ids s
+    JOIN compat_edges e ON e.src_id = s.id
+    WHERE s.sku_id = ANY($1) AND e.slot = ANY($2) AND {EDGE_SCORE} >= $3
+    ORDER BY e.src_id, e.slot, e.dst_id
+"""
+
+_PAIR_SCORE = f"""
+    SELECT {EDGE_SCORE}
+    FROM product_ids s
+    JOIN product_ids d ON d.sku_id = $2
+    JOIN compat_edges e ON e.src_id = s.id AND e.dst_id = d.id
+    WHERE s.sku_id = $1
+"""
+
+
+def _group_by_slot(rows, sku_column: str = "sku") -> dict[str, list[dict]]:
+    """
+    Group (slot code, sku, score) rows ordered by slot and sort_order into
+    {slot name: [{"sku", "score"}, ...]}.
+
+    Slots come out in name order, as the text target_slot column used to
+    sort them.
+    """
+    result: dict[str, list[dict]] = {}
+    for row in rows:
+        result.setdefault(SLOT_NAMES[row["slot"]], []).append(
+            {"sku": row[sku_column], "score": row["score"]}
+        )
+    return {slot: result[slot] for slot in sorted(result)}
+
+
+def _split_cross_rows(rows) -> tuple[dict[str, list], list]:
+    """
+    Split _candidates_with_cross_scores() rows into candidate rows per base,
+    bases in SKU order and rows in slot and sort_order order, and cross rows.
+    """
+    candidate_rows = []
+    cross_rows = []
+    for row in rows:
+        (cross_rows if row["sku_1"] is not None else candidate_rows).append(row)
+    candidate_rows.sort(key=lambda row: (row["base"], row["slot"], row["sort_order"]))
+
+    rows_by_base: dict[str, list] = {}
+    for row in candidate_rows:
+        rows_by_base.setdefault(row["base"], []).append(row)
+    return rows_by_base, cross_rows
+
+
+def _intersect_sorted(lists: list[tuple[np.ndarray, np.ndarray]]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Intersect (ids, scores) adjacency lists sorted by id.
+
+    Returns the ids found in every list, ascending, and their scores with
+    one column per list, in the given order. Lists are merged shortest
+    first, so the running intersection only shrinks.
+    """
+    order = sorted(range(len(lists)), key=lambda i: len(lists[i][0]))
+    ids = lists[order[0]][0]
+    positions = {order[0]: np.arange(len(ids))}
+    for i in order[1:]:
+        ids, kept, found = np.intersect1d(ids, lists[i][0], assume_unique=True, return_indices=True)
+        positions = {j: position[kept] for j, position in positions.items()}
+        positions[i] = found
+    scores = np.column_stack([lists[i][1][positions[i]] for i in range(len(lists))])
+    return ids, scores
+
 
 class CompatibilityGraphDB:
     """
     Compatibility graph backed by PostgreSQL with indexes.
 
-    All lookups use indexed queries on compatibility_edges table.
+    All lookups use index-only scans on the compat_edges table.
     sort_order column ensures results match JSON order exactly.
     """
 
     _instance: Optional["CompatibilityGraphDB"] = None
     _initialized: bool = False
-    _stats_cache: Optional[dict] = None
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
 
+    @timed("graph", "initialize")
     async def initialize(self):
         """Initialize the service (verify DB connection)."""
         if self._initialized:
             return
 
-        pool = await get_db()
-        async with pool.acquire() as conn:
-            count = await conn.fetchval("SELECT COUNT(*) FROM compatibility_edges")
-            print(f"  DB compatibility graph initialized: {count:,} edges")
+        snapshot = get_snapshot()
+        if snapshot is not None:
+            print(f"  Snapshot compatibility graph attached: {snapshot.edge_count:,} edges "
+                  f"(generation {snapshot.generation})")
+            self._initialized = True
+            return
+
+        metadata = await self.get_metadata()
+        print(f"  DB compatibility graph initialized: {metadata['edge_count']:,} edges "
+              f"(build {metadata['build_version']})")
 
         self._initialized = True
 
+    @timed("graph", "get_metadata")
+    async def get_metadata(self) -> dict:
+        """
+        Get the graph summary row (counts, score stats, build version, checksum).
+
+        O(1); backfills the row with one scan of the edges if it is missing.
+        """
+        pool = await get_db()
+        async with pool.acquire() as conn:
+            metadata = await read_graph_metadata(conn)
+            if metadata is None:
+                logger.info("graph_metadata missing, backfilling from compat_edges")
+                metadata = await write_graph_metadata(conn)
+        return metadata
+
     @property
     def graph(self) -> dict:
         """For compatibility with JSON-based service (returns empty dict)."""
         return {}
 
+    @timed("graph", "get_compatible_items")
     async def get_compatible_items(
         self,
         sku_id: str,
@@ -62,93 +223,72 @@ class CompatibilityGraphDB:
         min_score: float = 0.0,
     ) -> dict[str, list[dict]]:
         """Get compatible items for a given SKU, optionally filtered by slot."""
-        start = time.perf_counter()
+        snapshot = get_snapshot()
+        if snapshot is not None:
+            return snapshot.compatible_by_slot(
+                sku_id, limit=limit, slot=slot.lower() if slot else None, min_score=min_score
+            )
+
         pool = await get_db()
         async with pool.acquire() as conn:
             if slot:
                 slot_lower = slot.lower()
-                rows = await conn.fetch("""
-                    SELECT sku_2 as sku, target_slot, score
-                    FROM compatibility_edges
-                    WHERE sku_1 = $1 AND LOWER(target_slot) = $2 AND score >= $3
-                    ORDER BY sort_order
+                slot_code = SLOT_CODES.get(slot_lower)
+                rows = [] if slot_code is None else await conn.fetch(f"""
+                    {_EDGES_OF_SKU}
+                    WHERE s.sku_id = $1 AND e.slot = $2 AND {EDGE_SCORE} >= $3
+                    ORDER BY e.sort_order
                     LIMIT $4
-                """, sku_id, slot_lower, min_score, limit)
+                """, sku_id, slot_code, min_score, limit)
 
-                elapsed = (time.perf_counter() - start) * 1000
                 if not rows:
-                    logger.info(f"[DB QUERY] get_compatible_items({sku_id}, slot={slot}) -> 0 results in {elapsed:.2f}ms")
+                    logger.debug("get_compatible_items(%s, slot=%s) -> 0 results", sku_id, slot)
                     return {}
 
                 items = [{"sku": row["sku"], "score": row["score"]} for row in rows]
-                logger.info(f"[DB QUERY] get_compatible_items({sku_id}, slot={slot}) -> {len(items)} results in {elapsed:.2f}ms")
+                logger.debug("get_compatible_items(%s, slot=%s) -> %s results", sku_id, slot, len(items))
                 return {slot_lower: items}
 
             else:
-                rows = await conn.fetch("""
-                    SELECT sku_2 as sku, target_slot, score
-                    FROM compatibility_edges
-                    WHERE sku_1 = $1 AND score >= $2
-                    ORDER BY target_slot, sort_order
-                """, sku_id, min_score)
-
-                elapsed = (time.perf_counter() - start) * 1000
+                rows = await conn.fetch(f"""
+                    SELECT t.slot, d.sku_id AS sku, t.score
+                    FROM ({_TOP_PER_SLOT}) t
+                    JOIN product_ids d ON d.id = t.dst_id
+                    ORDER BY t.slot, t.sort_order
+                """, [sku_id], limit, min_score)
+
                 if not rows:
-                    logger.info(f"[DB QUERY] get_compatible_items({sku_id}, all slots) -> 0 results in {elapsed:.2f}ms")
+                    logger.debug("get_compatible_items(%s, all slots) -> 0 results", sku_id)
                     return {}
 
-                # Group by slot
-                result = {}
-                slot_counts = {}
-                for row in rows:
-                    slot_lower = row["target_slot"].lower()
-                    if slot_lower not in result:
-                        result[slot_lower] = []
-                        slot_counts[slot_lower] = 0
-
-                    if slot_counts[slot_lower] < limit:
-                        result[slot_lower].append({
-                            "sku": row["sku"],
-                            "score": row["score"]
-                        })
-                        slot_counts[slot_lower] += 1
-
-                total_items = sum(len(v) for v in result.values())
-                logger.info(f"[DB QUERY] get_compatible_items({sku_id}, all slots) -> {total_items} results across {len(result)} slots in {elapsed:.2f}ms")
+                result = _group_by_slot(rows)
+                logger.debug("get_compatible_items(%s, all slots) -> %s slots", sku_id, len(result))
                 return result
 
+    @timed("graph", "get_all_compatible")
     async def get_all_compatible(self, sku_id: str) -> dict[str, list[dict]]:
         """Get ALL compatible items for a SKU (used for look generation)."""
-        start = time.perf_counter()
+        snapshot = get_snapshot()
+        if snapshot is not None:
+            return snapshot.compatible_by_slot(sku_id)
+
         pool = await get_db()
         async with pool.acquire() as conn:
-            rows = await conn.fetch("""
-                SELECT sku_2 as sku, target_slot, score
-                FROM compatibility_edges
-                WHERE sku_1 = $1
-                ORDER BY target_slot, sort_order
+            rows = await conn.fetch(f"""
+                {_EDGES_OF_SKU}
+                WHERE s.sku_id = $1
+                ORDER BY e.slot, e.sort_order
             """, sku_id)
 
-            elapsed = (time.perf_counter() - start) * 1000
             if not rows:
-                logger.info(f"[DB QUERY] get_all_compatible({sku_id}) -> 0 results in {elapsed:.2f}ms")
+                logger.debug("get_all_compatible(%s) -> 0 results", sku_id)
                 return {}
 
-            # Group by slot
-            result = {}
-            for row in rows:
-                slot_lower = row["target_slot"].lower()
-                if slot_lower not in result:
-                    result[slot_lower] = []
-                result[slot_lower].append({
-                    "sku": row["sku"],
-                    "score": row["score"]
-                })
-
-            total_items = sum(len(v) for v in result.values())
-            logger.info(f"[DB QUERY] get_all_compatible({sku_id}) -> {total_items} results across {len(result)} slots in {elapsed:.2f}ms")
+            result = _group_by_slot(rows)
+            logger.debug("get_all_compatible(%s) -> %s rows across %s slots", sku_id, len(rows), len(result))
             return result
 
+    @timed("graph", "get_compatible_with_cross_scores")
     async def get_compatible_with_cross_scores(
         self,
         sku_id: str,
@@ -161,87 +301,220 @@ class CompatibilityGraphDB:
             - compatible_by_slot: {slot_name: [{"sku": str, "score": float}, ...]}
             - pair_scores: {(sku1, sku2): score}
         """
-        start = time.perf_counter()
+        snapshot = get_snapshot()
+        if snapshot is not None:
+            return self._cross_scores_from_snapshot(snapshot, sku_id, candidates_per_slot)
+
         pool = await get_db()
         async with pool.acquire() as conn:
-            # Step 1: Get compatible items (limited per slot)
-            rows = await conn.fetch("""
-                SELECT sku_2 as sku, target_slot, score
-                FROM compatibility_edges
-                WHERE sku_1 = $1
-                ORDER BY target_slot, sort_order
-            """, sku_id)
+            # Top candidates per slot and the cross-scores between them
+            rows = await conn.fetch(
+                _CANDIDATES_WITH_CROSS_SCORES, [sku_id], candidates_per_slot, 0.0
+            )
 
-            if not rows:
-                return {}, {}
+        rows_by_base, cross_rows = _split_cross_rows(rows)
+        if sku_id not in rows_by_base:
+            return {}, {}
 
-            # Group by slot with limit
-            compatible_by_slot = {}
-            slot_counts = {}
-            all_candidate_skus = set()
+        compatible_by_slot = _group_by_slot(rows_by_base[sku_id], "sku_2")
 
-            for row in rows:
-                slot_lower = row["target_slot"].lower()
-                if slot_lower not in compatible_by_slot:
-                    compatible_by_slot[slot_lower] = []
-                    slot_counts[slot_lower] = 0
-
-                if slot_counts[slot_lower] < candidates_per_slot:
-                    compatible_by_slot[slot_lower].append({
-                        "sku": row["sku"],
-                        "score": row["score"]
-                    })
-                    all_candidate_skus.add(row["sku"])
-                    slot_counts[slot_lower] += 1
-
-            # Step 2: Build pair scores
+        # Build pair scores
+        pair_scores = {}
+        all_candidate_skus = set()
+
+        # Base to candidate scores
+        for items in compatible_by_slot.values():
+            for item in items:
+                pair_scores[(sku_id, item["sku"])] = item["score"]
+                pair_scores[(item["sku"], sku_id)] = item["score"]
+                all_candidate_skus.add(item["sku"])
+
+        # Cross-scores between candidates
+        for row in cross_rows:
+            pair_scores[(row["sku_1"], row["sku_2"])] = row["score"]
+            pair_scores[(row["sku_2"], row["sku_1"])] = row["score"]
+
+        logger.debug("get_compatible_with_cross_scores(%s) -> %s candidates, %s pair scores", sku_id, len(all_candidate_skus), len(pair_scores))
+        return compatible_by_slot, pair_scores
+
+    @timed("graph", "get_compatible_with_cross_scores_batch")
+    async def get_compatible_with_cross_scores_batch(
+        self,
+        sku_ids: list[str],
+        candidates_per_slot: int = 25
+    ) -> tuple[dict[str, dict[str, list[dict]]], dict[tuple[str, str], float]]:
+        """
+        Batch version of get_compatible_with_cross_scores for many base SKUs.
+
+        Fetches every base's top candidates per slot and the cross-scores
+        between each base's candidates in one query. Cross-scores are deduplicated
+        across bases into a single shared pair map; since graph scores are
+        symmetric facts, every base sees exactly the scores it would have
+        fetched on its own.
+
+        Returns:
+            - compatible_by_base: {base_sku: {slot_name: [{"sku": str, "score": float}, ...]}}
+            - pair_scores: {(sku1, sku2): score}
+        """
+        if not sku_ids:
+            return {}, {}
+
+        snapshot = get_snapshot()
+        if snapshot is not None:
+            compatible_by_base = {}
             pair_scores = {}
+            for sku_id in sku_ids:
+                compatible_by_slot, base_scores = self._cross_scores_from_snapshot(
+                    snapshot, sku_id, candidates_per_slot
+                )
+                if compatible_by_slot:
+                    compatible_by_base[sku_id] = compatible_by_slot
+                    pair_scores.update(base_scores)
+            return compatible_by_base, pair_scores
+
+        pool = await get_db()
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(
+                _CANDIDATES_WITH_CROSS_SCORES_BATCH, sku_ids, candidates_per_slot, 0.0
+            )
 
-            # Base to candidate scores
+        rows_by_base, cross_rows = _split_cross_rows(rows)
+
+        compatible_by_base: dict[str, dict[str, list[dict]]] = {}
+        pair_scores = {}
+        candidate_count = 0
+
+        for base, base_rows in rows_by_base.items():
+            compatible_by_slot = _group_by_slot(base_rows, "sku_2")
+            compatible_by_base[base] = compatible_by_slot
             for items in compatible_by_slot.values():
+                candidate_count += len(items)
                 for item in items:
-                    pair_scores[(sku_id, item["sku"])] = item["score"]
-                    pair_scores[(item["sku"], sku_id)] = item["score"]
-
-            # Step 3: Get cross-scores between candidates
-            if all_candidate_skus:
-                candidate_list = list(all_candidate_skus)
-                cross_rows = await conn.fetch("""
-                    SELECT sku_1, sku_2, score
-                    FROM compatibility_edges
-                    WHERE sku_1 = ANY($1) AND sku_2 = ANY($1)
-                """, candidate_list)
-
-                for row in cross_rows:
-                    pair_scores[(row["sku_1"], row["sku_2"])] = row["score"]
-                    pair_scores[(row["sku_2"], row["sku_1"])] = row["score"]
-
-            elapsed = (time.perf_counter() - start) * 1000
-            total_candidates = sum(len(v) for v in compatible_by_slot.values())
-            logger.info(f"[DB QUERY] get_compatible_with_cross_scores({sku_id}) -> {total_candidates} candidates, {len(pair_scores)} pair scores in {elapsed:.2f}ms")
-            return compatible_by_slot, pair_scores
+                    pair_scores[(base, item["sku"])] = item["score"]
+                    pair_scores[(item["sku"], base)] = item["score"]
+
+        for row in cross_rows:
+            pair_scores[(row["sku_1"], row["sku_2"])] = row["score"]
+            pair_scores[(row["sku_2"], row["sku_1"])] = row["score"]
+
+        logger.debug("get_compatible_with_cross_scores_batch(%s skus) -> %s candidates, %s pair scores", len(sku_ids), candidate_count, len(pair_scores))
+        return compatible_by_base, pair_scores
+
+    @timed("graph", "get_common_compatible")
+    async def get_common_compatible(
+        self,
+        sku_ids: list[str],
+        slots: list[str],
+        min_score: float = 0.0,
+    ) -> dict[str, list[dict]]:
+        """
+        Items compatible with every one of sku_ids, per slot.
+
+        Each SKU's edges into a slot form an adjacency list sorted by product
+        id (row in the snapshot), so the common items are one sorted-list
+        intersection per slot. Returns {slot_name: [{"sku": str, "scores":
+        [float, ...]}, ...]}, scores[i] being the item's score with
+        sku_ids[i]; slots with no common item are left out.
+        """
+        if not sku_ids:
+            return {}
+
+        snapshot = get_snapshot()
+        if snapshot is not None:
+            common = {}
+            for slot in slots:
+                lists = [snapshot.adjacency(sku_id, slot, min_score) for sku_id in sku_ids]
+                if None in lists:
+                    continue
+                rows, scores = _intersect_sorted(lists)
+                if len(rows):
+                    common[slot] = [
+                        {"sku": snapshot.sku(row), "scores": row_scores}
+                        for row, row_scores in zip(rows.tolist(), scores.tolist())
+                    ]
+            return common
+
+        slot_codes = [SLOT_CODES[slot] for slot in slots if slot in SLOT_CODES]
+        pool = await get_db()
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(_EDGES_INTO_SLOTS, sku_ids, slot_codes, min_score)
+
+            adjacency: dict[tuple[str, int], tuple[list, list]] = {}
+            for row in rows:
+                ids, scores = adjacency.setdefault((row["src"], row["slot"]), ([], []))
+                ids.append(row["dst_id"])
+                scores.append(row["score"])
+
+            common_ids = {}
+            for slot_code in slot_codes:
+                lists = [adjacency.get((sku_id, slot_code)) for sku_id in sku_ids]
+                if None in lists:
+                    continue
+                ids, scores = _intersect_sorted([(np.array(i), np.array(s)) for i, s in lists])
+                if len(ids):
+                    common_ids[SLOT_NAMES[slot_code]] = (ids.tolist(), scores.tolist())
+
+            if not common_ids:
+                return {}
+
+            # Only the survivors need their SKU
+            names = {
+                row["id"]: row["sku_id"]
+                for row in await conn.fetch(
+                    "SELECT id, sku_id FROM product_ids WHERE id = ANY($1)",
+                    list({i for ids, _ in common_ids.values() for i in ids}),
+                )
+            }
+
+        common = {
+            slot: [{"sku": names[i], "scores": s} for i, s in zip(ids, scores)]
+            for slot, (ids, scores) in common_ids.items()
+        }
+        logger.debug("get_common_compatible(%s) -> %s", sku_ids, {slot: len(items) for slot, items in common.items()})
+        return common
+
+    @staticmethod
+    def _cross_scores_from_snapshot(
+        snapshot, sku_id: str, candidates_per_slot: int
+    ) -> tuple[dict[str, list[dict]], dict[tuple[str, str], float]]:
+        """get_compatible_with_cross_scores served from the shared snapshot."""
+        compatible_by_slot = snapshot.compatible_by_slot(sku_id, limit=candidates_per_slot)
+        if not compatible_by_slot:
+            return {}, {}
+
+        pair_scores = {}
+        candidate_skus = set()
+        for items in compatible_by_slot.values():
+            for item in items:
+                pair_scores[(sku_id, item["sku"])] = item["score"]
+                pair_scores[(item["sku"], sku_id)] = item["score"]
+                candidate_skus.add(item["sku"])
+
+        snapshot.add_cross_scores(candidate_skus, pair_scores)
+        return compatible_by_slot, pair_scores
 
+    @timed("graph", "get_pair_score")
     async def get_pair_score(self, sku1: str, sku2: str) -> Optional[float]:
         """Get the compatibility score between two SKUs."""
-        start = time.perf_counter()
+        snapshot = get_snapshot()
+        if snapshot is not None:
+            score = snapshot.pair_scores(sku1, [sku2]).get(sku2)
+            if score is None:
+                score = snapshot.pair_scores(sku2, [sku1]).get(sku1)
+            return score
+
         pool = await get_db()
         async with pool.acquire() as conn:
-            score = await conn.fetchval("""
-                SELECT score FROM compatibility_edges
-                WHERE sku_1 = $1 AND sku_2 = $2
-            """, sku1, sku2)
+            score = await conn.fetchval(_PAIR_SCORE, sku1, sku2)
 
             if score is None:
                 # Try reverse
-                score = await conn.fetchval("""
-                    SELECT score FROM compatibility_edges
-                    WHERE sku_1 = $1 AND sku_2 = $2
-                """, sku2, sku1)
+                score = await conn.fetchval(_PAIR_SCORE, sku2, sku1)
 
-            elapsed = (time.perf_counter() - start) * 1000
-            logger.info(f"[DB QUERY] get_pair_score({sku1}, {sku2}) -> {score} in {elapsed:.2f}ms")
+            logger.debug("get_pair_score(%s, %s) -> %s", sku1, sku2, score)
             return score
 
+    @timed("graph", "get_pair_scores_batch")
     async def get_pair_scores_batch(
         self,
         sku1: str,
@@ -251,15 +524,23 @@ class CompatibilityGraphDB:
         if not sku2_list:
             return {}
 
+        snapshot = get_snapshot()
+        if snapshot is not None:
+            return snapshot.pair_scores(sku1, sku2_list)
+
         pool = await get_db()
         async with pool.acquire() as conn:
-            rows = await conn.fetch("""
-                SELECT sku_2, score FROM compatibility_edges
-                WHERE sku_1 = $1 AND sku_2 = ANY($2)
+            rows = await conn.fetch(f"""
+                SELECT d.sku_id AS sku_2, {EDGE_SCORE} AS score
+                FROM product_ids s
+                JOIN compat_edges e ON e.src_id = s.id
+                JOIN product_ids d ON d.id = e.dst_id
+                WHERE s.sku_id = $1 AND d.sku_id = ANY($2)
             """, sku1, sku2_list)
 
             return {row["sku_2"]: row["score"] for row in rows}
 
+    @timed("graph", "calculate_outfit_score")
     async def calculate_outfit_score(self, sku_ids: list[str]) -> dict:
         """Calculate total outfit score for a list of SKUs."""
         pair_scores = {}
@@ -285,28 +566,10 @@ class CompatibilityGraphDB:
             "pair_count": pair_count,
         }
 
+    @timed("graph", "get_stats")
     async def get_stats(self) -> dict:
-        """Get graph statistics from database."""
-        if self._stats_cache:
-            logger.info(f"[DB QUERY] get_stats() -> cached: {self._stats_cache['total_edges']} edges")
-            return self._stats_cache
-
-        start = time.perf_counter()
-        pool = await get_db()
-        async with pool.acquire() as conn:
-            total_edges = await conn.fetchval("SELECT COUNT(*) FROM compatibility_edges")
-            unique_products = await conn.fetchval("SELECT COUNT(DISTINCT sku_1) FROM compatibility_edges")
-            avg_score = await conn.fetchval("SELECT AVG(score) FROM compatibility_edges")
-
-            self._stats_cache = {
-                "total_edges": total_edges,
-                "total_products": unique_products,
-                "avg_score": round(float(avg_score or 0), 3),
-            }
-
-        elapsed = (time.perf_counter() - start) * 1000
-        logger.info(f"[DB QUERY] get_stats() -> {total_edges} edges, {unique_products} products in {elapsed:.2f}ms")
-        return self._stats_cache
+        """Get graph statistics (materialized per data version by the stats service)."""
+        return await get_stats_service().get_graph_stats()
 
 
 # Singleton accessor
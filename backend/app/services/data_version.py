@@ -0,0 +1,209 @@
+"""
+Data Versions
+=============
+
+The data_version table holds one counter per data set (DATA_SETS). Every
+script that changes a data set calls bump_data_version(<data set>) in the
+same transaction; the SQL function increments the counter and NOTIFYs
+DATA_VERSION_CHANNEL with "<data set>:<version>", which Postgres delivers
+when the transaction commits.
+
+The API keeps one LISTEN connection (DataVersionBus). Caches subscribe()
+a callback per data set and drop what they hold when its version changes,
+so their TTLs are only a safety net. The bus also rereads the table every
+data_version_check_seconds, which catches changes missed while it was
+reconnecting, or everywhere if notifications can't reach it (LISTEN needs a
+session, so it does not work through a transaction-mode pooler).
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Callable, Optional
+
+import asyncpg
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+DATA_SETS = ("products", "graph", "looks", "snapshot")
+DATA_VERSION_CHANNEL = "data_version"
+RECONNECT_SECONDS = 5.0
+
+# Idempotent; safe to run before every bump
+DATA_VERSION_SQL = f"""
+    CREATE TABLE IF NOT EXISTS data_version (
+        name TEXT PRIMARY KEY,
+        version BIGINT NOT NULL,
+        updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    );
+
+    CREATE OR REPLACE FUNCTION bump_data_version(data_set TEXT) RETURNS BIGINT AS $$
+    DECLARE
+        new_version BIGINT;
+    BEGIN
+        INSERT INTO data_version (name, version) VALUES (data_set, 1)
+        ON CONFLICT (name) DO UPDATE
+            SET version = data_version.version + 1, updated_at = NOW()
+        RETURNING version INTO new_version;
+        PERFORM pg_notify('{DATA_VERSION_CHANNEL}', data_set || ':' || new_version);
+        RETURN new_version;
+    END;
+    $$ LANGUAGE plpgsql;
+"""
+
+
+async def create_data_version_table(conn: asyncpg.Connection):
+    """Create data_version and bump_data_version() if they don't exist."""
+    await conn.execute(DATA_VERSION_SQL)
+
+
+async def bump_data_version(conn: asyncpg.Connection, *data_sets: str) -> dict[str, int]:
+    """Bump the given data sets; listeners are notified when the transaction commits."""
+    return {
+        name: await conn.fetchval("SELECT bump_data_version($1)", name)
+        for name in data_sets
+    }
+
+
+async def read_data_versions(conn: asyncpg.Connection) -> Optional[dict[str, int]]:
+    """Current version per data set, or None if the table doesn't exist yet."""
+    try:
+        rows = await conn.fetch("SELECT name, version FROM data_version")
+    except asyncpg.UndefinedTableError:
+        return None
+    return {row["name"]: row["version"] for row in rows}
+
+
+class DataVersionBus:
+    """
+    Follows data_version through LISTEN/NOTIFY and runs invalidation callbacks.
+
+    versions is None until start() has read the table (or if it doesn't
+    exist); callers then fall back to querying the database themselves.
+    """
+
+    _instance: Optional["DataVersionBus"] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            settings = get_settings()
+            cls._instance = super().__new__(cls)
+            cls._instance.check_seconds = settings.data_version_check_seconds
+            cls._instance.versions = None
+            cls._instance._callbacks = defaultdict(list)
+            cls._instance._conn = None
+            cls._instance._task = None
+        return cls._instance
+
+    def subscribe(self, data_set: str, callback: Callable[[], None]):
+        """Call callback (synchronously, on the event loop) when data_set changes."""
+        if data_set not in DATA_SETS:
+            raise ValueError(f"Unknown data set {data_set!r}")
+        self._callbacks[data_set].append(callback)
+
+    def _apply(self, versions: dict[str, int], baseline: bool = False):
+        """
+        Record versions, running the callbacks of every data set that changed.
+
+        baseline is the first read at connect: nothing cached can predate
+        it, so it is recorded without callbacks. Versions arriving later
+        while there is no baseline (the table was created after we
+        connected) are all changes.
+        """
+        if self.versions is None:
+            if baseline:
+                self.versions = dict(versions)
+                return
+            self.versions = {}
+        for name, version in versions.items():
+            if self.versions.get(name) == version:
+                continue
+            logger.info("Data version %s: %s -> %s", name, self.versions.get(name), version)
+            self.versions[name] = version
+            for callback in self._callbacks[name]:
+                try:
+                    callback()
+                except Exception:
+                    logger.exception("Invalidation callback for %s failed", name)
+
+    def _on_notify(self, conn, pid, channel, payload: str):
+        name, _, version = payload.rpartition(":")
+        try:
+            self._apply({name: int(version)})
+        except ValueError:
+            logger.warning("Ignoring malformed %s payload %r", channel, payload)
+
+    async def _connect(self):
+        conn = await asyncpg.connect(
+            get_settings().get_database_url(),
+            statement_cache_size=0,
+        )
+        try:
+            await conn.add_listener(DATA_VERSION_CHANNEL, self._on_notify)
+            # Read after LISTEN, so no bump falls between the two
+            versions = await read_data_versions(conn)
+        except BaseException:
+            await conn.close()
+            raise
+        if versions is not None:
+            self._apply(versions, baseline=self.versions is None)
+        self._conn = conn
+
+    async def _run(self):
+        while True:
+            try:
+                if self._conn is None:
+                    await self._connect()
+                await asyncio.sleep(self.check_seconds)
+                # Also the liveness check: a dropped connection raises here
+                versions = await read_data_versions(self._conn)
+                if versions is not None:
+                    self._apply(versions)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Data version listener failed (%s); reconnecting", e)
+                await self._close()
+                await asyncio.sleep(RECONNECT_SECONDS)
+
+    async def start(self):
+        """Connect, read the current versions and follow changes in the background."""
+        if self._task is not None:
+            return
+        try:
+            await self._connect()
+        except (OSError, asyncpg.PostgresError) as e:
+            logger.warning("Data version listener not connected (%s); will retry", e)
+        self._task = asyncio.create_task(self._run())
+
+    async def _close(self):
+        if self._conn is not None:
+            try:
+                await self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._close()
+
+
+# Singleton accessor
+_data_version_bus: Optional[DataVersionBus] = None
+
+
+def get_data_version_bus() -> DataVersionBus:
+    """Get the singleton data version bus."""
+    global _data_version_bus
+    if _data_version_bus is None:
+        _data_version_bus = DataVersionBus()
+    return _data_version_bus
@@ -0,0 +1,156 @@
+"""
+Compact Edge Storage
+====================
+
+The compatibility graph is stored in compat_edges, one 16-byte row per edge:
+
+- src_id, dst_id: integer product ids; product_ids maps them to sku_id
+- slot: SMALLINT slot code (SLOT_CODES); edge_slots names them for SQL
+- sort_order: position within (src_id, slot), as in the source graph
+- score: SMALLINT thousandths (scores have 3 decimals)
+
+idx_compat_edges_src covers (src_id, slot, sort_order) INCLUDE (dst_id,
+score), so candidate fetches are index-only scans; the primary key
+(src_id, dst_id) serves pair lookups.
+
+EDGE_SCORE decodes a score to the same REAL value the old text-keyed
+compatibility_edges table stored, so scores are bit-identical.
+
+Functions take a connection so standalone scripts can use them too.
+"""
+
+from typing import Iterable
+
+import asyncpg
+
+from app.models.product import SLOT_CODES
+
+SCORE_SCALE = 1000
+
+# Decoded score of compat_edges row "e" (REAL, as the old table stored it)
+EDGE_SCORE = f"(e.score::real / {SCORE_SCALE}::real)"
+
+
+def encode_score(score: float) -> int:
+    return round(float(score) * SCORE_SCALE)
+
+
+async def create_edge_tables(conn: asyncpg.Connection):
+    """Create product_ids, edge_slots and compat_edges (without indexes)."""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS product_ids (
+            id SERIAL PRIMARY KEY,
+            sku_id TEXT NOT NULL UNIQUE REFERENCES products(sku_id) ON DELETE CASCADE
+        )
+    """)
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS edge_slots (
+            code SMALLINT PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    """)
+    await conn.executemany(
+        "INSERT INTO edge_slots (code, name) VALUES ($1, $2) ON CONFLICT DO NOTHING",
+        [(code, name) for name, code in SLOT_CODES.items()],
+    )
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS compat_edges (
+            src_id INTEGER NOT NULL REFERENCES product_ids(id) ON DELETE CASCADE,
+            dst_id INTEGER NOT NULL REFERENCES product_ids(id) ON DELETE CASCADE,
+            sort_order INTEGER NOT NULL,
+            slot SMALLINT NOT NULL,
+            score SMALLINT NOT NULL
+        )
+    """)
+
+
+async def create_edge_indexes(conn: asyncpg.Connection):
+    """Add the key and indexes; run after bulk loading compat_edges."""
+    await conn.execute("ALTER TABLE compat_edges ADD PRIMARY KEY (src_id, dst_id)")
+    await conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_compat_edges_src
+        ON compat_edges (src_id, slot, sort_order) INCLUDE (dst_id, score)
+    """)
+    await conn.execute("CREATE INDEX IF NOT EXISTS idx_compat_edges_dst ON compat_edges (dst_id)")
+
+
+async def vacuum_edges(conn: asyncpg.Connection):
+    """Set the visibility map (index-only scans need it) and planner statistics.
+
+    Must run outside a transaction.
+    """
+    await conn.execute("VACUUM ANALYZE compat_edges")
+    await conn.execute("ANALYZE product_ids")
+    await conn.execute("ANALYZE edge_slots")
+
+
+async def assign_product_ids(conn: asyncpg.Connection) -> dict[str, int]:
+    """Give every product without one an integer id; returns sku_id -> id."""
+    await conn.execute("""
+        INSERT INTO product_ids (sku_id)
+        SELECT p.sku_id FROM products p
+        WHERE NOT EXISTS (SELECT 1 FROM product_ids i WHERE i.sku_id = p.sku_id)
+        ORDER BY p.sku_id
+    """)
+    rows = await conn.fetch("SELECT sku_id, id FROM product_ids")
+    return {row["sku_id"]: row["id"] for row in rows}
+
+
+async def load_edges(
+    conn: asyncpg.Connection,
+    edges: Iterable[tuple[str, str, str, float, int]],
+) -> int:
+    """
+    COPY (sku_1, sku_2, target_slot, score, sort_order) edges into compat_edges.
+
+    Products get ids as needed; the first edge per (sku_1, sku_2) pair wins.
+    Returns the number of edges loaded.
+    """
+    ids = await assign_product_ids(conn)
+    seen = set()
+    records = []
+    for sku_1, sku_2, slot, score, sort_order in edges:
+        pair = (ids[sku_1], ids[sku_2])
+        if pair not in seen:
+            seen.add(pair)
+            records.append((*pair, sort_order, SLOT_CODES[slot.lower()], encode_score(score)))
+    await conn.copy_records_to_table(
+        "compat_edges",
+        records=records,
+        columns=["src_id", "dst_id", "sort_order", "slot", "score"],
+    )
+    return len(records)
+
+
+async def migrate_legacy_edges(conn: asyncpg.Connection) -> int:
+    """
+    Build compat_edges from a text-keyed compatibility_edges table.
+
+    Returns the number of edges copied, or 0 if there is nothing to migrate
+    (no legacy table, or compat_edges already exists). The legacy table is
+    left in place; drop it once the app runs on compat_edges.
+    """
+    legacy, compact = await conn.fetchrow("""
+        SELECT to_regclass('compatibility_edges') IS NOT NULL,
+               to_regclass('compat_edges') IS NOT NULL
+    """)
+    if not legacy or compact:
+        return 0
+
+    async with conn.transaction():
+        await create_edge_tables(conn)
+        await conn.execute("""
+            INSERT INTO product_ids (sku_id)
+            SELECT sku_id FROM products ORDER BY sku_id
+        """)
+        status = await conn.execute(f"""
+            INSERT INTO compat_edges (src_id, dst_id, sort_order, slot, score)
+            SELECT s.id, d.id, e.sort_order, sl.code, round(e.score * {SCORE_SCALE})
+            FROM compatibility_edges e
+            JOIN product_ids s ON s.sku_id = e.sku_1
+            JOIN product_ids d ON d.sku_id = e.sku_2
+            JOIN edge_slots sl ON sl.name = lower(e.target_slot)
+        """)
+        await create_edge_indexes(conn)
+    await vacuum_edges(conn)
+    return int(status.split()[-1])
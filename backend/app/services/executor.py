@@ -0,0 +1,130 @@
+"""
+CPU Executor
+============
+
+Runs CPU-bound work (look generation) off the event loop.
+
+Modes (settings.look_executor):
+- none: run inline on the event loop (default), one task at a time with
+  a yield to the loop before each, so other requests are served between
+  the tasks of a batch
+- thread: thread pool; keeps the loop responsive, but still shares the GIL
+- process: process pool, forked once startup has warmed the product cache
+  and graph so workers share them copy-on-write
+
+Tasks must be module-level functions with picklable arguments and results.
+"""
+
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from app.config import get_settings
+from app.metrics import EXECUTOR_LATENCY, EXECUTOR_QUEUE_DEPTH
+
+EXECUTOR_MODES = ("none", "thread", "process")
+
+_WAIT = EXECUTOR_LATENCY.labels("wait")
+_RUN = EXECUTOR_LATENCY.labels("run")
+
+
+def _timed_call(fn: Callable, *args):
+    """Run fn in the worker, returning its result and run time."""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def _warm_up():
+    return None
+
+
+class CpuExecutor:
+    """Executor for CPU-bound tasks, configured by settings.look_executor."""
+
+    _instance: Optional["CpuExecutor"] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            settings = get_settings()
+            if settings.look_executor not in EXECUTOR_MODES:
+                raise ValueError(
+                    f"look_executor must be one of {', '.join(EXECUTOR_MODES)}, "
+                    f"got '{settings.look_executor}'"
+                )
+            cls._instance = super().__new__(cls)
+            cls._instance.mode = settings.look_executor
+            cls._instance.workers = settings.look_executor_workers
+            cls._instance._pool = None
+            cls._instance._inline_lock = asyncio.Lock()
+        return cls._instance
+
+    @property
+    def ships_arguments(self) -> bool:
+        """Whether task arguments are pickled to another process."""
+        return self._pool is not None and self.mode == "process"
+
+    def start(self):
+        """
+        Start the worker pool.
+
+        Call after startup warm-up: process workers are forked here, and
+        all of them at once, so each inherits the warmed caches.
+        """
+        if self._pool is not None or self.mode == "none":
+            return
+
+        if self.mode == "thread":
+            self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="looks")
+            return
+
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        self._pool = ProcessPoolExecutor(self.workers, mp_context=context)
+        for future in [self._pool.submit(_warm_up) for _ in range(self.workers)]:
+            future.result()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def run(self, fn: Callable, *args):
+        """Run fn(*args) in the executor (inline if there is no pool)."""
+        if self._pool is None:
+            # Tasks resumed in the same loop iteration would run back to back
+            # even after a yield; taking turns puts an I/O poll between them
+            queued = time.perf_counter()
+            async with self._inline_lock:
+                await asyncio.sleep(0)
+                start = time.perf_counter()
+                try:
+                    return fn(*args)
+                finally:
+                    _WAIT.observe(start - queued)
+                    _RUN.observe(time.perf_counter() - start)
+
+        loop = asyncio.get_running_loop()
+        EXECUTOR_QUEUE_DEPTH.inc()
+        start = time.perf_counter()
+        try:
+            result, run_seconds = await loop.run_in_executor(self._pool, _timed_call, fn, *args)
+        finally:
+            EXECUTOR_QUEUE_DEPTH.dec()
+        _RUN.observe(run_seconds)
+        _WAIT.observe(max(0.0, time.perf_counter() - start - run_seconds))
+        return result
+
+
+# Singleton accessor
+_cpu_executor: Optional[CpuExecutor] = None
+
+
+def get_cpu_executor() -> CpuExecutor:
+    """Get the singleton CPU executor."""
+    global _cpu_executor
+    if _cpu_executor is None:
+        _cpu_executor = CpuExecutor()
+    return _cpu_executor
@@ -0,0 +1,105 @@
+"""
+Graph Metadata
+==============
+
+One-row summary of the compatibility graph: edge and product counts, score
+statistics, build version and a checksum of the edges.
+
+Whatever (re)builds compat_edges writes the row once, after loading
+(seed_db.py does). Startup and health checks then read one row instead of
+scanning the edges table. If the row is missing, e.g. on a database seeded
+before it existed, the first read backfills it.
+
+Functions take a connection so standalone scripts can use them too.
+"""
+
+from datetime import datetime, timezone
+from typing import Optional
+
+import asyncpg
+
+from app.services.edges import EDGE_SCORE
+
+
+async def create_graph_metadata_table(conn: asyncpg.Connection):
+    """Create the graph_metadata table if it doesn't exist."""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS graph_metadata (
+            id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+            edge_count BIGINT NOT NULL,
+            product_count INTEGER NOT NULL,
+            min_score REAL,
+            max_score REAL,
+            avg_score REAL,
+            build_version TEXT NOT NULL,
+            checksum TEXT NOT NULL,
+            built_at TIMESTAMPTZ DEFAULT NOW()
+        )
+    """)
+
+
+async def write_graph_metadata(
+    conn: asyncpg.Connection,
+    build_version: Optional[str] = None,
+) -> dict:
+    """
+    Compute the graph summary from compat_edges and store it.
+
+    One full pass over the edges; run it when the graph is (re)built, not
+    per request. The checksum is an XOR of per-edge hashes, so it does not
+    depend on row order.
+    """
+    if build_version is None:
+        build_version = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+
+    await create_graph_metadata_table(conn)
+    row = await conn.fetchrow(f"""
+        INSERT INTO graph_metadata (
+            id, edge_count, product_count, min_score, max_score, avg_score,
+            build_version, checksum, built_at
+        )
+        SELECT
+            1,
+            COUNT(*),
+            COUNT(DISTINCT e.src_id),
+            MIN({EDGE_SCORE}),
+            MAX({EDGE_SCORE}),
+            AVG({EDGE_SCORE}),
+            $1,
+            lpad(to_hex(COALESCE(bit_xor(
+                ('x' || substr(md5(s.sku_id || '>' || d.sku_id || '=' || {EDGE_SCORE}::text), 1, 16))::bit(64)::bigint
+            ), 0)), 16, '0'),
+            NOW()
+        FROM compat_edges e
+        JOIN product_ids s ON s.id = e.src_id
+        JOIN product_ids d ON d.id = e.dst_id
+        ON CONFLICT (id) DO UPDATE SET
+            edge_count = EXCLUDED.edge_count,
+            product_count = EXCLUDED.product_count,
+            min_score = EXCLUDED.min_score,
+            max_score = EXCLUDED.max_score,
+            avg_score = EXCLUDED.avg_score,
+            build_version = EXCLUDED.build_version,
+            checksum = EXCLUDED.checksum,
+            built_at = EXCLUDED.built_at
+        RETURNING *
+    """, build_version)
+    return _row_to_metadata(row)
+
+
+async def read_graph_metadata(conn: asyncpg.Connection) -> Optional[dict]:
+    """Read the graph summary (None if it has not been written yet)."""
+    try:
+        row = await conn.fetchrow("SELECT * FROM graph_metadata WHERE id = 1")
+    except asyncpg.UndefinedTableError:
+        return None
+    return _row_to_metadata(row) if row else None
+
+
+def _row_to_metadata(row: asyncpg.Record) -> dict:
+    metadata = dict(row)
+    metadata.pop("id", None)
+    for key in ("min_score", "max_score", "avg_score"):
+        if metadata[key] is not None:
+            metadata[key] = round(float(metadata[key]), 3)
+    return metadata
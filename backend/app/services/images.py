@@ -0,0 +1,219 @@
+"""
+Image Thumbnail Service
+=======================
+
+Serves resized product images from a local disk cache.
+
+- Each original image_url is fetched once into <cache>/originals/
+- Variants are rendered on first request at a fixed set of widths
+  (settings.image_thumbnail_widths) as WebP or JPEG into <cache>/variants/
+- URLs carry a short hash of image_url (?v=), so a variant URL always
+  names the same bytes and can be cached by browsers/CDNs as immutable
+
+Concurrent requests for the same original or variant share one fetch/render.
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+from urllib.parse import quote
+
+import httpx
+from PIL import Image, ImageOps
+
+from app.config import get_settings
+from app.tracing import span
+
+IMAGE_FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpg": ("JPEG", "image/jpeg"),
+}
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+MAX_ORIGINAL_BYTES = 20 * 1024 * 1024
+FETCH_TIMEOUT_SECONDS = 15.0
+QUALITY = 80
+
+_settings = get_settings()
+
+
+class ImageFetchError(Exception):
+    """The original image could not be fetched or decoded."""
+
+
+def image_version(image_url: str) -> str:
+    """Short content key for an image URL (changes when the URL changes)."""
+    return hashlib.sha256(image_url.encode("utf-8")).hexdigest()[:12]
+
+
+def thumbnail_urls(sku_id: str, image_url: Optional[str]) -> dict[str, str]:
+    """WebP thumbnail URL per width (swap .webp for .jpg to get JPEG)."""
+    if not image_url:
+        return {}
+    base = f"{_settings.image_base_url}/api/v1/images/{quote(sku_id, safe='')}"
+    version = image_version(image_url)
+    return {
+        str(width): f"{base}/{width}.webp?v={version}"
+        for width in _settings.image_thumbnail_widths
+    }
+
+
+def _decode(original: Path, width: int, fmt: str) -> Image.Image:
+    """Decode original, resized to at most width pixels wide, in a mode fmt can store."""
+    try:
+        with Image.open(original) as img:
+            img.draft("RGB", (width, width * 4))  # Cheap JPEG downscale on decode
+            img = ImageOps.exif_transpose(img)
+            if img.width > width:
+                img.thumbnail((width, img.height), Image.Resampling.LANCZOS)
+
+            if IMAGE_FORMATS[fmt][0] == "JPEG" and img.mode != "RGB":
+                # JPEG has no alpha: flatten onto white
+                rgba = img.convert("RGBA")
+                img = Image.new("RGB", rgba.size, (255, 255, 255))
+                img.paste(rgba, mask=rgba.getchannel("A"))
+            elif img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA")
+            img.load()
+            return img
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ImageFetchError(f"Could not decode image: {e}") from e
+
+
+def _render(original: Path, dest: Path, width: int, fmt: str):
+    """
+    Resize original to at most width pixels wide and save it as fmt.
+
+    Raises ImageFetchError if original can't be decoded; errors writing
+    dest (e.g. a full disk) propagate as they are.
+    """
+    img = _decode(original, width, fmt)
+    tmp = dest.with_name(f"{dest.name}.tmp-{os.getpid()}")
+    try:
+        img.save(tmp, IMAGE_FORMATS[fmt][0], quality=QUALITY)
+        os.replace(tmp, dest)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+class ImageService:
+    """Disk-cached image fetcher and thumbnail renderer."""
+
+    _instance: Optional["ImageService"] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cache_dir = _settings.image_cache_dir or os.path.join(
+                tempfile.gettempdir(), "dclg-image-cache"
+            )
+            cls._instance.cache_dir = Path(cache_dir)
+            cls._instance.widths = set(_settings.image_thumbnail_widths)
+            cls._instance._client = None
+            cls._instance._inflight = {}
+        return cls._instance
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=FETCH_TIMEOUT_SECONDS,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _once(self, path: Path, produce: Callable[[], Awaitable[None]]) -> Path:
+        """Produce path unless it exists; concurrent callers share one attempt."""
+        if path.exists():
+            return path
+
+        pending = self._inflight.get(path)
+        if pending is not None:
+            await asyncio.shield(pending)
+            return path
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[path] = future
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            await produce()
+            future.set_result(None)
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved if nobody else is waiting
+            raise
+        finally:
+            del self._inflight[path]
+        return path
+
+    async def _original(self, image_url: str) -> Path:
+        path = self.cache_dir / "originals" / image_version(image_url)
+
+        async def fetch():
+            with span("image_fetch"):
+                try:
+                    async with self._http().stream("GET", image_url) as response:
+                        response.raise_for_status()
+                        chunks = []
+                        size = 0
+                        async for chunk in response.aiter_bytes():
+                            size += len(chunk)
+                            if size > MAX_ORIGINAL_BYTES:
+                                raise ImageFetchError("Original image too large")
+                            chunks.append(chunk)
+                except httpx.HTTPError as e:
+                    raise ImageFetchError(f"Could not fetch {image_url}: {e}") from e
+
+            tmp = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+            try:
+                tmp.write_bytes(b"".join(chunks))
+                os.replace(tmp, path)
+            finally:
+                tmp.unlink(missing_ok=True)
+
+        return await self._once(path, fetch)
+
+    async def get_variant(self, image_url: str, width: int, fmt: str) -> Path:
+        """
+        Get the cached variant of an image, fetching and rendering it if needed.
+
+        Raises ValueError for a width or format that is not offered, and
+        ImageFetchError if the original can't be fetched or decoded.
+        """
+        if width not in self.widths:
+            raise ValueError(f"Width must be one of {sorted(self.widths)}")
+        if fmt not in IMAGE_FORMATS:
+            raise ValueError(f"Format must be one of {', '.join(IMAGE_FORMATS)}")
+
+        path = self.cache_dir / "variants" / image_version(image_url) / f"{width}.{fmt}"
+
+        async def render():
+            original = await self._original(image_url)
+            with span("image_render"):
+                try:
+                    await asyncio.to_thread(_render, original, path, width, fmt)
+                except ImageFetchError:
+                    # Not an image: refetch next time in case the upstream is fixed
+                    original.unlink(missing_ok=True)
+                    raise
+
+        return await self._once(path, render)
+
+
+# Singleton accessor
+_image_service: Optional[ImageService] = None
+
+
+def get_image_service() -> ImageService:
+    """Get the singleton image service."""
+    global _image_service
+    if _image_service is None:
+        _image_service = ImageService()
+    return _image_service
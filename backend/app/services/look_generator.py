@@ -9,13 +9,19 @@ Database-backed implementation with:
 - Cached slot normalization
 """
 
-from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+import asyncio
+from typing import Callable, Dict, FrozenSet, List, Optional, Set, Tuple, Union
 from dataclasses import dataclass, field
 from collections import defaultdict
 from functools import lru_cache
 
+import numpy as np
+
+from app.metrics import LOOK_CANDIDATES
+from app.tracing import capture_spans, record_spans, span
 from app.services.product import ProductService
 from app.services.compatibility import get_compatibility_graph
+from app.services.executor import get_cpu_executor
 
 
 # ============================================================
@@ -24,6 +30,8 @@ from app.services.compatibility import get_compatibility_graph
 
 ALL_SLOTS = ["base top", "outerwear", "primary bottom", "footwear", "accessory"]
 
+CANDIDATES_PER_SLOT = 25
+
 NEUTRALS = frozenset({
     "black", "white", "gray", "grey", "beige", "cream", "navy",
     "brown", "tan", "charcoal", "ivory", "off-white", "khaki"
@@ -40,6 +48,12 @@ COLOR_FAMILIES = {
     "brown": frozenset({"brown", "tan", "camel", "chocolate", "coffee", "mocha"}),
 }
 
+# Bit per color family, for color sets packed into integer masks
+COLOR_FAMILY_BITS = {
+    family: 1 << i
+    for i, family in enumerate(["neutral", *COLOR_FAMILIES, "other"])
+}
+
 # ============================================================
 # SILHOUETTE & STATEMENT COMPATIBILITY RULES
 # ============================================================
@@ -276,6 +290,31 @@ def colors_are_harmonious(colors1: Set[str], colors2: Set[str]) -> bool:
     return False
 
 
+def get_color_mask(product: dict) -> int:
+    """Get a product's color families (see get_all_product_colors) as a bitmask."""
+    mask = 0
+    for family in get_all_product_colors(product):
+        mask |= COLOR_FAMILY_BITS[family]
+    return mask
+
+
+@lru_cache(maxsize=4096)
+def masks_are_harmonious(mask1: int, mask2: int) -> bool:
+    """colors_are_harmonious for two color masks. Cached for performance."""
+    return colors_are_harmonious(
+        {f for f, bit in COLOR_FAMILY_BITS.items() if mask1 & bit},
+        {f for f, bit in COLOR_FAMILY_BITS.items() if mask2 & bit},
+    )
+
+
+def get_look_name(dimension: str, dimension_value: str) -> Tuple[str, str]:
+    """Get the (name, description) for a dimension value, with a generic fallback."""
+    return LOOK_NAMES.get(dimension, {}).get(
+        dimension_value.lower(),
+        (f"{dimension_value.title()} Look", f"A {dimension_value.lower()} focused outfit")
+    )
+
+
 def has_overlap(list_a: List[str], list_b: List[str]) -> bool:
     """Check if two lists have any common elements."""
     if not list_a or not list_b:
@@ -283,6 +322,51 @@ def has_overlap(list_a: List[str], list_b: List[str]) -> bool:
     return bool(set(list_a) & set(list_b))
 
 
+def _collect_skus(compatible_by_slot: Dict[str, List[dict]]) -> Set[str]:
+    """Collect all SKUs from a {slot: [{"sku", "score"}, ...]} mapping."""
+    return {item["sku"] for slot_items in compatible_by_slot.values() for item in slot_items}
+
+
+async def _fetch_products(skus: Set[str]) -> Dict[str, dict]:
+    """Fetch products by SKU in ONE batch query, keyed by SKU."""
+    products = {}
+    for p in await ProductService.get_by_skus(list(skus)):
+        # Handle image_url field (DB stores as image_file)
+        if "image_url" not in p and "image_file" in p:
+            p["image_url"] = p["image_file"]
+        products[p["sku_id"]] = p
+    return products
+
+
+def _subset_pair_scores(
+    pair_scores: Dict[Tuple[str, str], float],
+    skus: List[str],
+) -> Dict[Tuple[str, str], float]:
+    """Pair scores between the given SKUs only."""
+    subset = {}
+    for sku_a in skus:
+        for sku_b in skus:
+            score = pair_scores.get((sku_a, sku_b))
+            if score is not None:
+                subset[(sku_a, sku_b)] = score
+    return subset
+
+
+def _generate_looks_task(
+    base_product: dict,
+    compatible_by_slot: Dict[str, List[dict]],
+    pair_scores: Dict[Tuple[str, str], float],
+    products: Dict[str, dict],
+    num_looks: int,
+) -> Tuple[List["Look"], int, List[Tuple[str, float]]]:
+    """Executor task: generate looks, returning them with the valid count and spans."""
+    with capture_spans() as timeline:
+        looks, num_valid = get_look_generator().generate_looks_from_data(
+            base_product, compatible_by_slot, pair_scores, products, num_looks
+        )
+    return looks, num_valid, timeline.spans
+
+
 # ============================================================
 # DATA STRUCTURES
 # ============================================================
@@ -298,6 +382,18 @@ class LookItem:
     color: str
     slot: str
 
+    @classmethod
+    def from_product(cls, product: dict, slot: str) -> "LookItem":
+        return cls(
+            sku_id=product["sku_id"],
+            title=product.get("title") or product.get("type", ""),
+            brand=product.get("brand", ""),
+            image_url=product.get("image_url", ""),
+            type=product.get("type", ""),
+            color=product.get("primary_color", ""),
+            slot=slot,
+        )
+
     def to_dict(self) -> dict:
         return {
             "sku_id": self.sku_id,
@@ -347,6 +443,167 @@ class Look:
         }
 
 
+@dataclass
+class Completion:
+    """Items filling the open slots of a partial outfit."""
+    items: Dict[str, LookItem] = field(default_factory=dict)
+    # Per slot: the item's mean pair score with the chosen items
+    scores: Dict[str, float] = field(default_factory=dict)
+
+    def add_item(self, item: LookItem, score: float):
+        self.items[item.slot] = item
+        self.scores[item.slot] = score
+
+    @property
+    def score(self) -> float:
+        return sum(self.scores.values()) / len(self.scores) if self.scores else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "items": {
+                slot: {**item.to_dict(), "score": round(self.scores[slot], 3)}
+                for slot, item in self.items.items()
+            },
+            "score": round(self.score, 3),
+        }
+
+
+# ============================================================
+# SLOT SCORER
+# ============================================================
+
+class SlotScorer:
+    """
+    Per-request scoring data for slot selection, addressed by product index.
+
+    Pair scores are held as columns of a dense score matrix (falling back to
+    the reverse pair when a score is missing, like the dict lookups did),
+    built once per product that joins an outfit. Colors are integer masks,
+    so harmony with an outfit is one lookup per distinct mask.
+    """
+
+    def __init__(self, products: Dict[str, dict], pair_scores: Dict[Tuple[str, str], float]):
+        self.skus = list(products)
+        self.index = {sku: i for i, sku in enumerate(self.skus)}
+        self.pair_scores = pair_scores
+        self._columns: Dict[int, np.ndarray] = {}
+
+        masks = np.array([get_color_mask(p) for p in products.values()], dtype=np.int64)
+        self.color_masks = masks
+        self._unique_masks, self._mask_inverse = np.unique(masks, return_inverse=True)
+        self._harmony: Dict[int, np.ndarray] = {}
+
+    def column(self, j: int) -> np.ndarray:
+        """Scores of every product with product j."""
+        column = self._columns.get(j)
+        if column is None:
+            get = self.pair_scores.get
+            sku_b = self.skus[j]
+            column = np.array([
+                get((sku_a, sku_b), 0.0) or get((sku_b, sku_a), 0.0) for sku_a in self.skus
+            ])
+            self._columns[j] = column
+        return column
+
+    def indices(self, skus: List[str]) -> np.ndarray:
+        return np.fromiter((self.index[sku] for sku in skus), dtype=np.intp, count=len(skus))
+
+    def outfit_mask(self, current: List[int]) -> int:
+        mask = 0
+        for i in current:
+            mask |= int(self.color_masks[i])
+        return mask
+
+    def harmony(self, outfit_mask: int) -> np.ndarray:
+        """Per-product harmony with an outfit's colors (as for accessory/footwear)."""
+        harmony = self._harmony.get(outfit_mask)
+        if harmony is None:
+            by_mask = np.array(
+                [masks_are_harmonious(int(m), outfit_mask) for m in self._unique_masks], dtype=bool
+            )
+            harmony = by_mask[self._mask_inverse]
+            self._harmony[outfit_mask] = harmony
+        return harmony
+
+
+class CandidateQueues:
+    """
+    Per-slot candidate queues for one generate_looks call.
+
+    Each slot's valid candidates are sorted once by (base score desc, SKU),
+    the order look assembly prefers them in. Clusters and used items are
+    boolean masks over product indices, so candidates for a slot are a
+    masked view of its queue instead of a rescan and re-sort.
+    """
+
+    def __init__(
+        self,
+        scorer: SlotScorer,
+        valid_candidates: Dict[str, dict],
+        compatible_by_slot: Dict[str, List[dict]],
+        is_wearable_accessory: Callable[[dict], bool],
+    ):
+        self.index = scorer.index
+        n = len(scorer.skus)
+
+        self.valid = np.zeros(n, dtype=bool)
+        self.members: Dict[str, np.ndarray] = {slot: np.zeros(n, dtype=bool) for slot in ALL_SLOTS}
+        self.fallback: Dict[str, np.ndarray] = {slot: np.zeros(n, dtype=bool) for slot in ALL_SLOTS}
+        self.used: Dict[str, np.ndarray] = {slot: np.zeros(n, dtype=bool) for slot in ALL_SLOTS}
+        self.queues: Dict[str, np.ndarray] = {}
+
+        by_slot: Dict[str, List[str]] = defaultdict(list)
+        for sku, product in valid_candidates.items():
+            i = self.index[sku]
+            self.valid[i] = True
+            slot = normalize_slot(product.get("functional_slot", ""))
+            if slot in self.members:
+                self.members[slot][i] = True
+                if slot == "accessory" and not is_wearable_accessory(product):
+                    continue
+                by_slot[slot].append(sku)
+
+        for slot in ALL_SLOTS:
+            slot_items = compatible_by_slot.get(slot, [])
+            slot_score_map = {item["sku"]: item["score"] for item in slot_items}
+            ordered = sorted(by_slot[slot], key=lambda sku: (-slot_score_map.get(sku, 0), sku))
+            self.queues[slot] = np.fromiter(
+                (self.index[sku] for sku in ordered), dtype=np.intp, count=len(ordered)
+            )
+            # Fallback when a cluster has nothing for the slot: top base matches
+            for item in slot_items[:50]:
+                i = self.index.get(item["sku"])
+                if i is not None:
+                    self.fallback[slot][i] = True
+
+    def cluster_mask(self, skus: List[str]) -> np.ndarray:
+        mask = np.zeros(len(self.valid), dtype=bool)
+        mask[[self.index[sku] for sku in skus]] = True
+        return mask
+
+    def candidates(self, slot: str, cluster: np.ndarray) -> np.ndarray:
+        """Unused candidates for a slot in the cluster, else top base matches, in order."""
+        queue = self.queues[slot]
+        available = queue[~self.used[slot][queue]]
+        in_cluster = available[cluster[available]]
+        if len(in_cluster):
+            return in_cluster
+        return available[self.fallback[slot][available]]
+
+    def can_fill(self, slot: str) -> bool:
+        """Whether any valid candidate of the slot is still unused."""
+        return bool((self.members[slot] & ~self.used[slot]).any())
+
+    def is_used(self, slot: str, sku: str) -> bool:
+        used = self.used.get(slot)
+        return used is not None and bool(used[self.index[sku]])
+
+    def mark_used(self, look: "Look", base_slot: str):
+        for slot, item in look.items.items():
+            if slot != base_slot and slot in self.used:
+                self.used[slot][self.index[item.sku_id]] = True
+
+
 # ============================================================
 # LOOK GENERATOR SERVICE
 # ============================================================
@@ -716,63 +973,46 @@ class LookGeneratorService:
     def select_best_for_slot(
         self,
         slot: str,
-        candidates: List[str],
-        current_items: Dict[str, str],
-        products: Dict[str, dict],
-        pair_scores: Dict[Tuple[str, str], float],
-    ) -> Optional[str]:
+        candidates: np.ndarray,
+        current: List[int],
+        scorer: SlotScorer,
+    ) -> Optional[int]:
         """
         Select best candidate for a slot based on coherence with current look.
-        Uses pre-fetched pair scores (no database calls).
-        """
-        slot_lower = normalize_slot(slot)
-
-        outfit_colors = self._get_outfit_colors(current_items, products)
 
-        slot_candidates = [
-            sku for sku in candidates
-            if sku in products and normalize_slot(products[sku].get("functional_slot", "")) == slot_lower
-        ]
-
-        if not slot_candidates:
+        `candidates` are indices of products of this slot in preference
+        order, `current` the indices of the look's items in insertion order.
+        Scores each candidate by its mean pair score with the current items
+        plus a color harmony bonus and returns the first best index.
+        """
+        if not len(candidates):
             return None
 
-        if slot_lower in ("accessory", "footwear") and outfit_colors:
-            color_matched = [
-                sku for sku in slot_candidates
-                if self._check_color_harmony_with_outfit(products[sku], outfit_colors, slot_lower)
-            ]
-            if color_matched:
-                slot_candidates = color_matched
-
-        if not current_items:
-            return slot_candidates[0]
-
-        best_sku = None
-        best_score = -1.0
-
-        for sku in slot_candidates:
-            total_score = 0.0
-            count = 0
-
-            for existing_sku in current_items.values():
-                # Use pre-fetched pair scores (O(1) lookup)
-                score = pair_scores.get((sku, existing_sku), 0.0)
-                if score == 0.0:
-                    score = pair_scores.get((existing_sku, sku), 0.0)
-                total_score += score
-                count += 1
-
-            avg_score = total_score / count if count > 0 else 0
-
-            if self._check_color_harmony_with_outfit(products[sku], outfit_colors, slot_lower):
-                avg_score += 0.05
+        slot_lower = normalize_slot(slot)
+        outfit_mask = scorer.outfit_mask(current)
 
-            if avg_score > best_score:
-                best_score = avg_score
-                best_sku = sku
+        if slot_lower in ("accessory", "footwear"):
+            harmonious = scorer.harmony(outfit_mask)[candidates]
+            if outfit_mask and harmonious.any():
+                candidates = candidates[harmonious]
+                harmonious = harmonious[harmonious]
+        else:
+            harmonious = None
+
+        if not current:
+            return int(candidates[0])
+
+        # Summed item by item, in order, like the per-pair loop did
+        total = 0.0
+        for j in current:
+            total = total + scorer.column(j)[candidates]
+        avg = total / len(current)
+        if harmonious is None:
+            avg += 0.05
+        else:
+            avg = np.where(harmonious, avg + 0.05, avg)
 
-        return best_sku
+        return int(candidates[np.argmax(avg)])
 
     async def generate_looks(
         self,
@@ -785,7 +1025,8 @@ class LookGeneratorService:
         Key optimization: Fetch ALL data upfront in ONE query, then process in-memory.
         """
         # 1. Fetch base product
-        base_product = await ProductService.get_by_sku(base_sku)
+        with span("base_product"):
+            base_product = await ProductService.get_by_sku(base_sku)
         if not base_product:
             raise ValueError(f"Product not found: {base_sku}")
 
@@ -794,62 +1035,299 @@ class LookGeneratorService:
             base_product["image_url"] = base_product["image_file"]
 
         # 2. Get compatibility graph and fetch compatible items + cross-scores in ONE query
-        CANDIDATES_PER_SLOT = 25
         graph = await get_compatibility_graph()
-        compatible_by_slot, pair_scores = await graph.get_compatible_with_cross_scores(
-            base_sku, candidates_per_slot=CANDIDATES_PER_SLOT
-        )
+        with span("graph_fetch"):
+            compatible_by_slot, pair_scores = await graph.get_compatible_with_cross_scores(
+                base_sku, candidates_per_slot=CANDIDATES_PER_SLOT
+            )
 
         # 3. Collect all compatible SKUs
-        all_compatible_skus = set()
-        for slot_items in compatible_by_slot.values():
-            for item in slot_items:
-                all_compatible_skus.add(item["sku"])
-
+        all_compatible_skus = _collect_skus(compatible_by_slot)
         if not all_compatible_skus:
             return base_product, []
 
         # 4. Fetch all compatible products in ONE batch query
-        products_list = await ProductService.get_by_skus(list(all_compatible_skus))
-        products = {}
-        for p in products_list:
-            # Handle image_url field
-            if "image_url" not in p and "image_file" in p:
-                p["image_url"] = p["image_file"]
-            products[p["sku_id"]] = p
+        with span("product_fetch"):
+            products = await _fetch_products(all_compatible_skus)
         products[base_sku] = base_product
 
-        # 6. Filter to valid pairs
-        valid_candidates = {
-            sku: p for sku, p in products.items()
-            if sku != base_sku and self.is_valid_pair(base_product, p)
+        looks = await self._run_generation(
+            base_product, compatible_by_slot, pair_scores, products, num_looks
+        )
+        return base_product, looks
+
+    async def generate_looks_batch(
+        self,
+        base_skus: List[str],
+        num_looks: int = 3,
+    ) -> Dict[str, Union[Tuple[dict, List[Look]], Exception]]:
+        """
+        Generate looks for many base products with ONE shared data fetch.
+
+        Candidates and cross-scores for every base come from a single batch
+        graph fetch, and products for the union of candidates from a single
+        product fetch. Bases are then generated concurrently on the CPU
+        executor; when it runs inline they take turns, yielding to the event
+        loop between bases. Per-SKU failures are returned in place of the
+        result instead of failing the whole batch.
+        """
+        base_skus = list(dict.fromkeys(base_skus))
+        results: Dict[str, Union[Tuple[dict, List[Look]], Exception]] = {}
+
+        base_products = {}
+        for base_sku in base_skus:
+            with span("base_product"):
+                base_product = await ProductService.get_by_sku(base_sku)
+            if not base_product:
+                results[base_sku] = ValueError(f"Product not found: {base_sku}")
+                continue
+            if "image_url" not in base_product and "image_file" in base_product:
+                base_product["image_url"] = base_product["image_file"]
+            base_products[base_sku] = base_product
+
+        graph = await get_compatibility_graph()
+        with span("graph_fetch"):
+            compatible_by_base, pair_scores = await graph.get_compatible_with_cross_scores_batch(
+                list(base_products.keys()), candidates_per_slot=CANDIDATES_PER_SLOT
+            )
+
+        skus_by_base = {
+            base_sku: _collect_skus(compatible_by_base.get(base_sku, {}))
+            for base_sku in base_products
         }
+        with span("product_fetch"):
+            all_products = await _fetch_products(set().union(*skus_by_base.values()))
+
+        ships_arguments = get_cpu_executor().ships_arguments
+
+        async def generate(base_sku: str, base_product: dict):
+            products = {
+                sku: all_products[sku]
+                for sku in skus_by_base[base_sku] if sku in all_products
+            }
+            products[base_sku] = base_product
+            # The batch pair map covers every base; only ship this base's pairs
+            scores = _subset_pair_scores(pair_scores, list(products)) if ships_arguments else pair_scores
+
+            try:
+                looks = await self._run_generation(
+                    base_product, compatible_by_base.get(base_sku, {}), scores, products, num_looks
+                )
+                results[base_sku] = (base_product, looks)
+            except Exception as e:
+                results[base_sku] = e
+
+        pending = []
+        for base_sku, base_product in base_products.items():
+            if not skus_by_base[base_sku]:
+                results[base_sku] = (base_product, [])
+            else:
+                pending.append(asyncio.create_task(generate(base_sku, base_product)))
+        await asyncio.gather(*pending)
+
+        return {base_sku: results[base_sku] for base_sku in base_skus}
+
+    async def complete_outfit(
+        self,
+        sku_ids: List[str],
+        slots: Optional[List[str]] = None,
+        num_completions: int = 5,
+        min_score: float = 0.0,
+    ) -> Tuple[List[str], List[Completion]]:
+        """
+        Fill the open slots of a partial outfit.
+
+        Candidates for an open slot are the items compatible with every
+        chosen item (one sorted-list intersection, see
+        get_common_compatible) that pass is_valid_pair with each of them,
+        ranked by their mean pair score with the chosen items. Each
+        completion fills the slots in ALL_SLOTS order (see
+        _fill_completion), so every item is also checked against the ones
+        filled before it, preferring items earlier completions didn't use.
+        Stops early once a completion repeats.
+
+        slots must be names from ALL_SLOTS (any case); unknown names raise
+        ValueError. Returns the open slots and the completions, best first.
+        """
+        sku_ids = list(dict.fromkeys(sku_ids))
+        with span("chosen_products"):
+            found = await _fetch_products(set(sku_ids))
+        missing = [sku for sku in sku_ids if sku not in found]
+        if missing:
+            raise ValueError(f"Products not found: {', '.join(missing)}")
+        chosen = [found[sku] for sku in sku_ids]
+
+        unknown = [slot for slot in slots or [] if normalize_slot(slot) not in ALL_SLOTS]
+        if unknown:
+            raise ValueError(f"Unknown slots: {', '.join(unknown)}")
+
+        taken = {normalize_slot(p.get("functional_slot", "")) for p in chosen}
+        open_slots = [
+            slot for slot in dict.fromkeys(normalize_slot(s) for s in (slots or ALL_SLOTS))
+            if slot not in taken
+        ]
+        if not open_slots:
+            return [], []
+
+        graph = await get_compatibility_graph()
+        with span("graph_fetch"):
+            common = await graph.get_common_compatible(sku_ids, open_slots, min_score)
+
+        with span("product_fetch"):
+            products = await _fetch_products(_collect_skus(common))
+
+        with span("rank"):
+            ranked = {
+                slot: self._rank_completion_candidates(slot, common[slot], chosen, products)
+                for slot in ALL_SLOTS if slot in open_slots and slot in common
+            }
+            ranked = {slot: items for slot, items in ranked.items() if items}
+
+        completions = []
+        seen = set()
+        used: Dict[str, Set[str]] = {slot: set() for slot in ranked}
+        with span("fill"):
+            for _ in range(num_completions):
+                completion = self._fill_completion(ranked, chosen, used)
+                key = tuple(item.sku_id for item in completion.items.values())
+                # Nothing new was used, so every further completion would repeat
+                if not key or key in seen:
+                    break
+                seen.add(key)
+                completions.append(completion)
+
+        return open_slots, completions
+
+    def _rank_completion_candidates(
+        self,
+        slot: str,
+        items: List[dict],
+        chosen: List[dict],
+        products: Dict[str, dict],
+    ) -> List[Tuple[dict, float]]:
+        """Valid (product, mean pair score) candidates for a slot, best first."""
+        candidates = []
+        for item in items:
+            product = products.get(item["sku"])
+            if product is None:
+                continue
+            if slot == "accessory" and not self._is_wearable_accessory(product):
+                continue
+            if not all(self.is_valid_pair(base, product) for base in chosen):
+                continue
+            candidates.append((product, sum(item["scores"]) / len(item["scores"])))
+
+        candidates.sort(key=lambda c: (-c[1], c[0]["sku_id"]))
+        return candidates
+
+    def _fill_completion(
+        self,
+        ranked: Dict[str, List[Tuple[dict, float]]],
+        chosen: List[dict],
+        used: Dict[str, Set[str]],
+    ) -> Completion:
+        """
+        Fill each ranked slot (in order) with its best candidate that passes
+        is_valid_pair with the items filled so far.
+
+        Like select_best_for_slot, footwear and accessories must harmonize
+        with the colors of the whole outfit so far when any candidate does.
+        Candidates not in used[slot] win over better-ranked ones that are;
+        the picks are added to used.
+        """
+        completion = Completion()
+        filled: List[dict] = []
+        outfit_colors = set()
+        for product in chosen:
+            outfit_colors |= get_all_product_colors(product)
+
+        for slot, candidates in ranked.items():
+            # First valid candidate that is: harmonious and unused, harmonious,
+            # unused, or neither (in order of preference)
+            firsts = [None] * 4
+            for candidate in candidates:
+                product = candidate[0]
+                if not all(self.is_valid_pair(item, product) for item in filled):
+                    continue
+                harmonious = self._check_color_harmony_with_outfit(product, outfit_colors, slot)
+                rank = (0 if harmonious else 2) + (0 if product["sku_id"] not in used[slot] else 1)
+                if firsts[rank] is None:
+                    firsts[rank] = candidate
+                if rank == 0:
+                    break
+
+            pick = next((c for c in firsts if c is not None), None)
+            if pick is None:
+                continue
+            product, score = pick
+            used[slot].add(product["sku_id"])
+            completion.add_item(LookItem.from_product(product, slot), score)
+            filled.append(product)
+            outfit_colors |= get_all_product_colors(product)
+
+        return completion
+
+    async def _run_generation(
+        self,
+        base_product: dict,
+        compatible_by_slot: Dict[str, List[dict]],
+        pair_scores: Dict[Tuple[str, str], float],
+        products: Dict[str, dict],
+        num_looks: int,
+    ) -> List[Look]:
+        """Run generate_looks_from_data on the CPU executor and record its metrics."""
+        looks, num_valid, spans = await get_cpu_executor().run(
+            _generate_looks_task, base_product, compatible_by_slot, pair_scores, products, num_looks
+        )
+        record_spans(spans)
+        LOOK_CANDIDATES.labels("compatible").observe(len(products) - 1)
+        LOOK_CANDIDATES.labels("valid").observe(num_valid)
+        return looks
+
+    def generate_looks_from_data(
+        self,
+        base_product: dict,
+        compatible_by_slot: Dict[str, List[dict]],
+        pair_scores: Dict[Tuple[str, str], float],
+        products: Dict[str, dict],
+        num_looks: int = 3,
+    ) -> Tuple[List[Look], int]:
+        """
+        Generate looks from pre-fetched data (pure CPU, no database calls).
+
+        `products` must contain the base product and every compatible SKU.
+        Returns the looks and the number of valid candidates.
+        """
+        base_sku = base_product["sku_id"]
+
+        # 6. Filter to valid pairs
+        with span("filter"):
+            valid_candidates = {
+                sku: p for sku, p in products.items()
+                if sku != base_sku and self.is_valid_pair(base_product, p)
+            }
 
         if not valid_candidates:
-            return base_product, []
+            return [], 0
 
         # 7. Cluster by dimensions (all in-memory)
-        occasion_clusters = self.cluster_by_occasion(valid_candidates, base_product)
-        aesthetic_clusters = self.cluster_by_aesthetic(valid_candidates, base_product)
-        color_clusters = self.cluster_by_color(valid_candidates, base_product)
-
-        # Build a global score map for sorting cluster SKUs by base compatibility
-        # This ensures deterministic iteration order matching the old JSON-based code
-        sku_base_score: Dict[str, float] = {}
-        for slot_items in compatible_by_slot.values():
-            for item in slot_items:
-                if item["sku"] not in sku_base_score:
-                    sku_base_score[item["sku"]] = item["score"]
-
-        # Sort valid_candidates by base score before clustering
-        # This ensures clusters are built with items in score order (matching old behavior)
-        sorted_valid_skus = sorted(valid_candidates.keys(), key=lambda sku: (-sku_base_score.get(sku, 0), sku))
-        valid_candidates = {sku: valid_candidates[sku] for sku in sorted_valid_skus}
+        with span("cluster_occasion"):
+            occasion_clusters = self.cluster_by_occasion(valid_candidates, base_product)
+        with span("cluster_aesthetic"):
+            aesthetic_clusters = self.cluster_by_aesthetic(valid_candidates, base_product)
+        with span("cluster_color"):
+            color_clusters = self.cluster_by_color(valid_candidates, base_product)
+
+        with span("queues"):
+            scorer = SlotScorer(products, pair_scores)
+            queues = CandidateQueues(
+                scorer, valid_candidates, compatible_by_slot, self._is_wearable_accessory
+            )
 
         # 8. Generate looks from different dimensions
         looks = []
         used_dimensions = set()
-        used_items_per_slot: Dict[str, Set[str]] = defaultdict(set)
+        base_slot = normalize_slot(base_product.get("functional_slot", ""))
 
         dimension_priority = [
             ("aesthetic", aesthetic_clusters),
@@ -873,108 +1351,86 @@ class LookGeneratorService:
         ]
 
         # Phase 1: Use unique dimension+value combinations
-        while len(looks) < num_looks:
-            best_cluster = None
-            best_dimension = None
-            best_value = None
-            best_size = 0
-
-            for dimension, clusters in dimension_priority:
-                for value, skus in clusters.items():
-                    if (dimension, value) in used_dimensions:
-                        continue
-                    if len(skus) > best_size:
-                        best_size = len(skus)
-                        best_cluster = skus
-                        best_dimension = dimension
-                        best_value = value
-
-            if not best_cluster:
-                break
-
-            # Sort cluster SKUs by base score (descending) then alphabetically
-            # This ensures deterministic order matching old code behavior
-            sorted_cluster = sorted(best_cluster, key=lambda sku: (-sku_base_score.get(sku, 0), sku))
-
-            look_counter += 1
-            look = self._build_look_from_cluster(
-                base_product=base_product,
-                cluster_skus=sorted_cluster,
-                all_products=products,
-                compatible_by_slot=compatible_by_slot,
-                pair_scores=pair_scores,
-                dimension=best_dimension,
-                dimension_value=best_value,
-                used_items_per_slot=used_items_per_slot,
-                look_id=f"look_{look_counter}",
-            )
+        with span("phase1"):
+            while len(looks) < num_looks:
+                best_cluster = None
+                best_dimension = None
+                best_value = None
+                best_size = 0
+
+                for dimension, clusters in dimension_priority:
+                    for value, skus in clusters.items():
+                        if (dimension, value) in used_dimensions:
+                            continue
+                        if len(skus) > best_size:
+                            best_size = len(skus)
+                            best_cluster = skus
+                            best_dimension = dimension
+                            best_value = value
 
-            base_slot = normalize_slot(base_product.get("functional_slot", ""))
-            for slot, item in look.items.items():
-                if slot != base_slot:
-                    used_items_per_slot[slot].add(item.sku_id)
+                if not best_cluster:
+                    break
 
-            looks.append(look)
-            used_dimensions.add((best_dimension, best_value))
+                look_counter += 1
+                look = self._build_look_from_cluster(
+                    base_product=base_product,
+                    cluster=queues.cluster_mask(best_cluster),
+                    all_products=products,
+                    compatible_by_slot=compatible_by_slot,
+                    scorer=scorer,
+                    queues=queues,
+                    dimension=best_dimension,
+                    dimension_value=best_value,
+                    look_id=f"look_{look_counter}",
+                )
+
+                queues.mark_used(look, base_slot)
+                looks.append(look)
+                used_dimensions.add((best_dimension, best_value))
 
         # Phase 2: Generate additional looks with extended names
-        # Sort by base score for deterministic order
-        all_valid_skus = sorted(valid_candidates.keys(), key=lambda sku: (-sku_base_score.get(sku, 0), sku))
-        extended_idx = 0
+        with span("phase2"):
+            extended_idx = 0
 
-        while len(looks) < num_looks and extended_idx < len(extended_names):
-            dimension, value, name, description = extended_names[extended_idx]
-            extended_idx += 1
+            while len(looks) < num_looks and extended_idx < len(extended_names):
+                dimension, value, name, description = extended_names[extended_idx]
+                extended_idx += 1
 
-            can_fill_slots = 0
-            for slot in ALL_SLOTS:
-                if slot == normalize_slot(base_product.get("functional_slot", "")):
+                can_fill_slots = sum(
+                    1 for slot in ALL_SLOTS if slot != base_slot and queues.can_fill(slot)
+                )
+                if can_fill_slots < 2:
                     continue
-                used_in_slot = used_items_per_slot.get(slot, set())
-                available = [
-                    sku for sku in all_valid_skus
-                    if sku not in used_in_slot and
-                    normalize_slot(products[sku].get("functional_slot", "")) == slot
-                ]
-                if available:
-                    can_fill_slots += 1
-
-            if can_fill_slots < 2:
-                continue
-
-            look_counter += 1
-            look = self._build_look_from_cluster(
-                base_product=base_product,
-                cluster_skus=all_valid_skus,
-                all_products=products,
-                compatible_by_slot=compatible_by_slot,
-                pair_scores=pair_scores,
-                dimension=dimension,
-                dimension_value=value,
-                used_items_per_slot=used_items_per_slot,
-                look_id=f"look_{look_counter}",
-                custom_name=(name, description),
-            )
 
-            base_slot = normalize_slot(base_product.get("functional_slot", ""))
-            for slot, item in look.items.items():
-                if slot != base_slot:
-                    used_items_per_slot[slot].add(item.sku_id)
+                look_counter += 1
+                look = self._build_look_from_cluster(
+                    base_product=base_product,
+                    cluster=queues.valid,
+                    all_products=products,
+                    compatible_by_slot=compatible_by_slot,
+                    scorer=scorer,
+                    queues=queues,
+                    dimension=dimension,
+                    dimension_value=value,
+                    look_id=f"look_{look_counter}",
+                    custom_name=(name, description),
+                )
 
-            looks.append(look)
+                queues.mark_used(look, base_slot)
+                looks.append(look)
 
-        return base_product, looks
+        return looks, len(valid_candidates)
 
     def _build_look_from_cluster(
         self,
         base_product: dict,
-        cluster_skus: List[str],
+        cluster: np.ndarray,
         all_products: Dict[str, dict],
         compatible_by_slot: Dict[str, List[dict]],
-        pair_scores: Dict[Tuple[str, str], float],
+        scorer: SlotScorer,
+        queues: CandidateQueues,
         dimension: str,
         dimension_value: str,
-        used_items_per_slot: Dict[str, Set[str]],
         look_id: str,
         custom_name: Optional[Tuple[str, str]] = None,
     ) -> Look:
@@ -983,11 +1439,7 @@ class LookGeneratorService:
         if custom_name:
             name, description = custom_name
         else:
-            name_data = LOOK_NAMES.get(dimension, {}).get(
-                dimension_value.lower(),
-                (f"{dimension_value.title()} Look", f"A {dimension_value.lower()} focused outfit")
-            )
-            name, description = name_data
+            name, description = get_look_name(dimension, dimension_value)
 
         look = Look(
             id=look_id,
@@ -999,77 +1451,35 @@ class LookGeneratorService:
 
         # Add base product
         base_slot = normalize_slot(base_product.get("functional_slot", ""))
-        look.add_item(LookItem(
-            sku_id=base_product["sku_id"],
-            title=base_product.get("title") or base_product.get("type", ""),
-            brand=base_product.get("brand", ""),
-            image_url=base_product.get("image_url", ""),
-            type=base_product.get("type", ""),
-            color=base_product.get("primary_color", ""),
-            slot=base_slot,
-        ))
+        look.add_item(LookItem.from_product(base_product, base_slot))
 
         slots_to_fill = [s for s in ALL_SLOTS if s != base_slot]
         current_items: Dict[str, str] = {base_slot: base_product["sku_id"]}
+        current_idx = [scorer.index[base_product["sku_id"]]]
 
         for slot in slots_to_fill:
-            used_in_slot = used_items_per_slot.get(slot, set())
-
-            slot_candidates = []
-
-            for sku in cluster_skus:
-                if sku in all_products:
-                    product = all_products[sku]
-                    product_slot = normalize_slot(product.get("functional_slot", ""))
-                    if product_slot == slot and sku not in used_in_slot:
-                        if slot == "accessory" and not self._is_wearable_accessory(product):
-                            continue
-                        slot_candidates.append(sku)
-
-            if not slot_candidates and slot in compatible_by_slot:
-                for item in compatible_by_slot[slot][:50]:
-                    sku = item["sku"]
-                    if sku in all_products and sku not in used_in_slot:
-                        product = all_products[sku]
-                        if self.is_valid_pair(base_product, product):
-                            if slot == "accessory" and not self._is_wearable_accessory(product):
-                                continue
-                            slot_candidates.append(sku)
-
-            if slot_candidates:
-                # Sort candidates by base compatibility score (from compatible_by_slot)
-                # This ensures deterministic tie-breaking when cross-scores are equal
-                slot_score_map = {item["sku"]: item["score"] for item in compatible_by_slot.get(slot, [])}
-                slot_candidates.sort(key=lambda sku: (-slot_score_map.get(sku, 0), sku))
-
-                best_sku = self.select_best_for_slot(
-                    slot, slot_candidates, current_items, all_products, pair_scores
-                )
-                if best_sku and best_sku in all_products:
-                    product = all_products[best_sku]
-                    look.add_item(LookItem(
-                        sku_id=best_sku,
-                        title=product.get("title") or product.get("type", ""),
-                        brand=product.get("brand", ""),
-                        image_url=product.get("image_url", ""),
-                        type=product.get("type", ""),
-                        color=product.get("primary_color", ""),
-                        slot=slot,
-                    ))
-                    current_items[slot] = best_sku
+            best = self.select_best_for_slot(
+                slot, queues.candidates(slot, cluster), current_idx, scorer
+            )
+            if best is not None:
+                best_sku = scorer.skus[best]
+                product = all_products[best_sku]
+                look.add_item(LookItem.from_product(product, slot))
+                current_items[slot] = best_sku
+                current_idx.append(best)
 
         # Ensure footwear exists
         if not look.has_footwear:
             self._add_required_slot(
                 look, "footwear", compatible_by_slot, all_products,
-                used_items_per_slot, current_items
+                queues, current_items
             )
 
         # Ensure accessory exists
         if not look.has_accessory:
             self._add_required_slot(
                 look, "accessory", compatible_by_slot, all_products,
-                used_items_per_slot, current_items, require_wearable=True
+                queues, current_items, require_wearable=True
             )
 
         return look
@@ -1080,12 +1490,11 @@ class LookGeneratorService:
         slot: str,
         compatible_by_slot: Dict[str, List[dict]],
         all_products: Dict[str, dict],
-        used_items_per_slot: Dict[str, Set[str]],
+        queues: CandidateQueues,
         current_items: Dict[str, str],
         require_wearable: bool = False,
     ):
         """Add a required item (footwear/accessory) to the look."""
-        used_items = used_items_per_slot.get(slot, set())
         slot_items = compatible_by_slot.get(slot, [])
         outfit_colors = self._get_outfit_colors(current_items, all_products)
 
@@ -1094,20 +1503,12 @@ class LookGeneratorService:
         # First try: unused items with color harmony
         for item in slot_items[:30]:
             sku = item["sku"]
-            if sku in all_products and sku not in used_items:
+            if sku in all_products and not queues.is_used(slot, sku):
                 product = all_products[sku]
                 if require_wearable and not self._is_wearable_accessory(product):
                     continue
                 if self._check_color_harmony_with_outfit(product, outfit_colors, slot):
-                    look.add_item(LookItem(
-                        sku_id=sku,
-                        title=product.get("title") or product.get("type", ""),
-                        brand=product.get("brand", ""),
-                        image_url=product.get("image_url", ""),
-                        type=product.get("type", ""),
-                        color=product.get("primary_color", ""),
-                        slot=slot,
-                    ))
+                    look.add_item(LookItem.from_product(product, slot))
                     added = True
                     break
 
@@ -1115,19 +1516,11 @@ class LookGeneratorService:
         if not added:
             for item in slot_items[:30]:
                 sku = item["sku"]
-                if sku in all_products and sku not in used_items:
+                if sku in all_products and not queues.is_used(slot, sku):
                     product = all_products[sku]
                     if require_wearable and not self._is_wearable_accessory(product):
                         continue
-                    look.add_item(LookItem(
-                        sku_id=sku,
-                        title=product.get("title") or product.get("type", ""),
-                        brand=product.get("brand", ""),
-                        image_url=product.get("image_url", ""),
-                        type=product.get("type", ""),
-                        color=product.get("primary_color", ""),
-                        slot=slot,
-                    ))
+                    look.add_item(LookItem.from_product(product, slot))
                     added = True
                     break
 
@@ -1139,15 +1532,7 @@ class LookGeneratorService:
                     product = all_products[sku]
                     if require_wearable and not self._is_wearable_accessory(product):
                         continue
-                    look.add_item(LookItem(
-                        sku_id=sku,
-                        title=product.get("title") or product.get("type", ""),
-                        brand=product.get("brand", ""),
-                        image_url=product.get("image_url", ""),
-                        type=product.get("type", ""),
-                        color=product.get("primary_color", ""),
-                        slot=slot,
-                    ))
+                    look.add_item(LookItem.from_product(product, slot))
                     break
 
 
@@ -3,10 +3,98 @@ Precomputed Looks Service
 =========================
 
 Stores and retrieves pre-generated looks for instant API responses.
+
+Looks are stored in a compact, ID-only encoding: the row keeps the SKUs it
+references (base first) and the distinct dimension values, plus a small
+binary layout describing each look as a dimension code, a dimension value
+index and a list of (slot code, SKU index) pairs. Titles, images, etc. are
+rehydrated from the in-memory product catalog at read time, so product edits
+are visible immediately.
 """
 
+import json
+import struct
 from typing import Optional
+
 from app.database import get_db
+from app.metrics import record_cache
+from app.models.product import SLOT_CODES, SLOT_NAMES
+from app.services.look_generator import LookItem, get_look_name
+from app.services.product import _get_cached_products
+
+
+DIMENSION_CODES = {
+    "aesthetic": 0,
+    "occasion": 1,
+    "color": 2,
+    "style": 3,
+}
+DIMENSION_NAMES = {code: name for name, code in DIMENSION_CODES.items()}
+
+# Per look: dimension code, dimension value index, item count
+_LOOK_HEADER = struct.Struct("<BBB")
+# Per item: slot code, index into the row's SKU array
+_LOOK_ITEM = struct.Struct("<BH")
+
+
+def encode_looks(sku_id: str, looks: list[dict]) -> tuple[list[str], list[str], bytes]:
+    """
+    Encode looks (as produced by Look.to_dict) into the compact layout.
+
+    Returns (skus, dim_values, layout). skus[0] is always the base SKU.
+    """
+    skus = [sku_id]
+    sku_index = {sku_id: 0}
+    dim_values: list[str] = []
+    value_index: dict[str, int] = {}
+    layout = bytearray()
+
+    for look in looks:
+        value = look["dimension_value"]
+        if value not in value_index:
+            value_index[value] = len(dim_values)
+            dim_values.append(value)
+
+        items = look["items"]
+        layout += _LOOK_HEADER.pack(
+            DIMENSION_CODES[look["dimension"]], value_index[value], len(items)
+        )
+        for slot, item in items.items():
+            sku = item["sku_id"]
+            if sku not in sku_index:
+                sku_index[sku] = len(skus)
+                skus.append(sku)
+            layout += _LOOK_ITEM.pack(SLOT_CODES[slot], sku_index[sku])
+
+    return skus, dim_values, bytes(layout)
+
+
+def decode_looks(
+    skus: list[str], dim_values: list[str], layout: bytes
+) -> list[tuple[str, str, list[tuple[str, str]]]]:
+    """Decode the compact layout into (dimension, value, [(slot, sku), ...]) tuples."""
+    looks = []
+    offset = 0
+    while offset < len(layout):
+        dim_code, value_idx, item_count = _LOOK_HEADER.unpack_from(layout, offset)
+        offset += _LOOK_HEADER.size
+
+        items = []
+        for _ in range(item_count):
+            slot_code, sku_idx = _LOOK_ITEM.unpack_from(layout, offset)
+            offset += _LOOK_ITEM.size
+            items.append((SLOT_NAMES[slot_code], skus[sku_idx]))
+
+        looks.append((DIMENSION_NAMES[dim_code], dim_values[value_idx], items))
+    return looks
+
+
+def _with_image_url(product: dict) -> dict:
+    """Copy a cached product row, filling image_url from image_file if needed."""
+    product = dict(product)
+    if "image_url" not in product and "image_file" in product:
+        product["image_url"] = product["image_file"]
+    return product
 
 
 class PrecomputedLooksService:
@@ -20,13 +108,29 @@ class PrecomputedLooksService:
             await conn.execute("""
                 CREATE TABLE IF NOT EXISTS precomputed_looks (
                     sku_id TEXT PRIMARY KEY,
-                    base_product JSONB NOT NULL,
-                    looks JSONB NOT NULL,
+                    skus TEXT[],
+                    dim_values TEXT[],
+                    layout BYTEA,
                     num_looks INTEGER NOT NULL,
                     created_at TIMESTAMP DEFAULT NOW(),
                     updated_at TIMESTAMP DEFAULT NOW()
                 )
             """)
+            # Tables created before the compact encoding keep their legacy
+            # JSONB columns readable; new rows only fill the compact ones.
+            await conn.execute("""
+                ALTER TABLE precomputed_looks
+                    ADD COLUMN IF NOT EXISTS skus TEXT[],
+                    ADD COLUMN IF NOT EXISTS dim_values TEXT[],
+                    ADD COLUMN IF NOT EXISTS layout BYTEA,
+                    ADD COLUMN IF NOT EXISTS base_product JSONB,
+                    ADD COLUMN IF NOT EXISTS looks JSONB
+            """)
+            await conn.execute("""
+                ALTER TABLE precomputed_looks
+                    ALTER COLUMN base_product DROP NOT NULL,
+                    ALTER COLUMN looks DROP NOT NULL
+            """)
             # Create index for fast lookups
             await conn.execute("""
                 CREATE INDEX IF NOT EXISTS idx_precomputed_looks_updated
@@ -39,59 +143,88 @@ class PrecomputedLooksService:
         """
         Get precomputed looks for a SKU.
 
-        Returns None if not found or if fewer looks than requested.
+        Returns None if not found, if fewer looks than requested, or if a
+        referenced product no longer exists in the catalog.
         """
         pool = await get_db()
         async with pool.acquire() as conn:
             row = await conn.fetchrow(
                 """
-                SELECT base_product, looks, num_looks
+                SELECT skus, dim_values, layout, base_product, looks, num_looks
                 FROM precomputed_looks
                 WHERE sku_id = $1
                 """,
                 sku_id
             )
 
-        if not row:
+        # Check if we have enough looks
+        if not row or row["num_looks"] < num_looks:
+            record_cache("precomputed_looks", False)
             return None
 
-        # Check if we have enough looks
-        if row["num_looks"] < num_looks:
+        if row["layout"] is None:
+            # Legacy row with fully denormalized JSONB
+            record_cache("precomputed_looks", True)
+            return {
+                "base_product": json.loads(row["base_product"]) if isinstance(row["base_product"], str) else row["base_product"],
+                "looks": json.loads(row["looks"]) if isinstance(row["looks"], str) else row["looks"],
+            }
+
+        cache = await _get_cached_products()
+        skus = row["skus"]
+        if any(sku not in cache for sku in skus):
+            record_cache("precomputed_looks", False)
             return None
 
-        import json
+        record_cache("precomputed_looks", True)
+        looks = []
+        for i, (dimension, value, items) in enumerate(
+            decode_looks(skus, row["dim_values"], row["layout"])
+        ):
+            name, description = get_look_name(dimension, value)
+            look_items = {
+                slot: LookItem.from_product(_with_image_url(cache[sku]), slot).to_dict()
+                for slot, sku in items
+            }
+            looks.append({
+                "id": f"look_{i + 1}",
+                "name": name,
+                "description": description,
+                "dimension": dimension,
+                "dimension_value": value,
+                "items": look_items,
+                "slots_filled": list(look_items.keys()),
+            })
+
         return {
-            "base_product": json.loads(row["base_product"]) if isinstance(row["base_product"], str) else row["base_product"],
-            "looks": json.loads(row["looks"]) if isinstance(row["looks"], str) else row["looks"],
+            "base_product": _with_image_url(cache[skus[0]]),
+            "looks": looks,
         }
 
     @staticmethod
-    async def store_looks(sku_id: str, base_product: dict, looks: list):
-        """Store precomputed looks for a SKU."""
-        import json
-        from datetime import datetime
-
-        def json_serializer(obj):
-            """Handle datetime and other non-serializable types."""
-            if isinstance(obj, datetime):
-                return obj.isoformat()
-            raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
+    async def store_looks(sku_id: str, looks: list):
+        """Store precomputed looks for a SKU (looks as produced by Look.to_dict)."""
+        skus, dim_values, layout = encode_looks(sku_id, looks)
 
         pool = await get_db()
         async with pool.acquire() as conn:
             await conn.execute(
                 """
-                INSERT INTO precomputed_looks (sku_id, base_product, looks, num_looks, updated_at)
-                VALUES ($1, $2, $3, $4, NOW())
+                INSERT INTO precomputed_looks (sku_id, skus, dim_values, layout, num_looks, updated_at)
+                VALUES ($1, $2, $3, $4, $5, NOW())
                 ON CONFLICT (sku_id) DO UPDATE SET
-                    base_product = $2,
-                    looks = $3,
-                    num_looks = $4,
+                    skus = $2,
+                    dim_values = $3,
+                    layout = $4,
+                    num_looks = $5,
+                    base_product = NULL,
+                    looks = NULL,
                     updated_at = NOW()
                 """,
                 sku_id,
-                json.dumps(base_product, default=json_serializer),
-                json.dumps(looks, default=json_serializer),
+                skus,
+                dim_values,
+                layout,
                 len(looks)
             )
 
@@ -1,25 +1,42 @@
+from collections.abc import Mapping
+from itertools import islice
 from typing import Optional
 import asyncpg
 import time
 
 from app.database import get_db
+from app.metrics import record_cache, timed
 from app.models.product import ProductFilter
+from app.services.snapshot import get_snapshot
 
 
-# In-memory product cache with TTL
+# In-memory product cache, dropped when the "products" data version changes
 _product_cache: dict[str, dict] = {}
 _cache_timestamp: float = 0
-_CACHE_TTL_SECONDS = 300  # 5 minutes
+_CACHE_TTL_SECONDS = 3600  # Safety net only; see _invalidate_cached_products
 
 
-async def _get_cached_products() -> dict[str, dict]:
-    """Get all products with caching."""
+async def _get_cached_products(force_refresh: bool = False) -> Mapping[str, dict]:
+    """
+    Get all products with caching.
+
+    When a shared snapshot is attached, its catalog is returned instead; it
+    is refreshed by publishing a new snapshot, so force_refresh does not apply.
+    """
     global _product_cache, _cache_timestamp
 
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        record_cache("products", True)
+        return snapshot.catalog
+
     now = time.time()
-    if _product_cache and (now - _cache_timestamp) < _CACHE_TTL_SECONDS:
+    if not force_refresh and _product_cache and (now - _cache_timestamp) < _CACHE_TTL_SECONDS:
+        record_cache("products", True)
         return _product_cache
 
+    record_cache("products", False)
+
     # Refresh cache
     pool = await get_db()
     async with pool.acquire() as conn:
@@ -30,6 +47,19 @@ async def _get_cached_products() -> dict[str, dict]:
     return _product_cache
 
 
+def _set_cached_products(products: dict[str, dict]):
+    """Install a product catalog loaded elsewhere (e.g. a warm start file)."""
+    global _product_cache, _cache_timestamp
+    _product_cache = products
+    _cache_timestamp = time.time()
+
+
+def _invalidate_cached_products():
+    """Expire the product cache; the next read reloads it (data_version callback)."""
+    global _cache_timestamp
+    _cache_timestamp = 0
+
+
 class ProductService:
     @staticmethod
     def _row_to_dict(row: asyncpg.Record) -> dict:
@@ -37,6 +67,7 @@ class ProductService:
         return dict(row)
 
     @staticmethod
+    @timed("product", "get_all")
     async def get_all(
         page: int = 1,
         page_size: int = 20,
@@ -46,10 +77,8 @@ class ProductService:
         # Fast path: no filters = use in-memory cache
         if filters is None or not filters.has_any_filter():
             cache = await _get_cached_products()
-            all_products = list(cache.values())
-            total = len(all_products)
             offset = (page - 1) * page_size
-            return all_products[offset:offset + page_size], total
+            return list(islice(cache.values(), offset, offset + page_size)), len(cache)
 
         pool = await get_db()
 
@@ -135,6 +164,7 @@ class ProductService:
         return products, total
 
     @staticmethod
+    @timed("product", "get_by_sku")
     async def get_by_sku(sku_id: str, use_cache: bool = True) -> Optional[dict]:
         """Get a single product by SKU ID."""
         if use_cache:
@@ -152,6 +182,7 @@ class ProductService:
         return None
 
     @staticmethod
+    @timed("product", "get_by_skus")
     async def get_by_skus(sku_ids: list[str], use_cache: bool = True) -> list[dict]:
         """Get multiple products by SKU IDs."""
         if not sku_ids:
@@ -170,6 +201,7 @@ class ProductService:
         return [ProductService._row_to_dict(row) for row in rows]
 
     @staticmethod
+    @timed("product", "search")
     async def search(query: str, limit: int = 20) -> list[dict]:
         """Search products by title or brand."""
         pool = await get_db()
@@ -189,6 +221,7 @@ class ProductService:
         return [ProductService._row_to_dict(row) for row in rows]
 
     @staticmethod
+    @timed("product", "get_categories")
     async def get_categories() -> list[str]:
         """Get all unique categories."""
         pool = await get_db()
@@ -201,6 +234,7 @@ class ProductService:
         return [row["category"] for row in rows]
 
     @staticmethod
+    @timed("product", "get_brands")
     async def get_brands() -> list[str]:
         """Get all unique brands."""
         pool = await get_db()
@@ -213,6 +247,7 @@ class ProductService:
         return [row["brand"] for row in rows]
 
     @staticmethod
+    @timed("product", "get_colors")
     async def get_colors() -> list[str]:
         """Get all unique primary colors."""
         pool = await get_db()
@@ -0,0 +1,666 @@
+"""
+Shared Catalog Snapshot
+=======================
+
+Read-only product catalog and compatibility graph shared by all workers.
+
+A loader (publish_snapshot.py) writes the catalog, column by column, and the
+graph, as CSR arrays, into a new generation directory under
+settings.snapshot_dir, then points CURRENT at it. Workers memory-map the
+files read-only, so all workers on a host share one copy through the page
+cache and skip the warm-up queries. Every snapshot_check_seconds a worker
+re-reads CURRENT and attaches a newer generation if there is one.
+
+Layout of <snapshot_dir>/gen-<n>/:
+- meta.json: generation, columns and their kinds, slot names, counts
+- skus.npy: SKU ids in catalog order; row i of every column is skus[i]
+- skus.sorted.npy, skus.rows.npy: SKU ids sorted, and the row of each, for
+  binary-search lookups
+- strings.npy, strings.offsets.npy: UTF-8 string pool; string values are
+  stored as pool codes (-1 = NULL)
+- col.<name>.npy, plus col.<name>.indptr.npy for array columns and
+  col.<name>.null.npy for nullable non-string columns
+- edges.indptr.npy, edges.dst.npy, edges.slot.npy, edges.score.npy:
+  outgoing edges per row, in (target_slot, sort_order) order
+"""
+
+import json
+import logging
+import os
+import shutil
+import time
+from collections.abc import Mapping
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = "CURRENT"
+KEEP_GENERATIONS = 2
+ROW_CACHE_SIZE = 4096
+STRING_CACHE_SIZE = 65536
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+# =============================================================================
+# WRITING
+# =============================================================================
+
+def _column_kind(values: list) -> str:
+    """Storage kind of a catalog column, from its first non-NULL value."""
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, str):
+            return "str"
+        if isinstance(value, list):
+            return "strs"
+        if isinstance(value, bool):
+            return "bool"
+        if isinstance(value, int):
+            return "int"
+        if isinstance(value, float):
+            return "float"
+        if isinstance(value, datetime):
+            return "datetime"
+        raise ValueError(f"Unsupported column type for snapshot: {type(value).__name__}")
+    return "str"
+
+
+class _StringPool:
+    """Deduplicating UTF-8 string pool."""
+
+    def __init__(self):
+        self.codes: dict[str, int] = {}
+        self.chunks: list[bytes] = []
+
+    def code(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.chunks)
+            self.chunks.append(value.encode("utf-8"))
+        return code
+
+    def arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        offsets = np.zeros(len(self.chunks) + 1, dtype=np.int64)
+        np.cumsum([len(c) for c in self.chunks], out=offsets[1:])
+        blob = np.frombuffer(b"".join(self.chunks), dtype=np.uint8)
+        return blob, offsets
+
+
+def _encode_column(values: list, kind: str, pool: _StringPool, files: dict):
+    """Add the arrays for one column to files; returns whether it has NULLs."""
+    nulls = np.array([v is None for v in values], dtype=bool)
+
+    if kind == "str":
+        files["col"] = np.array([pool.code(v) for v in values], dtype=np.int32)
+        return bool(nulls.any())
+
+    if kind == "strs":
+        lengths = [len(v) if v is not None else 0 for v in values]
+        indptr = np.zeros(len(values) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        files["col"] = np.array(
+            [pool.code(s) for v in values if v is not None for s in v], dtype=np.int32
+        )
+        files["indptr"] = indptr
+    elif kind == "bool":
+        files["col"] = np.array([bool(v) for v in values], dtype=np.int8)
+    elif kind == "int":
+        files["col"] = np.array([v or 0 for v in values], dtype=np.int64)
+    elif kind == "float":
+        files["col"] = np.array([v or 0.0 for v in values], dtype=np.float64)
+    elif kind == "datetime":
+        files["col"] = np.array(
+            [(v - _EPOCH) // _MICROSECOND if v is not None else 0 for v in values],
+            dtype=np.int64,
+        )
+
+    if nulls.any():
+        files["null"] = nulls
+        return True
+    return False
+
+
+def write_snapshot(
+    directory: str | Path,
+    products: list[dict],
+    edges: Iterable[tuple[str, str, str, float]],
+) -> int:
+    """
+    Write a new snapshot generation and make it current.
+
+    products are catalog rows (dicts with sku_id); edges are
+    (sku_1, target_slot, sku_2, score) tuples ordered by target_slot and
+    sort_order within each sku_1, as the edges table orders them.
+
+    Returns the new generation number.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    generation = (current_generation(directory) or 0) + 1
+    tmp = directory / f"gen-{generation}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir()
+
+    skus = [p["sku_id"] for p in products]
+    rows = {sku: i for i, sku in enumerate(skus)}
+    columns = [name for name in (products[0] if products else {}) if name != "sku_id"]
+
+    pool = _StringPool()
+    column_meta = []
+    for name in columns:
+        values = [p.get(name) for p in products]
+        kind = _column_kind(values)
+        files: dict[str, np.ndarray] = {}
+        nullable = _encode_column(values, kind, pool, files)
+        for suffix, array in files.items():
+            filename = f"col.{name}.npy" if suffix == "col" else f"col.{name}.{suffix}.npy"
+            np.save(tmp / filename, array)
+        column_meta.append({"name": name, "kind": kind, "nullable": nullable})
+
+    # Edges arrive grouped by sku_1 in the database's collation order; a
+    # stable sort by source row keeps each source's slot/sort_order order.
+    slot_codes: dict[str, int] = {}
+    src, dst, slot, score = [], [], [], []
+    for sku_1, target_slot, sku_2, edge_score in edges:
+        src.append(rows[sku_1])
+        dst.append(rows[sku_2])
+        slot.append(slot_codes.setdefault(target_slot.lower(), len(slot_codes)))
+        score.append(edge_score)
+
+    src = np.array(src, dtype=np.int32)
+    order = np.argsort(src, kind="stable")
+    indptr = np.zeros(len(skus) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=len(skus)), out=indptr[1:])
+    np.save(tmp / "edges.indptr.npy", indptr)
+    np.save(tmp / "edges.dst.npy", np.array(dst, dtype=np.int32)[order])
+    np.save(tmp / "edges.slot.npy", np.array(slot, dtype=np.int16)[order])
+    np.save(tmp / "edges.score.npy", np.array(score, dtype=np.float32)[order])
+
+    sku_bytes = np.array([s.encode("utf-8") for s in skus], dtype=np.bytes_)
+    sku_order = np.argsort(sku_bytes, kind="stable")
+    np.save(tmp / "skus.npy", sku_bytes)
+    np.save(tmp / "skus.sorted.npy", sku_bytes[sku_order])
+    np.save(tmp / "skus.rows.npy", sku_order.astype(np.int32))
+    blob, offsets = pool.arrays()
+    np.save(tmp / "strings.npy", blob)
+    np.save(tmp / "strings.offsets.npy", offsets)
+
+    with open(tmp / "meta.json", "w") as f:
+        json.dump({
+            "generation": generation,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "products": len(skus),
+            "edges": int(indptr[-1]),
+            "columns": column_meta,
+            "slots": list(slot_codes),
+        }, f, indent=2)
+
+    _publish(directory, tmp, generation)
+    return generation
+
+
+def remap_snapshot(directory: str | Path, mapping: dict[str, str]) -> Optional[int]:
+    """
+    Publish a copy of the current generation with SKU ids renamed.
+
+    Every file but the SKU arrays is indexed by row, so those are hard-linked
+    (copied where links are unsupported) and only the SKU arrays are
+    rewritten. Returns the new generation, or None if nothing is published or
+    no SKU in it is renamed.
+    """
+    directory = Path(directory)
+    current = current_generation(directory)
+    if current is None or not mapping:
+        return None
+    source = directory / f"gen-{current}"
+
+    skus = np.load(source / "skus.npy")
+    old = np.array([s.encode("utf-8") for s in mapping], dtype=np.bytes_)
+    new = np.array([s.encode("utf-8") for s in mapping.values()], dtype=np.bytes_)
+    order = np.argsort(old)
+    old, new = old[order], new[order]
+    pos = np.minimum(np.searchsorted(old, skus), len(old) - 1)
+    hit = old[pos] == skus
+    if not hit.any():
+        return None
+
+    skus = np.where(hit, new[pos], skus)
+    if len(np.unique(skus)) != len(skus):
+        raise ValueError("Remapping would give two products the same SKU")
+
+    generation = current + 1
+    tmp = directory / f"gen-{generation}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir()
+
+    rewritten = {"skus.npy", "skus.sorted.npy", "skus.rows.npy", "meta.json"}
+    for path in source.iterdir():
+        if path.name not in rewritten:
+            try:
+                os.link(path, tmp / path.name)
+            except OSError:
+                shutil.copy2(path, tmp / path.name)
+
+    sku_order = np.argsort(skus, kind="stable")
+    np.save(tmp / "skus.npy", skus)
+    np.save(tmp / "skus.sorted.npy", skus[sku_order])
+    np.save(tmp / "skus.rows.npy", sku_order.astype(np.int32))
+
+    meta = json.loads((source / "meta.json").read_text())
+    meta["generation"] = generation
+    meta["created_at"] = datetime.now(timezone.utc).isoformat()
+    meta["remapped_from"] = current
+    with open(tmp / "meta.json", "w") as f:
+        json.dump(meta, f, indent=2)
+
+    _publish(directory, tmp, generation)
+    return generation
+
+
+def _publish(directory: Path, tmp: Path, generation: int):
+    """Move a complete generation into place and point CURRENT at it."""
+    tmp.rename(directory / f"gen-{generation}")
+
+    # Publish: workers only ever see a complete generation
+    current_tmp = directory / f"{CURRENT_FILE}.tmp-{os.getpid()}"
+    current_tmp.write_text(str(generation))
+    os.replace(current_tmp, directory / CURRENT_FILE)
+
+    _prune(directory, generation)
+
+
+def _prune(directory: Path, generation: int):
+    """Remove generations older than the last KEEP_GENERATIONS.
+
+    Workers still mapping a removed generation keep reading it until they
+    re-attach; unlinking does not invalidate an existing mapping.
+    """
+    for path in directory.glob("gen-*"):
+        suffix = path.name[len("gen-"):]
+        if suffix.isdigit() and int(suffix) <= generation - KEEP_GENERATIONS:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+async def publish_from_db(directory: Optional[str | Path] = None) -> int:
+    """
+    Load the catalog and graph from the database and publish a snapshot.
+
+    Bumps the "snapshot" data version, so API workers listening for it
+    attach the new generation right away instead of at their next check.
+    """
+    from app.database import get_db
+    from app.services.data_version import bump_data_version, create_data_version_table
+    from app.services.edges import EDGE_SCORE
+
+    directory = directory or get_settings().snapshot_dir
+    if not directory:
+        raise ValueError("SNAPSHOT_DIR must be set to publish a snapshot")
+
+    pool = await get_db()
+    async with pool.acquire() as conn:
+        products = [dict(row) for row in await conn.fetch("SELECT * FROM products")]
+        edges = []
+        async with conn.transaction():
+            cursor = conn.cursor(f"""
+                SELECT s.sku_id AS sku_1, sl.name AS target_slot, d.sku_id AS sku_2,
+                       {EDGE_SCORE} AS score
+                FROM compat_edges e
+                JOIN product_ids s ON s.id = e.src_id
+                JOIN product_ids d ON d.id = e.dst_id
+                JOIN edge_slots sl ON sl.code = e.slot
+                ORDER BY s.sku_id, sl.name, e.sort_order
+            """, prefetch=10000)
+            async for row in cursor:
+                edges.append((row["sku_1"], row["target_slot"], row["sku_2"], row["score"]))
+
+    generation = write_snapshot(directory, products, edges)
+    async with pool.acquire() as conn:
+        await create_data_version_table(conn)
+        await bump_data_version(conn, "snapshot")
+    return generation
+
+
+def current_generation(directory: str | Path) -> Optional[int]:
+    """Read the current generation number, or None if nothing is published."""
+    try:
+        return int((Path(directory) / CURRENT_FILE).read_text().strip())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+# =============================================================================
+# READING
+# =============================================================================
+
+class SnapshotCatalog(Mapping):
+    """
+    Read-only {sku_id: product dict} view over a snapshot's columns.
+
+    Rows are decoded on access; recently used rows are kept decoded. Callers
+    must treat the returned dicts as read-only, as with the product cache.
+    """
+
+    def __init__(self, snapshot: "Snapshot"):
+        self._snapshot = snapshot
+        self._row = lru_cache(maxsize=ROW_CACHE_SIZE)(snapshot.decode_row)
+
+    def __getitem__(self, sku: str) -> dict:
+        row = self._snapshot.row_of(sku)
+        if row is None:
+            raise KeyError(sku)
+        return self._row(row)
+
+    def get(self, sku: str, default=None):
+        row = self._snapshot.row_of(sku)
+        return default if row is None else self._row(row)
+
+    def __contains__(self, sku) -> bool:
+        return isinstance(sku, str) and self._snapshot.row_of(sku) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self._snapshot.skus)):
+            yield self._snapshot.sku(i)
+
+    def __len__(self) -> int:
+        return len(self._snapshot.skus)
+
+    def values(self):
+        return (self._row(i) for i in range(len(self)))
+
+    def items(self):
+        return ((self._snapshot.sku(i), self._row(i)) for i in range(len(self)))
+
+
+class Snapshot:
+    """One attached snapshot generation (all arrays memory-mapped read-only)."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path / "meta.json") as f:
+            self.meta = json.load(f)
+        self.generation: int = self.meta["generation"]
+        self.slots: list[str] = self.meta["slots"]
+
+        self.skus = self._load("skus")
+        self._sorted_skus = self._load("skus.sorted")
+        self._sorted_rows = self._load("skus.rows")
+        self._strings = self._load("strings")
+        self._string_bytes = memoryview(self._strings) if len(self._strings) else b""
+        self._offsets = self._load("strings.offsets")
+        self._string = lru_cache(maxsize=STRING_CACHE_SIZE)(self._decode_string)
+
+        self.indptr = self._load("edges.indptr")
+        self.dst = self._load("edges.dst")
+        self.slot = self._load("edges.slot")
+        self.score = self._load("edges.score")
+
+        self._decoders = [
+            (column["name"], self._column_decoder(column)) for column in self.meta["columns"]
+        ]
+        self.catalog = SnapshotCatalog(self)
+
+    def _load(self, name: str) -> np.ndarray:
+        array = np.load(self.path / f"{name}.npy", mmap_mode="r", allow_pickle=False)
+        # Plain ndarray view of the same mapping: np.memmap indexing is much slower
+        return array.view(np.ndarray)
+
+    # -------------------------------------------------------------------------
+    # Catalog
+    # -------------------------------------------------------------------------
+
+    def _decode_string(self, code: int) -> str:
+        return str(self._string_bytes[self._offsets[code]:self._offsets[code + 1]], "utf-8")
+
+    def _column_decoder(self, column: dict):
+        name, kind = column["name"], column["kind"]
+        values = self._load(f"col.{name}")
+        string = self._string
+
+        if kind == "str":
+            def decode(i):
+                code = int(values[i])
+                return string(code) if code >= 0 else None
+            return decode
+
+        if kind == "strs":
+            indptr = self._load(f"col.{name}.indptr")
+
+            def decode(i):
+                return [string(c) for c in values[indptr[i]:indptr[i + 1]].tolist()]
+        elif kind == "bool":
+            def decode(i):
+                return bool(values[i])
+        elif kind == "int":
+            def decode(i):
+                return int(values[i])
+        elif kind == "float":
+            def decode(i):
+                return float(values[i])
+        elif kind == "datetime":
+            def decode(i):
+                return _EPOCH + int(values[i]) * _MICROSECOND
+        else:
+            raise ValueError(f"Unknown snapshot column kind: {kind}")
+
+        if not column["nullable"]:
+            return decode
+
+        nulls = self._load(f"col.{name}.null")
+        return lambda i: None if nulls[i] else decode(i)
+
+    def sku(self, row: int) -> str:
+        return self.skus[row].decode("utf-8")
+
+    def rows_of(self, skus: list[str]) -> np.ndarray:
+        """Rows of many SKUs (-1 where a SKU is not in the snapshot)."""
+        if not skus or not len(self.skus):
+            return np.full(len(skus), -1, dtype=np.int64)
+        keys = np.array([s.encode("utf-8") for s in skus], dtype=np.bytes_)
+        pos = np.minimum(np.searchsorted(self._sorted_skus, keys), len(self.skus) - 1)
+        return np.where(self._sorted_skus[pos] == keys, self._sorted_rows[pos], -1)
+
+    def row_of(self, sku: str) -> Optional[int]:
+        """Row of a SKU (binary search over the sorted SKU ids)."""
+        key = sku.encode("utf-8")
+        pos = int(np.searchsorted(self._sorted_skus, key))
+        if pos < len(self._sorted_skus) and self._sorted_skus[pos] == key:
+            return int(self._sorted_rows[pos])
+        return None
+
+    def decode_row(self, row: int) -> dict:
+        product = {"sku_id": self.sku(row)}
+        for name, decode in self._decoders:
+            product[name] = decode(row)
+        return product
+
+    # -------------------------------------------------------------------------
+    # Graph
+    # -------------------------------------------------------------------------
+
+    @property
+    def edge_count(self) -> int:
+        return int(self.indptr[-1])
+
+    def compatible_by_slot(
+        self,
+        sku: str,
+        limit: Optional[int] = None,
+        slot: Optional[str] = None,
+        min_score: float = 0.0,
+    ) -> dict[str, list[dict]]:
+        """
+        Compatible items grouped by slot, at most limit per slot, in the same
+        order as the edges table's (target_slot, sort_order).
+        """
+        row = self.row_of(sku)
+        if row is None:
+            return {}
+
+        start, end = int(self.indptr[row]), int(self.indptr[row + 1])
+        dst = self.dst[start:end]
+        slots = self.slot[start:end]
+        scores = self.score[start:end]
+
+        keep = np.ones(end - start, dtype=bool)
+        if slot is not None:
+            if slot not in self.slots:
+                return {}
+            keep &= slots == self.slots.index(slot)
+        if min_score > 0.0:
+            keep &= scores >= min_score
+        idx = np.flatnonzero(keep)
+
+        if limit is not None and len(idx):
+            # Edges are grouped by slot: keep the first `limit` of each group
+            kept_slots = slots[idx]
+            group_start = np.flatnonzero(np.r_[True, kept_slots[1:] != kept_slots[:-1]])
+            rank = np.arange(len(idx)) - np.repeat(group_start, np.diff(np.r_[group_start, len(idx)]))
+            idx = idx[rank < limit]
+
+        result: dict[str, list[dict]] = {}
+        for slot_code, sku, score in zip(
+            slots[idx].tolist(), self.skus[dst[idx]].tolist(), scores[idx].tolist()
+        ):
+            result.setdefault(self.slots[slot_code], []).append(
+                {"sku": sku.decode("utf-8"), "score": score}
+            )
+        return result
+
+    def adjacency(
+        self, sku: str, slot: str, min_score: float = 0.0
+    ) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        """Edges from sku into slot as (target rows, scores), sorted by row."""
+        row = self.row_of(sku)
+        if row is None or slot not in self.slots:
+            return None
+
+        start, end = int(self.indptr[row]), int(self.indptr[row + 1])
+        scores = self.score[start:end]
+        idx = np.flatnonzero((self.slot[start:end] == self.slots.index(slot)) & (scores >= min_score))
+        dst = self.dst[start:end][idx]
+        order = np.argsort(dst, kind="stable")
+        return dst[order], scores[idx][order]
+
+    def add_cross_scores(self, skus: Iterable[str], pair_scores: dict[tuple[str, str], float]):
+        """Add the scores of all edges between the given SKUs (both directions)."""
+        skus = list(skus)
+        rows = self.rows_of(skus)
+        found = rows >= 0
+        if not found.any():
+            return
+        rows = rows[found]
+        names = dict(zip(rows.tolist(), (s for s, f in zip(skus, found) if f)))
+
+        # Gather every candidate's outgoing edges, keep those to other candidates
+        starts = self.indptr[rows]
+        lengths = self.indptr[rows + 1] - starts
+        edge_idx = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        member = np.zeros(len(self.skus), dtype=bool)
+        member[rows] = True
+        dst = self.dst[edge_idx]
+        hit = member[dst]
+        src = np.repeat(rows, lengths)[hit]
+
+        for row_1, row_2, score in zip(
+            src.tolist(), dst[hit].tolist(), self.score[edge_idx[hit]].tolist()
+        ):
+            sku_1, sku_2 = names[row_1], names[row_2]
+            pair_scores[(sku_1, sku_2)] = score
+            pair_scores[(sku_2, sku_1)] = score
+
+    def pair_scores(self, sku: str, others: Iterable[str]) -> dict[str, float]:
+        """Scores of the edges from sku to each of others that exist."""
+        row = self.row_of(sku)
+        if row is None:
+            return {}
+
+        targets = {r: s for s in others if (r := self.row_of(s)) is not None}
+        if not targets:
+            return {}
+
+        start, end = int(self.indptr[row]), int(self.indptr[row + 1])
+        dst = self.dst[start:end]
+        hits = np.flatnonzero(np.isin(dst, list(targets)))
+        return {targets[int(dst[j])]: float(self.score[start + j]) for j in hits}
+
+
+# =============================================================================
+# ATTACHMENT
+# =============================================================================
+
+class SnapshotManager:
+    """
+    Attaches the current snapshot generation and follows CURRENT.
+
+    Disabled (get() returns None) when settings.snapshot_dir is unset or
+    nothing has been published yet, in which case services use the database.
+    """
+
+    _instance: Optional["SnapshotManager"] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            settings = get_settings()
+            cls._instance = super().__new__(cls)
+            cls._instance.directory = Path(settings.snapshot_dir) if settings.snapshot_dir else None
+            cls._instance.check_seconds = settings.snapshot_check_seconds
+            cls._instance._snapshot = None
+            cls._instance._checked_at = 0.0
+        return cls._instance
+
+    def get(self) -> Optional[Snapshot]:
+        """Get the attached snapshot, re-attaching if a newer one was published."""
+        if self.directory is None:
+            return None
+
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_seconds:
+            self._checked_at = now
+            self.refresh()
+        return self._snapshot
+
+    def refresh(self) -> Optional[Snapshot]:
+        """Attach the current generation if it differs from the attached one."""
+        generation = current_generation(self.directory)
+        if generation is None:
+            return self._snapshot
+        if self._snapshot is not None and self._snapshot.generation == generation:
+            return self._snapshot
+
+        try:
+            self._snapshot = Snapshot(self.directory / f"gen-{generation}")
+            logger.info("Attached snapshot generation %s", generation)
+        except (OSError, ValueError, KeyError) as e:
+            # Keep serving the attached generation (or the database)
+            logger.warning("Could not attach snapshot generation %s: %s", generation, e)
+        return self._snapshot
+
+
+# Singleton accessor
+_snapshot_manager: Optional[SnapshotManager] = None
+
+
+def get_snapshot_manager() -> SnapshotManager:
+    """Get the singleton snapshot manager."""
+    global _snapshot_manager
+    if _snapshot_manager is None:
+        _snapshot_manager = SnapshotManager()
+    return _snapshot_manager
+
+
+def get_snapshot() -> Optional[Snapshot]:
+    """Get the attached snapshot, or None if snapshots are disabled or unpublished."""
+    return get_snapshot_manager().get()
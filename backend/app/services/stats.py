@@ -0,0 +1,282 @@
+"""
+Statistics Service
+==================
+
+Product and graph statistics, materialized once per data version.
+
+Product statistics are computed in a single pass over the in-memory product
+catalog; graph statistics in a single streamed pass over the edges, ordered
+the same way the graph builder writes them. Both are kept until the data
+version of their source changes, so repeated /stats calls cost one
+O(1) version check instead of a set of aggregate queries.
+"""
+
+import heapq
+from collections import Counter, defaultdict
+from typing import Iterable, Optional
+
+from app.database import get_db
+from app.services.data_version import get_data_version_bus, read_data_versions
+from app.services.edges import EDGE_SCORE
+from app.services.product import _get_cached_products
+
+
+SCORE_BUCKETS = ["0.9-1.0", "0.8-0.9", "0.7-0.8", "0.6-0.7", "0.5-0.6", "0.0-0.5"]
+HIGH_SCORE_THRESHOLD = 0.7
+TOP_BRANDS_LIMIT = 10
+SLOT_AVERAGES_LIMIT = 20
+
+
+def score_bucket(score: float) -> str:
+    """Get the histogram bucket for a score (same buckets as the graph builder)."""
+    if score >= 0.9:
+        return "0.9-1.0"
+    elif score >= 0.8:
+        return "0.8-0.9"
+    elif score >= 0.7:
+        return "0.7-0.8"
+    elif score >= 0.6:
+        return "0.6-0.7"
+    elif score >= 0.5:
+        return "0.5-0.6"
+    return "0.0-0.5"
+
+
+def compute_product_stats(products: Iterable[dict]) -> dict:
+    """Compute product inventory statistics in a single pass over the catalog."""
+    total = 0
+    categories = Counter()
+    slots = Counter()
+    genders = Counter()
+    brands = Counter()
+    formality = Counter()
+
+    for p in products:
+        total += 1
+        categories[p.get("category")] += 1
+        slots[p.get("functional_slot")] += 1
+        genders[p.get("gender")] += 1
+        if p.get("brand") is not None:
+            brands[p["brand"]] += 1
+        formality[p.get("formality_score")] += 1
+
+    return {
+        "total_products": total,
+        "by_category": dict(categories.most_common()),
+        "by_slot": dict(slots.most_common()),
+        "by_gender": dict(genders.most_common()),
+        "top_brands": dict(brands.most_common(TOP_BRANDS_LIMIT)),
+        "formality_distribution": {
+            str(score): formality[score]
+            for score in sorted(formality, key=lambda s: (s is None, s))
+        },
+    }
+
+
+class GraphStatsAccumulator:
+    """
+    Streaming accumulator for graph statistics.
+
+    Feed directed edges with add() ordered by source SKU (as the edges table
+    and the graph builder order them), then call result(). Memory is
+    O(slot pairs), not O(edges).
+    """
+
+    def __init__(self, source_slots: dict[str, str]):
+        self.source_slots = source_slots
+        self.total_edges = 0
+        self.score_sum = 0.0
+        self.high_count = 0
+        self.buckets = dict.fromkeys(SCORE_BUCKETS, 0)
+        self.slot_sums: dict[str, list] = defaultdict(lambda: [0.0, 0])
+        self.products = 0
+        self.top5_sum = 0.0
+        self._current_sku = None
+        self._current_top5: list[float] = []
+
+    def _flush_top5(self):
+        if self._current_top5:
+            self.top5_sum += sum(self._current_top5) / len(self._current_top5)
+
+    def add(self, sku: str, target_slot: str, score: float):
+        # Scores are stored with 3 decimals; REAL columns come back as e.g.
+        # 0.699999988, which must still land in the 0.7 bucket.
+        score = round(float(score), 3)
+
+        if sku != self._current_sku:
+            self._flush_top5()
+            self._current_sku = sku
+            self._current_top5 = []
+            self.products += 1
+
+        self.total_edges += 1
+        self.score_sum += score
+        if score >= HIGH_SCORE_THRESHOLD:
+            self.high_count += 1
+        self.buckets[score_bucket(score)] += 1
+
+        key = f"{self.source_slots.get(sku, 'unknown')} -> {target_slot.lower()}"
+        self.slot_sums[key][0] += score
+        self.slot_sums[key][1] += 1
+
+        # Min-heap of this product's 5 best scores
+        if len(self._current_top5) < 5:
+            heapq.heappush(self._current_top5, score)
+        elif score > self._current_top5[0]:
+            heapq.heapreplace(self._current_top5, score)
+
+    def result(self) -> dict:
+        self._flush_top5()
+        self._current_sku = None
+        self._current_top5 = []
+
+        total_edges = self.total_edges
+        products = self.products
+        slot_averages = {
+            k: round(total / count, 3) for k, (total, count) in self.slot_sums.items()
+        }
+
+        return {
+            "total_products": products,
+            "total_edges": total_edges,
+            "avg_score": round(self.score_sum / total_edges, 3) if total_edges else 0.0,
+            "avg_top5_score": round(self.top5_sum / products, 3) if products else 0.0,
+            "high_score_pct": round(self.high_count / total_edges * 100, 1) if total_edges else 0.0,
+            "score_distribution": self.buckets,
+            "slot_averages": dict(
+                sorted(slot_averages.items(), key=lambda x: x[1], reverse=True)[:SLOT_AVERAGES_LIMIT]
+            ),
+        }
+
+
+class StatsService:
+    """
+    Materialized product and graph statistics.
+
+    Each set of statistics is tagged with the data version it was computed
+    from and recomputed only when that version changes.
+    """
+
+    _instance: Optional["StatsService"] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._product_stats = None
+            cls._instance._product_version = None
+            cls._instance._graph_stats = None
+            cls._instance._graph_version = None
+        return cls._instance
+
+    def get_materialized(self) -> dict:
+        """Materialized statistics and the data versions they were computed from."""
+        return {
+            "products": {"stats": self._product_stats, "version": self._product_version},
+            "graph": {"stats": self._graph_stats, "version": self._graph_version},
+        }
+
+    def restore_materialized(self, state: dict):
+        """Install statistics saved by get_materialized() (e.g. from a warm start)."""
+        if state["products"]["stats"] is not None:
+            self._product_stats = state["products"]["stats"]
+            self._product_version = state["products"]["version"]
+        if state["graph"]["stats"] is not None:
+            self._graph_stats = state["graph"]["stats"]
+            self._graph_version = state["graph"]["version"]
+
+    def invalidate(self):
+        """Drop materialized statistics so the next call recomputes them."""
+        self._product_stats = None
+        self._product_version = None
+        self._graph_stats = None
+        self._graph_version = None
+
+    async def get_data_versions(self) -> dict[str, Optional[int]]:
+        """
+        Get the current data version of the products and the graph.
+
+        Served from the data version bus when it is following data_version;
+        otherwise one O(1) query. Databases without a data_version table fall
+        back to the tables' modification counters.
+        """
+        versions = get_data_version_bus().versions
+        if versions is None:
+            pool = await get_db()
+            async with pool.acquire() as conn:
+                versions = await read_data_versions(conn)
+                if versions is None:
+                    rows = await conn.fetch("""
+                        SELECT relname, n_tup_ins + n_tup_upd + n_tup_del AS changes
+                        FROM pg_stat_user_tables
+                        WHERE relname = ANY($1)
+                    """, ["products", "compat_edges"])
+                    counters = {row["relname"]: row["changes"] for row in rows}
+                    versions = {
+                        "products": counters.get("products"),
+                        "graph": counters.get("compat_edges"),
+                    }
+
+        return {
+            "products": versions.get("products"),
+            "graph": versions.get("graph"),
+        }
+
+    async def get_product_stats(self, version: Optional[int] = None) -> dict:
+        """Get product inventory statistics, recomputing only on a new data version."""
+        if version is None:
+            version = (await self.get_data_versions())["products"]
+
+        if self._product_stats is None or version != self._product_version:
+            cache = await _get_cached_products(
+                force_refresh=self._product_stats is not None
+            )
+            self._product_stats = compute_product_stats(cache.values())
+            self._product_version = version
+
+        return self._product_stats
+
+    async def get_graph_stats(self, version: Optional[int] = None) -> dict:
+        """Get compatibility graph statistics, recomputing only on a new data version."""
+        if version is None:
+            version = (await self.get_data_versions())["graph"]
+
+        if self._graph_stats is None or version != self._graph_version:
+            self._graph_stats = await self._compute_graph_stats()
+            self._graph_version = version
+
+        return self._graph_stats
+
+    async def _compute_graph_stats(self) -> dict:
+        """Stream all edges once and compute graph statistics."""
+        cache = await _get_cached_products()
+        source_slots = {
+            sku: (p.get("functional_slot") or "").lower() for sku, p in cache.items()
+        }
+
+        pool = await get_db()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                cursor = conn.cursor(f"""
+                    SELECT s.sku_id AS sku_1, sl.name AS target_slot, {EDGE_SCORE} AS score
+                    FROM compat_edges e
+                    JOIN product_ids s ON s.id = e.src_id
+                    JOIN edge_slots sl ON sl.code = e.slot
+                    ORDER BY s.sku_id, sl.name, e.sort_order
+                """, prefetch=10000)
+                stats = GraphStatsAccumulator(source_slots)
+                async for row in cursor:
+                    stats.add(row["sku_1"], row["target_slot"], row["score"])
+
+        return stats.result()
+
+
+# Singleton accessor
+_stats_service: Optional[StatsService] = None
+
+
+def get_stats_service() -> StatsService:
+    """Get the singleton stats service."""
+    global _stats_service
+    if _stats_service is None:
+        _stats_service = StatsService()
+    return _stats_service
@@ -0,0 +1,161 @@
+"""
+Warm Start
+==========
+
+Versioned on-disk copy of the in-memory state a new instance would otherwise
+rebuild from Postgres: the product catalog and the materialized product and
+graph statistics.
+
+- save_warm_start() writes the file (on graceful shutdown, and after a boot
+  or background check that loaded fresh data)
+- load_warm_start() installs it at boot if its data versions match the
+  database's (one O(1) query), skipping the cold catalog query
+- start_background_check() then reloads from the database off the boot path
+  and rewrites the file if the data turned out to differ
+
+Disabled when settings.warm_start_path is unset.
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import orjson
+
+from app.config import get_settings
+from app.services.product import _get_cached_products, _set_cached_products
+from app.services.snapshot import get_snapshot
+from app.services.stats import get_stats_service
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+_background_task: Optional[asyncio.Task] = None
+
+
+def _warm_start_path() -> Optional[Path]:
+    path = get_settings().warm_start_path
+    return Path(path) if path else None
+
+
+def _datetime_columns(products: list[dict]) -> list[str]:
+    columns = set()
+    for product in products[:100]:
+        columns.update(k for k, v in product.items() if isinstance(v, datetime))
+    return sorted(columns)
+
+
+async def save_warm_start() -> bool:
+    """Write the current catalog and statistics to the warm start file."""
+    path = _warm_start_path()
+    if path is None:
+        return False
+
+    stats = get_stats_service()
+    state = {
+        "format": FORMAT_VERSION,
+        "saved_at": datetime.now(timezone.utc).isoformat(),
+        "versions": await stats.get_data_versions(),
+        "stats": stats.get_materialized(),
+    }
+    # An attached shared snapshot already provides the catalog
+    if get_snapshot() is None:
+        products = list((await _get_cached_products()).values())
+        state["products"] = products
+        state["datetime_columns"] = _datetime_columns(products)
+
+    try:
+        data = orjson.dumps(state)
+    except TypeError as e:
+        logger.warning("Warm start not saved: %s", e)
+        return False
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    logger.info("Saved warm start (%s bytes) to %s", len(data), path)
+    return True
+
+
+async def load_warm_start() -> bool:
+    """
+    Install the warm start file if it matches the database's data versions.
+
+    Returns whether it was installed.
+    """
+    path = _warm_start_path()
+    if path is None or not path.exists():
+        return False
+
+    try:
+        state = orjson.loads(path.read_bytes())
+    except (OSError, orjson.JSONDecodeError) as e:
+        logger.warning("Ignoring unreadable warm start file %s: %s", path, e)
+        return False
+
+    if state.get("format") != FORMAT_VERSION:
+        return False
+
+    stats = get_stats_service()
+    versions = await stats.get_data_versions()
+    if state["versions"] != versions:
+        logger.info("Warm start is stale (saved %s, database %s)", state["versions"], versions)
+        return False
+
+    if "products" in state:
+        columns = state["datetime_columns"]
+        for product in state["products"]:
+            for column in columns:
+                if product.get(column) is not None:
+                    product[column] = datetime.fromisoformat(product[column])
+        _set_cached_products({p["sku_id"]: p for p in state["products"]})
+
+    stats.restore_materialized(state["stats"])
+    return True
+
+
+async def _background_check():
+    """Reload the catalog from the database and resave if it differed."""
+    if get_snapshot() is not None:
+        return
+    try:
+        warm = dict(await _get_cached_products())
+        fresh = await _get_cached_products(force_refresh=True)
+        if fresh != warm:
+            logger.info("Warm start catalog differed from the database; reloaded")
+            get_stats_service().invalidate()
+            await save_warm_start()
+        else:
+            logger.info("Warm start catalog verified against the database")
+    except Exception:
+        logger.exception("Warm start background check failed")
+
+
+def start_background_check():
+    """Verify a warm-started catalog in the background."""
+    global _background_task
+    _background_task = asyncio.create_task(_background_check())
+
+
+def start_background_save():
+    """Write the warm start file in the background (after a cold boot)."""
+    global _background_task
+    if _warm_start_path() is not None:
+        _background_task = asyncio.create_task(save_warm_start())
+
+
+async def stop_background_task():
+    """Cancel a pending background check or save."""
+    global _background_task
+    if _background_task is not None and not _background_task.done():
+        _background_task.cancel()
+        try:
+            await _background_task
+        except asyncio.CancelledError:
+            pass
+    _background_task = None
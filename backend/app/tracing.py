@@ -0,0 +1,183 @@
+"""
+Request Tracing
+===============
+
+Lightweight phase timing for a single request.
+
+- span(name) times a block and records it on the current request's timeline
+- TimingMiddleware starts a timeline per request and reports the spans in a
+  Server-Timing response header
+- The slowest recent requests are kept in an in-memory ring buffer, readable
+  at /api/v1/stats/slow-requests
+
+Outside a request (scripts, startup) span() is a no-op.
+"""
+
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from app.config import get_settings
+
+
+class Timeline:
+    """Spans recorded while handling one request, in completion order."""
+
+    __slots__ = ("spans",)
+
+    def __init__(self):
+        self.spans: List[Tuple[str, float]] = []
+
+    def add(self, name: str, seconds: float):
+        self.spans.append((name, seconds))
+
+    def totals(self) -> List[Tuple[str, float]]:
+        """Total time per span name, in order of first appearance."""
+        totals: dict[str, float] = {}
+        for name, seconds in self.spans:
+            totals[name] = totals.get(name, 0.0) + seconds
+        return list(totals.items())
+
+
+_timeline: ContextVar[Optional[Timeline]] = ContextVar("timeline", default=None)
+
+
+class _Span:
+    __slots__ = ("timeline", "name", "start")
+
+    def __init__(self, timeline: Timeline, name: str):
+        self.timeline = timeline
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timeline.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(name: str):
+    """Time a block as a named span of the current request (no-op outside one)."""
+    timeline = _timeline.get()
+    if timeline is None:
+        return _NO_SPAN
+    return _Span(timeline, name)
+
+
+def current_timeline() -> Optional[Timeline]:
+    """Get the current request's timeline, if any."""
+    return _timeline.get()
+
+
+class capture_spans:
+    """Record spans of a block on a fresh timeline (e.g. in an executor worker)."""
+
+    def __enter__(self) -> Timeline:
+        self.timeline = Timeline()
+        self.token = _timeline.set(self.timeline)
+        return self.timeline
+
+    def __exit__(self, *exc):
+        _timeline.reset(self.token)
+        return False
+
+
+def record_spans(spans: List[Tuple[str, float]]):
+    """Add spans captured elsewhere to the current request's timeline."""
+    timeline = _timeline.get()
+    if timeline is not None:
+        timeline.spans.extend(spans)
+
+
+def server_timing_header(timeline: Timeline, total: float) -> str:
+    """Format a timeline as a Server-Timing header value (durations in ms)."""
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timeline.totals()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class SlowRequestLog:
+    """Ring buffer of recent requests slower than the configured threshold."""
+
+    def __init__(self, threshold_ms: float, size: int):
+        self.threshold_ms = threshold_ms
+        self._entries: deque = deque(maxlen=size)
+
+    def record(self, entry: dict):
+        if entry["duration_ms"] >= self.threshold_ms:
+            self._entries.append(entry)
+
+    def slowest(self, limit: Optional[int] = None) -> List[dict]:
+        """Buffered requests, slowest first."""
+        entries = sorted(self._entries, key=lambda e: e["duration_ms"], reverse=True)
+        return entries[:limit] if limit else entries
+
+
+_settings = get_settings()
+slow_requests = SlowRequestLog(
+    threshold_ms=_settings.slow_request_threshold_ms,
+    size=_settings.slow_request_buffer_size,
+)
+
+
+class TimingMiddleware:
+    """ASGI middleware adding a Server-Timing header and logging slow requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timeline = Timeline()
+        token = _timeline.set(timeline)
+        status = 500
+        started_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                header = server_timing_header(timeline, time.perf_counter() - start)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", header.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _timeline.reset(token)
+            route = scope.get("route")
+            slow_requests.record({
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": route.path if route is not None else None,
+                "status": status,
+                "started_at": started_at.isoformat(),
+                "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+                "spans": [
+                    {"name": name, "duration_ms": round(seconds * 1000, 1)}
+                    for name, seconds in timeline.spans
+                ],
+            })
@@ -7,21 +7,35 @@ Run this script to generate the compatibility_graph.json file from the database.
 The JSON file is then used by the app for fast in-memory lookups.
 
 Usage:
-    python export_graph_to_json.py
+    python export_graph_to_json.py                      # Compact JSON
+    python export_graph_to_json.py --format ndjson      # One edge per line
+    python export_graph_to_json.py --format binary      # Fixed-size edge records
+    python export_graph_to_json.py --output PATH
 
 The script will:
 1. Connect to Supabase
-2. Fetch all compatibility edges
-3. Build the graph structure
-4. Save to compatibility_graph.json
+2. Stream the compatibility edges through a server-side cursor, ordered by
+   (sku_1, target_slot, sort_order)
+3. Write each product's edges as soon as the product is complete, so memory
+   stays at one product's edges whatever the graph size
+4. Compute the metadata with running totals
+
+Formats:
+- json:   {"graph": {sku: {slot: [{"sku", "score"}, ...]}}, "metadata": {...}}
+          (metadata comes last because it is only known at the end)
+- ndjson: {"sku_1", "target_slot", "sku_2", "score", "sort_order"} per line,
+          metadata in <output>.meta.json
+- binary: header, packed edge records, then a JSON trailer with the SKU and
+          slot names; see BINARY_HEADER / BINARY_EDGE and load_binary_export()
 """
 
+import argparse
 import asyncio
 import json
 import os
+import struct
 import sys
 from pathlib import Path
-from collections import defaultdict
 from datetime import datetime
 
 # Add parent directory to path for imports
@@ -30,11 +44,200 @@ sys.path.insert(0, str(Path(__file__).parent))
 import asyncpg
 from dotenv import load_dotenv
 
+from app.services.edges import EDGE_SCORE
+from app.services.graph_metadata import read_graph_metadata
+
 # Load environment variables
 load_dotenv()
 
+FORMATS = {"json": ".json", "ndjson": ".ndjson", "binary": ".bin"}
+CURSOR_PREFETCH = 10000
+
+# magic, edge count, SKU count, trailer offset
+BINARY_MAGIC = b"DCLGEDG1"
+BINARY_HEADER = struct.Struct("<8sQQQ")
+# source SKU index, target SKU index, slot index, score (13 bytes, packed)
+BINARY_EDGE = struct.Struct("<IIBf")
+
+
+class GraphStats:
+    """Running totals for the export metadata."""
+
+    def __init__(self):
+        self.total_edges = 0
+        self.unique_products = 0
+        self.score_sum = 0.0
+        self.min_score = None
+        self.max_score = None
+        self.edges_per_slot: dict[str, int] = {}
+
+    def add_product(self):
+        self.unique_products += 1
+
+    def add_edge(self, slot: str, score: float):
+        self.total_edges += 1
+        self.score_sum += score
+        if self.min_score is None or score < self.min_score:
+            self.min_score = score
+        if self.max_score is None or score > self.max_score:
+            self.max_score = score
+        self.edges_per_slot[slot] = self.edges_per_slot.get(slot, 0) + 1
+
+    @property
+    def average_score(self) -> float:
+        return self.score_sum / self.total_edges if self.total_edges else 0
+
+    def metadata(self) -> dict:
+        return {
+            "total_edges": self.total_edges,
+            "unique_products": self.unique_products,
+            "average_score": round(self.average_score, 3),
+            "min_score": round(self.min_score, 3) if self.min_score is not None else None,
+            "max_score": round(self.max_score, 3) if self.max_score is not None else None,
+            "edges_per_slot": self.edges_per_slot,
+            "exported_at": datetime.now().isoformat(),
+        }
+
+
+# =============================================================================
+# WRITERS
+# =============================================================================
+# Each writer gets one product's edges at a time, as
+# (target_slot, sku_2, score, sort_order) tuples in export order.
+
+class JsonWriter:
+    """Compact JSON with the same graph structure the app loads."""
+
+    def __init__(self, f):
+        self.f = f
+        self.first = True
+        f.write('{"graph":{')
+
+    def write_product(self, sku: str, edges: list[tuple]):
+        slots: dict[str, list] = {}
+        for slot, sku_2, score, _ in edges:
+            slots.setdefault(slot, []).append({"sku": sku_2, "score": score})
+        if not self.first:
+            self.f.write(",")
+        self.first = False
+        self.f.write(json.dumps(sku))
+        self.f.write(":")
+        self.f.write(json.dumps(slots, separators=(",", ":")))
+
+    def close(self, output_path: Path, metadata: dict):
+        self.f.write('},"metadata":')
+        self.f.write(json.dumps(metadata, separators=(",", ":")))
+        self.f.write("}")
+
+
+class NdjsonWriter:
+    """One JSON object per edge; metadata goes to a sidecar file."""
+
+    def __init__(self, f):
+        self.f = f
+
+    def write_product(self, sku: str, edges: list[tuple]):
+        for slot, sku_2, score, sort_order in edges:
+            self.f.write(json.dumps({
+                "sku_1": sku,
+                "target_slot": slot,
+                "sku_2": sku_2,
+                "score": score,
+                "sort_order": sort_order,
+            }, separators=(",", ":")))
+            self.f.write("\n")
+
+    def close(self, output_path: Path, metadata: dict):
+        _write_sidecar(output_path, metadata)
+
+
+class BinaryWriter:
+    """
+    Packed edge records with SKUs as indices.
+
+    SKU indices are assigned in first-seen order; the names are written in
+    a trailer, and the header is rewritten at the end with the counts and
+    the trailer offset.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.sku_index: dict[str, int] = {}
+        self.slot_index: dict[str, int] = {}
+        self.edge_count = 0
+        f.write(BINARY_HEADER.pack(BINARY_MAGIC, 0, 0, 0))
+
+    def _sku(self, sku: str) -> int:
+        index = self.sku_index.get(sku)
+        if index is None:
+            index = self.sku_index[sku] = len(self.sku_index)
+        return index
+
+    def write_product(self, sku: str, edges: list[tuple]):
+        src = self._sku(sku)
+        records = bytearray()
+        for slot, sku_2, score, _ in edges:
+            slot_code = self.slot_index.setdefault(slot, len(self.slot_index))
+            records += BINARY_EDGE.pack(src, self._sku(sku_2), slot_code, score)
+        self.f.write(records)
+        self.edge_count += len(edges)
+
+    def close(self, output_path: Path, metadata: dict):
+        trailer_offset = self.f.tell()
+        self.f.write(json.dumps({
+            "skus": list(self.sku_index),
+            "slots": list(self.slot_index),
+            "metadata": metadata,
+        }, separators=(",", ":")).encode("utf-8"))
+        self.f.seek(0)
+        self.f.write(BINARY_HEADER.pack(
+            BINARY_MAGIC, self.edge_count, len(self.sku_index), trailer_offset
+        ))
+        _write_sidecar(output_path, metadata)
+
+
+WRITERS = {"json": JsonWriter, "ndjson": NdjsonWriter, "binary": BinaryWriter}
+
+
+def _write_sidecar(output_path: Path, metadata: dict):
+    with open(output_path.with_name(output_path.name + ".meta.json"), "w") as f:
+        json.dump(metadata, f, indent=2)
+
+
+def load_binary_export(path: str | Path) -> dict:
+    """
+    Read a binary export.
+
+    Returns {"src", "dst", "slot", "score"} as numpy arrays (one entry per
+    edge, in export order) plus the "skus", "slots" and "metadata" lists.
+    """
+    import numpy as np
+
+    with open(path, "rb") as f:
+        magic, edge_count, _, trailer_offset = BINARY_HEADER.unpack(f.read(BINARY_HEADER.size))
+        if magic != BINARY_MAGIC:
+            raise ValueError(f"{path} is not a binary graph export")
+        records = np.frombuffer(
+            f.read(trailer_offset - BINARY_HEADER.size),
+            dtype=np.dtype([("src", "<u4"), ("dst", "<u4"), ("slot", "u1"), ("score", "<f4")]),
+            count=edge_count,
+        )
+        trailer = json.loads(f.read())
+
+    return {
+        "src": records["src"],
+        "dst": records["dst"],
+        "slot": records["slot"],
+        "score": records["score"],
+        **trailer,
+    }
+
 
-async def export_graph():
+# =============================================================================
+# EXPORT
+# =============================================================================
+
+async def export_graph(output_format: str = "json", output_path: str = None):
     """Export compatibility graph from database to JSON."""
 
     # Build connection string
@@ -51,6 +254,10 @@ async def export_graph():
 
     dsn = f"postgresql://{user}:{password}@{host}:{port}/{database}"
 
+    if output_path is None:
+        output_path = Path(__file__).parent / f"compatibility_graph{FORMATS[output_format]}"
+    output_path = Path(output_path)
+
     print("=" * 60)
     print("EXPORTING COMPATIBILITY GRAPH TO JSON")
     print("=" * 60)
@@ -60,81 +267,62 @@ async def export_graph():
     print("1. Connecting to database...")
     conn = await asyncpg.connect(dsn, statement_cache_size=0)
 
-    try:
-        # Get total count
-        total = await conn.fetchval("SELECT COUNT(*) FROM compatibility_edges")
-        print(f"   Found {total:,} compatibility edges")
-
-        # Fetch all edges
-        print("2. Fetching all edges...")
-        rows = await conn.fetch("""
-            SELECT sku_1, sku_2, target_slot, score
-            FROM compatibility_edges
-            ORDER BY sku_1, target_slot, score DESC
-        """)
-        print(f"   Fetched {len(rows):,} rows")
-
-        # Build graph structure
-        print("3. Building graph structure...")
-        graph = defaultdict(lambda: defaultdict(list))
-
-        for row in rows:
-            sku_1 = row["sku_1"]
-            sku_2 = row["sku_2"]
-            slot = row["target_slot"].lower()
-            score = float(row["score"])
-
-            graph[sku_1][slot].append({
-                "sku": sku_2,
-                "score": score
-            })
-
-        # Convert defaultdict to regular dict
-        graph_dict = {
-            sku: dict(slots)
-            for sku, slots in graph.items()
-        }
-
-        print(f"   Built graph for {len(graph_dict):,} products")
+    tmp_path = output_path.with_name(f"{output_path.name}.tmp-{os.getpid()}")
+    stats = GraphStats()
 
-        # Calculate metadata
-        print("4. Calculating metadata...")
-        total_edges = sum(
-            len(items)
-            for slots in graph_dict.values()
-            for items in slots.values()
-        )
-
-        all_scores = [
-            item["score"]
-            for slots in graph_dict.values()
-            for items in slots.values()
-            for item in items
-        ]
-        avg_score = sum(all_scores) / len(all_scores) if all_scores else 0
-
-        metadata = {
-            "total_edges": total_edges,
-            "unique_products": len(graph_dict),
-            "average_score": round(avg_score, 3),
-            "exported_at": datetime.now().isoformat(),
-        }
-
-        print(f"   Total edges: {total_edges:,}")
-        print(f"   Unique products: {len(graph_dict):,}")
-        print(f"   Average score: {avg_score:.3f}")
-
-        # Save to JSON
-        output_path = Path(__file__).parent / "compatibility_graph.json"
-        print(f"5. Saving to {output_path}...")
-
-        output = {
-            "metadata": metadata,
-            "graph": graph_dict
-        }
-
-        with open(output_path, "w") as f:
-            json.dump(output, f, separators=(",", ":"))  # Compact JSON
+    try:
+        # Edge count from the graph summary (O(1); counting would scan the table)
+        graph_metadata = await read_graph_metadata(conn)
+        if graph_metadata is not None:
+            print(f"   Found {graph_metadata['edge_count']:,} compatibility edges")
+
+        print(f"2. Streaming edges to {output_format}...")
+        mode = "wb" if output_format == "binary" else "w"
+        with open(tmp_path, mode, buffering=1 << 20) as f:
+            writer = WRITERS[output_format](f)
+
+            # Server-side cursors only live inside a transaction
+            async with conn.transaction():
+                cursor = conn.cursor(f"""
+                    SELECT s.sku_id AS sku_1, d.sku_id AS sku_2, sl.name AS target_slot,
+                           {EDGE_SCORE} AS score, e.sort_order
+                    FROM compat_edges e
+                    JOIN product_ids s ON s.id = e.src_id
+                    JOIN product_ids d ON d.id = e.dst_id
+                    JOIN edge_slots sl ON sl.code = e.slot
+                    ORDER BY s.sku_id, sl.name, e.sort_order
+                """, prefetch=CURSOR_PREFETCH)
+
+                current_sku = None
+                edges = []
+                async for row in cursor:
+                    sku_1 = row["sku_1"]
+                    if sku_1 != current_sku:
+                        if edges:
+                            writer.write_product(current_sku, edges)
+                        current_sku = sku_1
+                        edges = []
+                        stats.add_product()
+
+                    slot = row["target_slot"].lower()
+                    score = float(row["score"])
+                    edges.append((slot, row["sku_2"], score, row["sort_order"]))
+                    stats.add_edge(slot, score)
+
+                    if stats.total_edges % 100000 == 0:
+                        print(f"   {stats.total_edges:,} edges...")
+
+                if edges:
+                    writer.write_product(current_sku, edges)
+
+            metadata = stats.metadata()
+            writer.close(output_path, metadata)
+
+        os.replace(tmp_path, output_path)
+
+        print(f"   Total edges: {stats.total_edges:,}")
+        print(f"   Unique products: {stats.unique_products:,}")
+        print(f"   Average score: {stats.average_score:.3f}")
 
         file_size = output_path.stat().st_size / (1024 * 1024)
         print(f"   Saved! File size: {file_size:.2f} MB")
@@ -149,7 +337,14 @@ async def export_graph():
 
     finally:
         await conn.close()
+        if tmp_path.exists():
+            tmp_path.unlink()
 
 
 if __name__ == "__main__":
-    asyncio.run(export_graph())
+    parser = argparse.ArgumentParser(description="Export the compatibility graph")
+    parser.add_argument("--format", choices=list(FORMATS), default="json", help="Output format")
+    parser.add_argument("--output", type=str, help="Output path (default: compatibility_graph.<ext>)")
+    args = parser.parse_args()
+
+    asyncio.run(export_graph(args.format, args.output))
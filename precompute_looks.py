@@ -5,6 +5,7 @@ Usage:
     python precompute_looks.py              # Compute missing only
     python precompute_looks.py --all        # Recompute all
     python precompute_looks.py --sku SKU    # Compute for specific SKU
+    python precompute_looks.py --skus-file changed_skus.txt  # Recompute listed SKUs
 """
 
 import asyncio
@@ -14,6 +15,8 @@ import time
 
 sys.path.insert(0, "backend")
 
+from app.database import get_db
+from app.services.data_version import bump_data_version, create_data_version_table
 from app.services.product import ProductService, _get_cached_products
 from app.services.compatibility import get_compatibility_graph
 from app.services.look_generator import get_look_generator
@@ -29,7 +32,7 @@ async def precompute_single(sku: str, look_gen, num_looks: int = 10) -> bool:
         looks_data = [look.to_dict() for look in looks]
 
         # Store in database
-        await PrecomputedLooksService.store_looks(sku, base_product, looks_data)
+        await PrecomputedLooksService.store_looks(sku, looks_data)
         return True
 
     except Exception as e:
@@ -37,7 +40,13 @@ async def precompute_single(sku: str, look_gen, num_looks: int = 10) -> bool:
         return False
 
 
-async def precompute_all(recompute_all: bool = False, specific_sku: str = None):
+def read_skus_file(path: str) -> list:
+    """SKUs listed one per line (e.g. ingest_products.py --changed-out)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+async def precompute_all(recompute_all: bool = False, specific_sku: str = None, skus_file: str = None):
     """Precompute looks for all products."""
 
     print("=" * 60)
@@ -64,6 +73,11 @@ async def precompute_all(recompute_all: bool = False, specific_sku: str = None):
     if specific_sku:
         skus = [specific_sku]
         print(f"\n2. Processing specific SKU: {specific_sku}")
+    elif skus_file:
+        listed = read_skus_file(skus_file)
+        skus = [sku for sku in listed if sku in cache]
+        print(f"\n2. Recomputing {len(skus)} listed products from {skus_file}"
+              f" ({len(listed) - len(skus)} not in catalog)")
     elif recompute_all:
         skus = list(cache.keys())
         print(f"\n2. Recomputing ALL {len(skus)} products")
@@ -109,6 +123,14 @@ async def precompute_all(recompute_all: bool = False, specific_sku: str = None):
     print(f"  Successful: {success}")
     print(f"  Failed: {failed}")
 
+    if success:
+        # Running APIs drop anything cached from the old looks
+        pool = await get_db()
+        async with pool.acquire() as conn:
+            await create_data_version_table(conn)
+            versions = await bump_data_version(conn, "looks")
+        print(f"  Looks data version: {versions['looks']}")
+
     # Final stats
     stats = await PrecomputedLooksService.get_stats()
     print(f"\n  Database now has {stats['total_products']} precomputed looks")
@@ -165,6 +187,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Precompute looks for products")
     parser.add_argument("--all", action="store_true", help="Recompute all products")
     parser.add_argument("--sku", type=str, help="Compute for specific SKU")
+    parser.add_argument("--skus-file", type=str, help="Recompute the SKUs listed in a file, one per line")
     parser.add_argument("--verify", type=str, help="Verify consistency for a SKU")
 
     args = parser.parse_args()
@@ -172,4 +195,6 @@ if __name__ == "__main__":
     if args.verify:
         asyncio.run(verify_consistency(args.verify))
     else:
-        asyncio.run(precompute_all(recompute_all=args.all, specific_sku=args.sku))
+        asyncio.run(precompute_all(
+            recompute_all=args.all, specific_sku=args.sku, skus_file=args.skus_file
+        ))
@@ -0,0 +1,44 @@
+"""
+Publish the product catalog and compatibility graph as a shared snapshot.
+
+API workers with SNAPSHOT_DIR set memory-map the published snapshot instead
+of each loading the catalog and graph, and switch to a newer generation
+within SNAPSHOT_CHECK_SECONDS. Run after seeding or rebuilding the graph.
+
+Usage:
+    python publish_snapshot.py                  # Publish to SNAPSHOT_DIR
+    python publish_snapshot.py --dir PATH       # Publish to PATH
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+sys.path.insert(0, "backend")
+
+from app.database import Database
+from app.services.snapshot import publish_from_db
+
+
+async def main(directory: str = None):
+    print("=" * 60)
+    print("PUBLISH SNAPSHOT")
+    print("=" * 60)
+
+    await Database.connect()
+    start = time.time()
+    try:
+        generation = await publish_from_db(directory)
+    finally:
+        await Database.disconnect()
+
+    print(f"\nPublished generation {generation} in {time.time() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish a shared catalog/graph snapshot")
+    parser.add_argument("--dir", type=str, help="Snapshot directory (default: SNAPSHOT_DIR)")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.dir))
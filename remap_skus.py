@@ -0,0 +1,425 @@
+"""
+SKU Remap Script
+================
+Renames SKU ids everywhere they are stored, from an old -> new mapping.
+
+Updates:
+1. Supabase PostgreSQL database, in one transaction: the mapping is COPYed
+   into a temp table and applied with a few set-based statements to
+   products, product_ids (compat_edges is keyed by id, so its rows don't
+   change), precomputed_looks, product_content_hashes and a legacy
+   compatibility_edges table if present (graph_metadata is cleared; the
+   API backfills it), then bumps the products, graph and looks data
+   versions so running APIs drop their caches
+2. JSON artifacts (compatibility_graph_scored.json, product_metadata.json,
+   products_seed.json): one streaming pass each, replacing every JSON
+   string that is exactly an old SKU
+3. The shared snapshot (SNAPSHOT_DIR), if any: a new generation with the
+   SKU arrays rewritten
+
+Mapping file: CSV with two columns, old_sku,new_sku (header optional).
+
+Usage:
+    python remap_skus.py --mapping mapping.csv
+    python remap_skus.py --mapping mapping.csv --json compatibility_graph_scored.json
+    python remap_skus.py --mapping mapping.csv --skip-db
+"""
+
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Iterator, Optional
+
+# Load .env file if it exists
+try:
+    from dotenv import load_dotenv
+    env_path = Path(__file__).parent / ".env"
+    if env_path.exists():
+        load_dotenv(env_path)
+except ImportError:
+    pass
+
+import psycopg2
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from app.services.data_version import DATA_VERSION_SQL
+
+# Logging setup
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S"
+)
+log = logging.getLogger(__name__)
+
+# Database config
+DB_HOST = os.getenv("SUPABASE_DB_HOST", "localhost")
+DB_PORT = os.getenv("SUPABASE_DB_PORT", "5432")
+DB_NAME = os.getenv("SUPABASE_DB_NAME", "postgres")
+DB_USER = os.getenv("SUPABASE_DB_USER", "postgres")
+DB_PASS = os.getenv("SUPABASE_DB_PASSWORD", "")
+
+ROOT = Path(__file__).parent
+DEFAULT_JSON_FILES = [
+    ROOT / "compatibility_graph_scored.json",
+    ROOT / "product_metadata.json",
+    ROOT / "products_seed.json",
+]
+
+# A complete JSON string token; anything after the last match in a buffer is
+# either outside a string or an unterminated string awaiting the next chunk
+JSON_STRING = re.compile(r'"((?:[^"\\]|\\.)*)"', re.DOTALL)
+CHUNK_SIZE = 1 << 20
+
+
+# -----------------------------------------------------------------------------
+# MAPPING
+# -----------------------------------------------------------------------------
+
+def load_mapping(filepath: str) -> dict:
+    """Read old_sku,new_sku pairs from a CSV file."""
+    mapping = {}
+    with open(filepath, "r", encoding="utf-8", newline="") as f:
+        for i, row in enumerate(csv.reader(f)):
+            if not row or not row[0].strip():
+                continue
+            if len(row) < 2:
+                raise ValueError(f"Line {i + 1}: expected old_sku,new_sku")
+            old, new = row[0].strip(), row[1].strip()
+            if i == 0 and (old, new) == ("old_sku", "new_sku"):
+                continue
+            if old in mapping and mapping[old] != new:
+                raise ValueError(f"{old} is mapped to both {mapping[old]} and {new}")
+            mapping[old] = new
+    return mapping
+
+
+def validate_mapping(mapping: dict) -> dict:
+    """
+    Drop identity entries and reject mappings that can't be applied in one
+    pass: empty targets, two SKUs renamed to the same id, and chains or
+    swaps (a new SKU that is itself renamed).
+    """
+    mapping = {old: new for old, new in mapping.items() if old != new}
+
+    empty = [old for old, new in mapping.items() if not new]
+    if empty:
+        raise ValueError(f"Empty new SKU for: {', '.join(empty[:10])}")
+
+    targets = {}
+    for old, new in mapping.items():
+        if new in targets:
+            raise ValueError(f"{targets[new]} and {old} are both mapped to {new}")
+        targets[new] = old
+
+    chained = [new for new in targets if new in mapping]
+    if chained:
+        raise ValueError(
+            f"New SKUs that are also renamed (split into separate runs): {', '.join(chained[:10])}"
+        )
+    return mapping
+
+
+# -----------------------------------------------------------------------------
+# DATABASE
+# -----------------------------------------------------------------------------
+
+def get_connection():
+    """Create database connection."""
+    log.info(f"Connecting to {DB_HOST}:{DB_PORT}/{DB_NAME}")
+    return psycopg2.connect(
+        host=DB_HOST,
+        port=DB_PORT,
+        database=DB_NAME,
+        user=DB_USER,
+        password=DB_PASS,
+        client_encoding="utf8"
+    )
+
+
+def _table_exists(cur, table: str) -> bool:
+    cur.execute("SELECT to_regclass(%s) IS NOT NULL", (table,))
+    return cur.fetchone()[0]
+
+
+def remap_database(conn, mapping: dict) -> dict:
+    """
+    Apply the mapping to every table that stores SKUs, in one transaction.
+
+    New product rows are inserted as copies of the old ones, references are
+    repointed, then the old rows are deleted, so foreign keys hold
+    throughout. Returns per-table row counts.
+    """
+    counts = {}
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TEMP TABLE sku_map (
+                old_sku TEXT PRIMARY KEY,
+                new_sku TEXT NOT NULL UNIQUE
+            ) ON COMMIT DROP
+        """)
+        buf = io.StringIO()
+        csv.writer(buf).writerows(mapping.items())
+        buf.seek(0)
+        cur.copy_expert("COPY sku_map (old_sku, new_sku) FROM STDIN WITH (FORMAT csv)", buf)
+
+        cur.execute("""
+            DELETE FROM sku_map m
+            WHERE NOT EXISTS (SELECT 1 FROM products p WHERE p.sku_id = m.old_sku)
+        """)
+        counts["not_in_database"] = cur.rowcount
+
+        cur.execute("""
+            SELECT m.new_sku FROM sku_map m
+            JOIN products p ON p.sku_id = m.new_sku
+        """)
+        taken = [row[0] for row in cur.fetchall()]
+        if taken:
+            raise ValueError(f"New SKUs already exist in products: {', '.join(taken[:10])}")
+
+        cur.execute("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = 'products'
+            ORDER BY ordinal_position
+        """)
+        columns = [row[0] for row in cur.fetchall() if row[0] != "sku_id"]
+        column_list = ", ".join(columns)
+        source_list = ", ".join(f"p.{c}" for c in columns)
+
+        cur.execute(f"""
+            INSERT INTO products (sku_id, {column_list})
+            SELECT m.new_sku, {source_list}
+            FROM products p JOIN sku_map m ON p.sku_id = m.old_sku
+        """)
+        counts["products"] = cur.rowcount
+
+        if _table_exists(cur, "product_ids"):
+            cur.execute("""
+                UPDATE product_ids i SET sku_id = m.new_sku
+                FROM sku_map m WHERE i.sku_id = m.old_sku
+            """)
+            counts["product_ids"] = cur.rowcount
+
+        if _table_exists(cur, "compatibility_edges"):
+            counts["compatibility_edges"] = 0
+            for column in ("sku_1", "sku_2"):
+                cur.execute(f"""
+                    UPDATE compatibility_edges e SET {column} = m.new_sku
+                    FROM sku_map m WHERE e.{column} = m.old_sku
+                """)
+                counts["compatibility_edges"] += cur.rowcount
+
+        if _table_exists(cur, "product_content_hashes"):
+            cur.execute("""
+                UPDATE product_content_hashes h SET sku_id = m.new_sku
+                FROM sku_map m WHERE h.sku_id = m.old_sku
+            """)
+            counts["product_content_hashes"] = cur.rowcount
+
+        if _table_exists(cur, "precomputed_looks"):
+            # Legacy JSONB rows can't be rewritten in place; drop the ones
+            # that mention a renamed SKU so precompute_looks.py regenerates them
+            cur.execute("""
+                DELETE FROM precomputed_looks pl
+                WHERE pl.skus IS NULL AND EXISTS (
+                    SELECT 1 FROM sku_map m
+                    WHERE pl.sku_id = m.old_sku
+                       OR strpos(pl.looks::text, '"' || m.old_sku || '"') > 0
+                )
+            """)
+            counts["precomputed_looks_dropped"] = cur.rowcount
+
+            cur.execute("""
+                UPDATE precomputed_looks pl SET
+                    sku_id = COALESCE(
+                        (SELECT m.new_sku FROM sku_map m WHERE m.old_sku = pl.sku_id),
+                        pl.sku_id
+                    ),
+                    skus = (
+                        SELECT array_agg(COALESCE(m.new_sku, s.sku) ORDER BY s.i)
+                        FROM unnest(pl.skus) WITH ORDINALITY AS s(sku, i)
+                        LEFT JOIN sku_map m ON m.old_sku = s.sku
+                    )
+                WHERE pl.skus && (SELECT array_agg(old_sku) FROM sku_map)
+            """)
+            counts["precomputed_looks"] = cur.rowcount
+
+        cur.execute("DELETE FROM products p USING sku_map m WHERE p.sku_id = m.old_sku")
+
+        if _table_exists(cur, "graph_metadata"):
+            # The checksum covers SKU ids; the next read recomputes the row
+            cur.execute("DELETE FROM graph_metadata")
+
+        cur.execute(DATA_VERSION_SQL)
+        for data_set in ("products", "graph", "looks"):
+            cur.execute("SELECT bump_data_version(%s)", (data_set,))
+
+    conn.commit()
+    return counts
+
+
+# -----------------------------------------------------------------------------
+# JSON ARTIFACTS
+# -----------------------------------------------------------------------------
+
+def _decode(raw: str) -> str:
+    return json.loads(f'"{raw}"') if "\\" in raw else raw
+
+
+def _json_tokens(f) -> Iterator[tuple[str, Optional[str]]]:
+    """
+    Stream a JSON file as (text before, raw string body) pairs.
+
+    The last pair is (remaining text, None). Only string tokens are
+    inspected, so memory stays at about one chunk however large the file.
+    """
+    buf = ""
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        buf += chunk
+        end = 0
+        for match in JSON_STRING.finditer(buf):
+            yield buf[end:match.start()], match.group(1)
+            end = match.end()
+        buf = buf[end:]
+        if not chunk:
+            yield buf, None
+            return
+
+
+def iter_json_strings(filepath: str) -> Iterator[str]:
+    """Every string (keys and values) in a JSON file, streamed."""
+    with open(filepath, "r", encoding="utf-8") as f:
+        for _, raw in _json_tokens(f):
+            if raw is not None:
+                yield _decode(raw)
+
+
+def rewrite_json(filepath: str, mapping: dict) -> int:
+    """
+    Replace every JSON string that is exactly an old SKU, in one streaming
+    pass. Returns the number of replacements (the file is left untouched if 0).
+    """
+    if not os.path.exists(filepath):
+        log.info(f"File not found: {filepath}")
+        return 0
+
+    log.info(f"Processing: {filepath}")
+    tmp = f"{filepath}.tmp-{os.getpid()}"
+    replaced = 0
+    try:
+        with open(filepath, "r", encoding="utf-8") as src, \
+                open(tmp, "w", encoding="utf-8") as dst:
+            for text, raw in _json_tokens(src):
+                dst.write(text)
+                if raw is None:
+                    break
+                new = mapping.get(_decode(raw))
+                if new is None:
+                    dst.write(f'"{raw}"')
+                else:
+                    dst.write(json.dumps(new, ensure_ascii=False))
+                    replaced += 1
+        if replaced:
+            os.replace(tmp, filepath)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    log.info(f"  Replaced {replaced} SKU references")
+    return replaced
+
+
+# -----------------------------------------------------------------------------
+# MAIN
+# -----------------------------------------------------------------------------
+
+def remap(
+    mapping: dict,
+    json_files: Optional[list] = None,
+    snapshot_dir: Optional[str] = None,
+    skip_db: bool = False,
+) -> dict:
+    """
+    Apply the mapping to the database, then the JSON files and snapshot.
+
+    A database failure stops before any file is touched. Returns counts.
+    """
+    mapping = validate_mapping(mapping)
+    results = {}
+    if not mapping:
+        log.info("Nothing to remap")
+        return results
+    log.info(f"Remapping {len(mapping)} SKUs")
+
+    if not skip_db:
+        conn = get_connection()
+        try:
+            results.update(remap_database(conn, mapping))
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        for table, count in results.items():
+            log.info(f"  {table}: {count}")
+
+    for filepath in json_files if json_files is not None else DEFAULT_JSON_FILES:
+        results[Path(filepath).name] = rewrite_json(str(filepath), mapping)
+
+    snapshot_dir = snapshot_dir or os.getenv("SNAPSHOT_DIR")
+    if snapshot_dir:
+        from app.services.snapshot import remap_snapshot
+
+        generation = remap_snapshot(snapshot_dir, mapping)
+        if generation is None:
+            log.info(f"Snapshot in {snapshot_dir}: nothing to remap")
+        else:
+            log.info(f"Published snapshot generation {generation} to {snapshot_dir}")
+            if not skip_db:
+                conn = get_connection()
+                try:
+                    with conn.cursor() as cur:
+                        cur.execute("SELECT bump_data_version('snapshot')")
+                    conn.commit()
+                finally:
+                    conn.close()
+        results["snapshot_generation"] = generation
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rename SKU ids from an old,new CSV mapping")
+    parser.add_argument("--mapping", required=True, help="CSV of old_sku,new_sku")
+    parser.add_argument("--json", action="append",
+                        help="JSON file to rewrite (repeatable; default: the graph, metadata and seed files)")
+    parser.add_argument("--snapshot-dir", help="Snapshot directory (default: SNAPSHOT_DIR)")
+    parser.add_argument("--skip-db", action="store_true", help="Only rewrite files")
+    args = parser.parse_args()
+
+    log.info("=" * 60)
+    log.info("SKU REMAP")
+    log.info("=" * 60)
+
+    try:
+        mapping = load_mapping(args.mapping)
+        remap(mapping, json_files=args.json, snapshot_dir=args.snapshot_dir, skip_db=args.skip_db)
+    except (ValueError, psycopg2.Error) as e:
+        log.error(f"Remap failed: {e}")
+        sys.exit(1)
+
+    log.info("=" * 60)
+    log.info("REMAP COMPLETE")
+    log.info("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
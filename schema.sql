@@ -93,30 +93,106 @@ CREATE TRIGGER trg_products_updated_at
 
 -- =============================================================================
 -- COMPATIBILITY EDGES TABLE
--- Stores pre-computed pairwise compatibility scores between products
+-- Stores pre-computed pairwise compatibility scores between products,
+-- one 16-byte row per edge (see backend/app/services/edges.py)
 -- =============================================================================
 
-DROP TABLE IF EXISTS compatibility_edges CASCADE;
+DROP TABLE IF EXISTS compat_edges CASCADE;
+DROP TABLE IF EXISTS product_ids CASCADE;
+DROP TABLE IF EXISTS compatibility_edges CASCADE;  -- Legacy text-keyed table
 
-CREATE TABLE compatibility_edges (
-    sku_1 VARCHAR(100) NOT NULL,
-    sku_2 VARCHAR(100) NOT NULL,
-    target_slot VARCHAR(50) NOT NULL,  -- The slot that sku_2 fills
-    score NUMERIC(4,3) NOT NULL,       -- 0.000 to 1.000
+-- Integer ids for products, so edges don't repeat the SKU text
+CREATE TABLE product_ids (
+    id SERIAL PRIMARY KEY,
+    sku_id TEXT NOT NULL UNIQUE REFERENCES products(sku_id) ON DELETE CASCADE
+);
+
+-- Slot codes (SLOT_CODES in app/models/product.py)
+CREATE TABLE IF NOT EXISTS edge_slots (
+    code SMALLINT PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+INSERT INTO edge_slots (code, name) VALUES
+    (0, 'base top'),
+    (1, 'outerwear'),
+    (2, 'primary bottom'),
+    (3, 'secondary bottom'),
+    (4, 'footwear'),
+    (5, 'accessory')
+ON CONFLICT DO NOTHING;
+
+CREATE TABLE compat_edges (
+    src_id INTEGER NOT NULL REFERENCES product_ids(id) ON DELETE CASCADE,
+    dst_id INTEGER NOT NULL REFERENCES product_ids(id) ON DELETE CASCADE,
+    sort_order INTEGER NOT NULL,       -- Position within (src_id, slot)
+    slot SMALLINT NOT NULL,            -- The slot that dst_id fills (edge_slots.code)
+    score SMALLINT NOT NULL,           -- Thousandths: 0 to 1000
+
+    PRIMARY KEY (src_id, dst_id)
+);
+
+-- Main query: compatible items for a product, per slot, in sort order.
+-- Covering, so candidate fetches are index-only scans
+CREATE INDEX idx_compat_edges_src ON compat_edges (src_id, slot, sort_order) INCLUDE (dst_id, score);
+
+-- Reverse lookup (for bidirectional compatibility, cascading deletes)
+CREATE INDEX idx_compat_edges_dst ON compat_edges (dst_id);
+
+-- =============================================================================
+-- GRAPH METADATA
+-- One-row summary of compat_edges, written whenever the graph is
+-- (re)built so startup and health checks don't scan the edges table
+-- =============================================================================
 
-    PRIMARY KEY (sku_1, sku_2),
+CREATE TABLE IF NOT EXISTS graph_metadata (
+    id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    edge_count BIGINT NOT NULL,
+    product_count INTEGER NOT NULL,
+    min_score REAL,
+    max_score REAL,
+    avg_score REAL,
+    build_version TEXT NOT NULL,
+    checksum TEXT NOT NULL,             -- XOR of per-edge md5 prefixes
+    built_at TIMESTAMPTZ DEFAULT NOW()
+);
 
-    -- Foreign keys for referential integrity
-    FOREIGN KEY (sku_1) REFERENCES products(sku_id) ON DELETE CASCADE,
-    FOREIGN KEY (sku_2) REFERENCES products(sku_id) ON DELETE CASCADE
+-- =============================================================================
+-- PRODUCT CONTENT HASHES
+-- SHA-256 of each product's normalized row at its last ingest, so
+-- scripts/ingest_products.py only sends new or changed products
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS product_content_hashes (
+    sku_id VARCHAR(100) PRIMARY KEY REFERENCES products(sku_id) ON DELETE CASCADE,
+    content_hash TEXT NOT NULL,
+    ingested_at TIMESTAMPTZ DEFAULT NOW()
 );
 
--- Critical indexes for query patterns
--- Main query: get compatible items for a SKU, optionally filtered by slot, sorted by score
-CREATE INDEX idx_compat_sku1_slot_score ON compatibility_edges(sku_1, target_slot, score DESC);
+-- =============================================================================
+-- DATA VERSIONS
+-- One counter per data set (products, graph, looks, snapshot). Scripts that
+-- change a data set call bump_data_version() in the same transaction; it
+-- NOTIFYs channel data_version with '<data set>:<version>' on commit, and
+-- the API drops the caches built from the old version
+-- (see backend/app/services/data_version.py)
+-- =============================================================================
 
--- Reverse lookup (for bidirectional compatibility)
-CREATE INDEX idx_compat_sku2 ON compatibility_edges(sku_2);
+CREATE TABLE IF NOT EXISTS data_version (
+    name TEXT PRIMARY KEY,
+    version BIGINT NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
 
--- High-score filtering (for quality recommendations)
-CREATE INDEX idx_compat_score ON compatibility_edges(score) WHERE score >= 0.7;
+CREATE OR REPLACE FUNCTION bump_data_version(data_set TEXT) RETURNS BIGINT AS $$
+DECLARE
+    new_version BIGINT;
+BEGIN
+    INSERT INTO data_version (name, version) VALUES (data_set, 1)
+    ON CONFLICT (name) DO UPDATE
+        SET version = data_version.version + 1, updated_at = NOW()
+    RETURNING version INTO new_version;
+    PERFORM pg_notify('data_version', data_set || ':' || new_version);
+    RETURN new_version;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,400 @@
+"""
+Look Generation Benchmark
+=========================
+
+Reproducible benchmark for LookGeneratorService.generate_looks.
+
+- Synthetic catalogs (default 1k, 10k, 100k products) generated from the
+  attribute distributions in products_seed.json
+- In-memory stand-ins for CompatibilityGraphDB and ProductService, scored
+  with the same rules as build_scored_graph.py
+- p50/p99 latency, allocated memory (tracemalloc) and peak RSS per
+  catalog size and num_looks
+- Results written as JSON so runs can be diffed between versions
+
+Usage:
+    python scripts/benchmark_look_generator.py
+    python scripts/benchmark_look_generator.py --sizes 1000 10000 --bases 100
+    python scripts/benchmark_look_generator.py --output new.json --compare old.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR / "backend"))
+sys.path.insert(0, str(ROOT_DIR / "scripts"))
+
+import build_scored_graph as scoring  # noqa: E402
+from app.services import look_generator  # noqa: E402
+from app.services.look_generator import CANDIDATES_PER_SLOT  # noqa: E402
+
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+SEED_PATH = ROOT_DIR / "products_seed.json"
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+DEFAULT_NUM_LOOKS = [3, 10, 15]
+
+# Attributes sampled together from one donor product, so that combinations
+# that only make sense together (type/category, formality level/score) stay
+# consistent while the catalog is still a mix of seed attributes.
+ATTRIBUTE_GROUPS = [
+    ("type", "category", "sub_category", "title", "brand", "image_url",
+     "pattern", "material_appearance", "fit", "design_elements"),
+    ("primary_color", "secondary_colors"),
+    ("style", "fashion_aesthetics", "statement_piece"),
+    ("occasion", "formality_level", "formality_score", "versatility"),
+    ("season",),
+    ("gender",),
+]
+
+
+# ============================================================
+# SYNTHETIC CATALOG
+# ============================================================
+
+def load_seed(path: Path) -> List[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def generate_catalog(seed: List[dict], size: int, rng: random.Random) -> Dict[str, dict]:
+    """
+    Generate a synthetic catalog with the seed's attribute distributions.
+
+    The functional slot is drawn with the seed's slot frequencies; each
+    attribute group is then copied from a random seed product of that slot.
+    """
+    by_slot: Dict[str, List[dict]] = defaultdict(list)
+    for p in seed:
+        by_slot[p["functional_slot"].lower()].append(p)
+
+    slots = sorted(by_slot)
+    weights = [len(by_slot[s]) for s in slots]
+
+    catalog = {}
+    for i in range(size):
+        slot = rng.choices(slots, weights)[0]
+        donors = by_slot[slot]
+        product = {"sku_id": f"SYN{i:07d}", "functional_slot": slot}
+        for group in ATTRIBUTE_GROUPS:
+            donor = rng.choice(donors)
+            for key in group:
+                product[key] = donor.get(key)
+        catalog[product["sku_id"]] = product
+
+    return catalog
+
+
+# ============================================================
+# IN-MEMORY STAND-INS
+# ============================================================
+
+class InMemoryGraph:
+    """
+    Stand-in for CompatibilityGraphDB over a synthetic catalog.
+
+    Building the full graph is O(n^2), so each base is compared with a random
+    sample of up to `pool_sample` products per slot and keeps its top
+    candidates per slot, like the edges table. Cross-scores are every
+    compatible pair among a base's candidates, like the cross-score query.
+    Adjacency is computed on first use and cached, so call prepare() before
+    timing.
+    """
+
+    def __init__(self, catalog: Dict[str, dict], rng: random.Random, pool_sample: int):
+        self.catalog = catalog
+        self.rng = rng
+        self.pool_sample = pool_sample
+        self._metadata: Dict[str, dict] = {}
+        self._by_slot: Dict[str, List[str]] = defaultdict(list)
+        for sku, p in catalog.items():
+            self._by_slot[p["functional_slot"]].append(sku)
+        self._candidates: Dict[str, Tuple[dict, dict]] = {}
+
+    def _as_metadata(self, sku: str) -> dict:
+        """Product in the raw metadata shape build_scored_graph.py expects."""
+        if sku not in self._metadata:
+            p = self.catalog[sku]
+            self._metadata[sku] = {
+                "sku_id": sku,
+                "visual_features": {
+                    **p,
+                    "functional_slot": p["functional_slot"].title(),
+                    "gender": (p.get("gender") or "unisex").title(),
+                },
+            }
+        return self._metadata[sku]
+
+    def _score(self, sku_a: str, sku_b: str):
+        a, b = self._as_metadata(sku_a), self._as_metadata(sku_b)
+        if not scoring.is_compatible(a, b):
+            return None
+        return scoring.compute_pair_score(a, b)
+
+    def prepare(self, base_sku: str, candidates_per_slot: int) -> Tuple[dict, dict]:
+        if base_sku in self._candidates:
+            return self._candidates[base_sku]
+
+        compatible_by_slot = {}
+        for slot, pool in self._by_slot.items():
+            sample = pool if len(pool) <= self.pool_sample else self.rng.sample(pool, self.pool_sample)
+            scored = []
+            for sku in sample:
+                if sku == base_sku:
+                    continue
+                score = self._score(base_sku, sku)
+                if score is not None:
+                    scored.append((sku, score))
+            scored.sort(key=lambda x: -x[1])
+            if scored:
+                compatible_by_slot[slot] = [
+                    {"sku": sku, "score": score} for sku, score in scored[:candidates_per_slot]
+                ]
+
+        pair_scores = {}
+        candidates = [item["sku"] for items in compatible_by_slot.values() for item in items]
+        for item in (i for items in compatible_by_slot.values() for i in items):
+            pair_scores[(base_sku, item["sku"])] = item["score"]
+            pair_scores[(item["sku"], base_sku)] = item["score"]
+        for i, sku_a in enumerate(candidates):
+            for sku_b in candidates[i + 1:]:
+                score = self._score(sku_a, sku_b)
+                if score is not None:
+                    pair_scores[(sku_a, sku_b)] = score
+                    pair_scores[(sku_b, sku_a)] = score
+
+        self._candidates[base_sku] = (compatible_by_slot, pair_scores)
+        return compatible_by_slot, pair_scores
+
+    async def get_compatible_with_cross_scores(self, sku_id: str, candidates_per_slot: int = 50):
+        return self.prepare(sku_id, candidates_per_slot)
+
+
+def make_product_service(catalog: Dict[str, dict]):
+    """Stand-in for ProductService serving from the synthetic catalog."""
+
+    class InMemoryProductService:
+        @staticmethod
+        async def get_by_sku(sku_id: str, use_cache: bool = True):
+            return catalog.get(sku_id)
+
+        @staticmethod
+        async def get_by_skus(sku_ids: List[str], use_cache: bool = True):
+            return [catalog[sku] for sku in sku_ids if sku in catalog]
+
+    return InMemoryProductService
+
+
+def install_stand_ins(graph: InMemoryGraph, catalog: Dict[str, dict]):
+    async def get_graph():
+        return graph
+
+    look_generator.get_compatibility_graph = get_graph
+    look_generator.ProductService = make_product_service(catalog)
+
+
+# ============================================================
+# MEASUREMENT
+# ============================================================
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def summarize(values: List[float], digits: int = 3) -> dict:
+    return {
+        "p50": round(percentile(values, 50), digits),
+        "p99": round(percentile(values, 99), digits),
+        "mean": round(statistics.fmean(values), digits),
+        "max": round(max(values), digits),
+    }
+
+
+async def measure_latency(bases: List[str], num_looks: int, repeats: int) -> Tuple[List[float], List[int]]:
+    generator = look_generator.get_look_generator()
+    latencies, looks_returned = [], []
+    for _ in range(repeats):
+        for base_sku in bases:
+            start = time.perf_counter()
+            _, looks = await generator.generate_looks(base_sku, num_looks=num_looks)
+            latencies.append((time.perf_counter() - start) * 1000)
+            looks_returned.append(len(looks))
+    return latencies, looks_returned
+
+
+async def measure_memory(bases: List[str], num_looks: int) -> Tuple[List[float], List[float]]:
+    """Per-call peak and retained allocations, in KB (separate pass: tracemalloc is slow)."""
+    generator = look_generator.get_look_generator()
+    peaks, retained = [], []
+    tracemalloc.start()
+    try:
+        for base_sku in bases:
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            await generator.generate_looks(base_sku, num_looks=num_looks)
+            after, peak = tracemalloc.get_traced_memory()
+            peaks.append((peak - before) / 1024)
+            retained.append((after - before) / 1024)
+    finally:
+        tracemalloc.stop()
+    return peaks, retained
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ============================================================
+# BENCHMARK
+# ============================================================
+
+def run_size(seed: List[dict], size: int, args) -> List[dict]:
+    rng = random.Random(f"{args.seed}:{size}")
+
+    start = time.perf_counter()
+    catalog = generate_catalog(seed, size, rng)
+    catalog_seconds = time.perf_counter() - start
+
+    graph = InMemoryGraph(catalog, rng, pool_sample=args.pool_sample)
+    bases = rng.sample(sorted(catalog), min(args.bases, size))
+
+    start = time.perf_counter()
+    for base_sku in bases:
+        graph.prepare(base_sku, CANDIDATES_PER_SLOT)
+    graph_seconds = time.perf_counter() - start
+
+    install_stand_ins(graph, catalog)
+    print(f"  {size:,} products: catalog {catalog_seconds:.1f}s, graph for {len(bases)} bases {graph_seconds:.1f}s")
+
+    results = []
+    loop = asyncio.new_event_loop()
+    try:
+        for num_looks in args.num_looks:
+            # Warm-up pass (lru caches, first-call costs)
+            loop.run_until_complete(measure_latency(bases[:args.warmup], num_looks, 1))
+            latencies, looks_returned = loop.run_until_complete(
+                measure_latency(bases, num_looks, args.repeats)
+            )
+            peaks, retained = loop.run_until_complete(measure_memory(bases, num_looks))
+
+            result = {
+                "catalog_size": size,
+                "num_looks": num_looks,
+                "calls": len(latencies),
+                "latency_ms": summarize(latencies),
+                "alloc_peak_kb": summarize(peaks, 1),
+                "alloc_retained_kb": summarize(retained, 1),
+                "looks_returned_mean": round(statistics.fmean(looks_returned), 2),
+            }
+            results.append(result)
+            print(
+                f"    num_looks={num_looks:>2}: p50 {result['latency_ms']['p50']:.2f} ms, "
+                f"p99 {result['latency_ms']['p99']:.2f} ms, "
+                f"peak alloc p50 {result['alloc_peak_kb']['p50']:.0f} KB"
+            )
+    finally:
+        loop.close()
+
+    return results
+
+
+def compare(current: dict, previous: dict):
+    """Print p50/p99 latency and peak allocation changes against a previous run."""
+    old = {(r["catalog_size"], r["num_looks"]): r for r in previous["results"]}
+    print(f"\nCompared with {previous['meta'].get('git_revision') or 'previous run'}:")
+    for r in current["results"]:
+        prev = old.get((r["catalog_size"], r["num_looks"]))
+        if prev is None:
+            continue
+        changes = []
+        for metric, key in (("latency_ms", "p50"), ("latency_ms", "p99"), ("alloc_peak_kb", "p50")):
+            before, after = prev[metric][key], r[metric][key]
+            pct = (after - before) / before * 100 if before else 0.0
+            changes.append(f"{metric}.{key} {before} -> {after} ({pct:+.1f}%)")
+        print(f"  {r['catalog_size']:>7,} x {r['num_looks']:>2}: " + ", ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LookGeneratorService.generate_looks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Catalog sizes")
+    parser.add_argument("--num-looks", type=int, nargs="+", default=DEFAULT_NUM_LOOKS, help="num_looks values")
+    parser.add_argument("--bases", type=int, default=50, help="Base products per catalog size")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed passes over the bases")
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed calls before each run")
+    parser.add_argument("--pool-sample", type=int, default=1000,
+                        help="Products per slot each base is scored against")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--output", default="benchmark_look_generator.json", help="Results JSON path")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("LOOK GENERATION BENCHMARK")
+    print("=" * 60)
+
+    seed = load_seed(SEED_PATH)
+    print(f"Seed catalog: {len(seed)} products")
+
+    results = []
+    for size in args.sizes:
+        results.extend(run_size(seed, size, args))
+
+    output = {
+        "meta": {
+            "git_revision": git_revision(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "bases": args.bases,
+            "repeats": args.repeats,
+            "pool_sample": args.pool_sample,
+            "candidates_per_slot": CANDIDATES_PER_SLOT,
+            "peak_rss_mb": peak_rss_mb(),
+        },
+        "results": results,
+    }
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2, sort_keys=True)
+    print(f"\nResults saved to: {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(output, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,56 @@
 """
 Build Scored Compatibility Graph
 Outputs: compatibility_graph_scored.json
+
+Usage:
+    python build_scored_graph.py            # Score every compatible pair (O(n^2))
+    python build_scored_graph.py --ann      # Score ANN candidates only (O(n*k))
+    python build_scored_graph.py --stream   # Bounded memory (with or without --ann)
+
+With --ann, each product's attributes are embedded into a vector (see
+embed_products) and an IVF index per slot retrieves each product's
+approximate top --ann-k candidates in every slot. Only those pairs go
+through the hard filters and exact scoring.
+
+With --stream, scored edges are never held all at once: they are sorted
+in runs of STREAM_RUN_EDGES into temporary files, then merged product by
+product straight into the output (see build_scored_graph_streaming).
+The graph is the same as the in-memory build; metadata comes last in the
+file because it is only known at the end.
 """
 
+import argparse
+import heapq
 import json
-from typing import Dict, List, Set, Any, Tuple
+import tempfile
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+from typing import Dict, Iterator, List, Set, Any, TextIO, Tuple
 from collections import defaultdict
 import time
 
+import numpy as np
+
 # ============================================================
 # CONFIGURATION
 # ============================================================
 
+# ANN candidate generation defaults
+ANN_K = 50              # Candidates kept per product and slot
+ANN_OVERSAMPLE = 2      # Retrieved per kept candidate, to make up for hard filter rejects
+ANN_PROBE = 8           # IVF lists searched per query
+ANN_ITERATIONS = 10     # k-means iterations when building an IVF index
+ANN_QUERY_BLOCK = 4096  # Queries scored against the centroids at once
+
+# Exact pairing
+PAIR_ROW_BLOCK = 1024   # Products whose pairs are collected and ordered at a time
+PAIR_CELLS = 1 << 22    # Product pairs tested at once
+
+# Streaming build
+STREAM_RUN_EDGES = 1 << 20   # Edges sorted in memory per temporary run
+STREAM_MIN_READ = 1 << 10    # Smallest read from each run while merging
+
 WEIGHTS = {
     "color_harmony": 0.25,
     "style_similarity": 0.25,
@@ -308,14 +347,325 @@ def is_compatible(product_a: dict, product_b: dict) -> bool:
 
     return True
 
+# ============================================================
+# ANN CANDIDATE GENERATION
+# ============================================================
+
+def _table_block(products: List[dict], key, pair_value) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact (queries, docs) block for a pair function of one categorical key.
+
+    Docs are one-hot over the key's values; the query of a product holds
+    pair_value(product, b) for a representative b of each value, so
+    query . doc equals pair_value for every pair.
+    """
+    classes = [key(p["visual_features"]) for p in products]
+    representatives = {}
+    for product, value in zip(products, classes):
+        representatives.setdefault(value, product)
+    values = list(representatives)
+    index = {value: i for i, value in enumerate(values)}
+
+    table = np.array([
+        [pair_value(representatives[a], representatives[b]) for b in values] for a in values
+    ], dtype=np.float32)
+    rows = np.array([index[value] for value in classes])
+    docs = np.zeros((len(products), len(values)), dtype=np.float32)
+    docs[np.arange(len(products)), rows] = 1.0
+    return table[rows], docs
+
+
+def _overlap_block(values: List[set]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (queries, docs) block approximating the |A & B| / max(|A|, |B|) overlap
+    scores by cosine similarity, with their 0.5 when either set is empty.
+    """
+    vocab = {v: i for i, v in enumerate(sorted(set().union(*values), key=str))}
+    n = len(values)
+    hot = np.zeros((n, len(vocab)), dtype=np.float32)
+    for row, items in enumerate(values):
+        for item in items:
+            hot[row, vocab[item]] = 1.0
+    sizes = hot.sum(axis=1, keepdims=True)
+    hot /= np.sqrt(np.maximum(sizes, 1.0))
+    empty = (sizes == 0).astype(np.float32)
+
+    # Docs: [unit multi-hot, empty, 1]; an empty query set scores 0.5 on the constant
+    docs = np.hstack([hot, empty, np.ones((n, 1), dtype=np.float32)])
+    queries = np.hstack([hot, 0.5 * (1 - empty), 0.5 * empty])
+    return queries, docs
+
+
+def _color_class(vf: dict):
+    """What compute_color_harmony looks at: missing, neutral or the color family."""
+    color = vf.get("primary_color", "")
+    if not color:
+        return ("missing",)
+    if is_neutral(color):
+        return ("neutral",)
+    return ("family", get_color_family(color))
+
+
+def embed_products(products: List[dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Query and document vectors per product, for inner-product candidate
+    retrieval: query(a) . doc(b) approximates compute_pair_score(a, b).
+
+    Color harmony, formality alignment and statement balance depend on one
+    categorical attribute each, so their blocks are exact score tables.
+    Style/aesthetics, occasion and season overlaps are cosine similarities
+    of multi-hots. Pairs the gender or formality filters reject get a -1
+    penalty, so retrieval skips them. Blocks are weighted by WEIGHTS; the
+    slot is not embedded, since every slot gets its own index.
+    """
+    def values(key: str) -> List[set]:
+        return [set(p["visual_features"].get(key, [])) for p in products]
+
+    def formality(a: dict, b: dict) -> float:
+        vf_a, vf_b = a["visual_features"], b["visual_features"]
+        score = WEIGHTS["formality_alignment"] * compute_formality_alignment(a, b)
+        if passes_formality_filter(vf_a.get("formality_score", 1), vf_b.get("formality_score", 1)):
+            return score
+        return score - 1.0
+
+    def gender(a: dict, b: dict) -> float:
+        vf_a, vf_b = a["visual_features"], b["visual_features"]
+        return 0.0 if passes_gender_filter(vf_a.get("gender", "Unisex"), vf_b.get("gender", "Unisex")) else -1.0
+
+    def weighted(block, weight):
+        queries, docs = block
+        return queries * np.float32(weight), docs
+
+    styles = [a | b for a, b in zip(values("style"), values("fashion_aesthetics"))]
+    blocks = [
+        weighted(_table_block(products, _color_class, compute_color_harmony), WEIGHTS["color_harmony"]),
+        weighted(_overlap_block(styles), WEIGHTS["style_similarity"]),
+        _table_block(products, lambda vf: vf.get("formality_score", 1), formality),
+        weighted(
+            _table_block(products, lambda vf: bool(vf.get("statement_piece", False)), compute_statement_balance),
+            WEIGHTS["statement_balance"],
+        ),
+        weighted(_overlap_block(values("occasion")), WEIGHTS["occasion_overlap"]),
+        weighted(_overlap_block(values("season")), WEIGHTS["season_fit"]),
+        _table_block(products, lambda vf: vf.get("gender", "Unisex"), gender),
+    ]
+    return np.hstack([q for q, _ in blocks]), np.hstack([d for _, d in blocks])
+
+
+class IVFIndex:
+    """
+    Inverted-file index over document vectors, searched by inner product.
+
+    k-means splits the vectors into about sqrt(n) lists; a query scores
+    the centroids, then only the members of its n_probe best lists.
+    """
+
+    def __init__(self, vectors: np.ndarray, n_lists: int = None, seed: int = 0):
+        n = len(vectors)
+        n_lists = max(1, min(n, n_lists or int(np.sqrt(n))))
+        rng = np.random.default_rng(seed)
+
+        centroids = vectors[rng.choice(n, n_lists, replace=False)]
+        for _ in range(ANN_ITERATIONS):
+            assign = self._nearest(vectors, centroids)
+            counts = np.bincount(assign, minlength=n_lists)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, vectors)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+        assign = self._nearest(vectors, centroids)
+
+        self.vectors = vectors
+        self.centroids = centroids
+        self.order = np.argsort(assign, kind="stable")
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=n_lists))])
+
+    @staticmethod
+    def _nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        # argmin of squared L2 distance, without the constant |v|^2 term
+        return np.argmin((centroids ** 2).sum(axis=1) - 2 * vectors @ centroids.T, axis=1)
+
+    def search(self, queries: np.ndarray, k: int, n_probe: int = ANN_PROBE) -> Iterator[np.ndarray]:
+        """Yield the (approximate) top-k rows per query, best first."""
+        n_probe = min(n_probe, len(self.centroids))
+        for start in range(0, len(queries), ANN_QUERY_BLOCK):
+            block = queries[start:start + ANN_QUERY_BLOCK]
+            centroid_scores = block @ self.centroids.T
+            probes = np.argpartition(-centroid_scores, n_probe - 1, axis=1)[:, :n_probe]
+            for query, lists in zip(block, probes):
+                members = np.concatenate([
+                    self.order[self.offsets[i]:self.offsets[i + 1]] for i in lists
+                ])
+                scores = self.vectors[members] @ query
+                if len(members) > k:
+                    top = np.argpartition(-scores, k - 1)[:k]
+                    members, scores = members[top], scores[top]
+                yield members[np.argsort(-scores, kind="stable")]
+
+
+def iter_ann_pairs(
+    products: List[dict],
+    k: int = ANN_K,
+    n_probe: int = ANN_PROBE,
+    unique: bool = True,
+) -> Iterator[Tuple[str, str]]:
+    """
+    Compatible pairs among each product's approximate top-k candidates per
+    slot. About n * slots * k pairs instead of n^2.
+
+    A pair can be found from both of its products; unique drops repeats,
+    which takes memory per pair. The streaming builder drops them while
+    merging instead.
+    """
+    skus = [p["sku_id"] for p in products]
+    slots = np.array([p["visual_features"].get("functional_slot", "Accessory") for p in products])
+
+    print("  Embedding products...")
+    query_vectors, doc_vectors = embed_products(products)
+    print(f"  {doc_vectors.shape[1]} dimensions")
+
+    seen: Set[Tuple[int, int]] = set()
+    for target_slot in sorted(set(slots.tolist())):
+        members = np.flatnonzero(slots == target_slot)
+        index = IVFIndex(doc_vectors[members])
+        print(f"  {target_slot}: {len(members):,} products in {len(index.centroids)} lists")
+
+        queries = np.array([
+            i for i, slot in enumerate(slots.tolist()) if passes_slot_filter(slot, target_slot)
+        ], dtype=np.intp)
+        results = index.search(query_vectors[queries], k * ANN_OVERSAMPLE, n_probe)
+        for i, candidates in zip(queries.tolist(), results):
+            kept = 0
+            for j in members[candidates].tolist():
+                if kept == k:
+                    break
+                if j == i or not is_compatible(products[i], products[j]):
+                    continue
+                kept += 1
+                pair = (i, j) if i < j else (j, i)
+                if not unique:
+                    yield skus[pair[0]], skus[pair[1]]
+                elif pair not in seen:
+                    seen.add(pair)
+                    yield skus[pair[0]], skus[pair[1]]
+
+
 # ============================================================
 # GRAPH BUILDER
 # ============================================================
 
-def build_scored_graph(products: List[dict]) -> Tuple[dict, dict]:
+def _bitmasks(values: list) -> np.ndarray:
+    """One bit per distinct element (as has_overlap sees them), in uint64 words."""
+    sets = [set(v) for v in values]
+    vocab = {v: i for i, v in enumerate(sorted(set().union(*sets), key=repr))}
+    masks = np.zeros((len(values), max(1, (len(vocab) + 63) // 64)), dtype=np.uint64)
+    for row, items in enumerate(sets):
+        for item in items:
+            bit = vocab[item]
+            masks[row, bit // 64] |= np.uint64(1 << (bit % 64))
+    return masks
+
+
+def _overlaps(masks_a: np.ndarray, masks_b: np.ndarray) -> np.ndarray:
+    """Rows of masks_a by rows of masks_b: whether they share a bit."""
+    return (masks_a[:, None, :] & masks_b[None, :, :]).any(axis=2)
+
+
+def iter_compatible_pairs(products: List[dict]) -> Iterator[Tuple[str, str]]:
+    """
+    Every compatible pair, each once, in product order.
+
+    Products are blocked by (slot, gender, formality score), everything the
+    slot, gender and formality filters look at, so those filters run once
+    per block pair and incompatible block pairs are never visited. Within
+    the remaining block pairs the occasion and season filters are bitmask
+    ANDs. Pairs are collected PAIR_ROW_BLOCK first products at a time, so
+    memory stays bounded; they come out in the same order as checking
+    every pair with is_compatible.
+    """
+    skus = [p["sku_id"] for p in products]
+    vfs = [p.get("visual_features", {}) for p in products]
+
+    keys = [
+        (vf.get("functional_slot", "Accessory"), vf.get("gender", "Unisex"), vf.get("formality_score", 1))
+        for vf in vfs
+    ]
+    blocks: Dict[tuple, List[int]] = defaultdict(list)
+    for i, key in enumerate(keys):
+        blocks[key].append(i)
+    block_keys = list(blocks)
+    members = [np.array(blocks[key], dtype=np.intp) for key in block_keys]
+
+    compatible = [
+        [
+            y for y, (slot_b, gender_b, formality_b) in enumerate(block_keys)
+            if passes_slot_filter(slot_a, slot_b)
+            and passes_gender_filter(gender_a, gender_b)
+            and passes_formality_filter(formality_a, formality_b)
+        ]
+        for slot_a, gender_a, formality_a in block_keys
+    ]
+
+    occasions = [vf.get("occasion", []) for vf in vfs]
+    occasion_masks = _bitmasks(occasions)
+    season_masks = _bitmasks([vf.get("season", []) for vf in vfs])
+    everyday = np.array(["Everyday" in occasion for occasion in occasions])
+    bypass_slots = {"Accessory", "Secondary Bottom"}
+
+    total_pairs = len(skus) * (len(skus) - 1) // 2
+    visited = sum(
+        len(members[x]) * (len(members[x]) - 1) // 2 if x == y else len(members[x]) * len(members[y])
+        for x in range(len(block_keys)) for y in compatible[x] if y >= x
+    )
+    print(f"Processing {visited:,} of {total_pairs:,} product pairs "
+          f"({len(block_keys)} blocks by slot, gender and formality)...")
+
+    for lo in range(0, len(skus), PAIR_ROW_BLOCK):
+        hi = lo + PAIR_ROW_BLOCK
+        if lo % (PAIR_ROW_BLOCK * 10) == 0:
+            print(f"  Progress: {lo}/{len(skus)} products...")
+
+        firsts, seconds = [], []
+        for x, block in enumerate(members):
+            rows = block[np.searchsorted(block, lo):np.searchsorted(block, hi)]
+            if not len(rows):
+                continue
+            for y in compatible[x]:
+                # Only partners after the row's product, so every pair is found once
+                cols = members[y][np.searchsorted(members[y], rows[0], side="right"):]
+                bypass = block_keys[x][0] in bypass_slots or block_keys[y][0] in bypass_slots
+                step = max(1, PAIR_CELLS // len(rows))
+                for start in range(0, len(cols), step):
+                    chunk = cols[start:start + step]
+                    ok = chunk[None, :] > rows[:, None]
+                    if not bypass:
+                        ok &= _overlaps(season_masks[rows], season_masks[chunk])
+                        ok &= (
+                            everyday[rows][:, None] | everyday[chunk][None, :]
+                            | _overlaps(occasion_masks[rows], occasion_masks[chunk])
+                        )
+                    r, c = np.nonzero(ok)
+                    firsts.append(rows[r])
+                    seconds.append(chunk[c])
+
+        if not firsts:
+            continue
+        firsts = np.concatenate(firsts)
+        seconds = np.concatenate(seconds)
+        for i in np.lexsort((seconds, firsts)).tolist():
+            yield skus[firsts[i]], skus[seconds[i]]
+
+
+def build_scored_graph(
+    products: List[dict],
+    pairs: Iterator[Tuple[str, str]] = None,
+) -> Tuple[dict, dict]:
     """
     Build slot-aware scored compatibility graph.
 
+    pairs are the compatible pairs to score (default: all of them, see
+    iter_compatible_pairs; iter_ann_pairs for candidates only).
+
     Returns:
         graph: {sku: {slot: [{sku, score}, ...]}}
         stats: Statistics about the graph
@@ -323,6 +673,9 @@ def build_scored_graph(products: List[dict]) -> Tuple[dict, dict]:
     sku_to_product = {p["sku_id"]: p for p in products}
     skus = list(sku_to_product.keys())
 
+    if pairs is None:
+        pairs = iter_compatible_pairs(products)
+
     # Initialize graph
     graph = {sku: defaultdict(list) for sku in skus}
 
@@ -333,48 +686,39 @@ def build_scored_graph(products: List[dict]) -> Tuple[dict, dict]:
         "0.6-0.7": 0, "0.5-0.6": 0, "0.0-0.5": 0
     }
 
-    total_pairs = len(skus) * (len(skus) - 1) // 2
     compatible_count = 0
 
-    print(f"Processing {total_pairs:,} product pairs...")
-
-    for i, sku_a in enumerate(skus):
-        if i % 100 == 0:
-            print(f"  Progress: {i}/{len(skus)} products...")
-
+    for sku_a, sku_b in pairs:
         product_a = sku_to_product[sku_a]
-
-        for sku_b in skus[i+1:]:
-            product_b = sku_to_product[sku_b]
-
-            if is_compatible(product_a, product_b):
-                compatible_count += 1
-
-                # Compute score
-                score = compute_pair_score(product_a, product_b)
-                all_scores.append(score)
-
-                # Track distribution
-                if score >= 0.9:
-                    score_buckets["0.9-1.0"] += 1
-                elif score >= 0.8:
-                    score_buckets["0.8-0.9"] += 1
-                elif score >= 0.7:
-                    score_buckets["0.7-0.8"] += 1
-                elif score >= 0.6:
-                    score_buckets["0.6-0.7"] += 1
-                elif score >= 0.5:
-                    score_buckets["0.5-0.6"] += 1
-                else:
-                    score_buckets["0.0-0.5"] += 1
-
-                # Get slots
-                slot_a = product_a["visual_features"].get("functional_slot", "Accessory")
-                slot_b = product_b["visual_features"].get("functional_slot", "Accessory")
-
-                # Add bidirectional edges (grouped by target's slot)
-                graph[sku_a][slot_b].append({"sku": sku_b, "score": score})
-                graph[sku_b][slot_a].append({"sku": sku_a, "score": score})
+        product_b = sku_to_product[sku_b]
+
+        compatible_count += 1
+
+        # Compute score
+        score = compute_pair_score(product_a, product_b)
+        all_scores.append(score)
+
+        # Track distribution
+        if score >= 0.9:
+            score_buckets["0.9-1.0"] += 1
+        elif score >= 0.8:
+            score_buckets["0.8-0.9"] += 1
+        elif score >= 0.7:
+            score_buckets["0.7-0.8"] += 1
+        elif score >= 0.6:
+            score_buckets["0.6-0.7"] += 1
+        elif score >= 0.5:
+            score_buckets["0.5-0.6"] += 1
+        else:
+            score_buckets["0.0-0.5"] += 1
+
+        # Get slots
+        slot_a = product_a["visual_features"].get("functional_slot", "Accessory")
+        slot_b = product_b["visual_features"].get("functional_slot", "Accessory")
+
+        # Add bidirectional edges (grouped by target's slot)
+        graph[sku_a][slot_b].append({"sku": sku_b, "score": score})
+        graph[sku_b][slot_a].append({"sku": sku_a, "score": score})
 
     # Sort each slot's list by score descending
     print("  Sorting by score...")
@@ -423,7 +767,205 @@ def build_scored_graph(products: List[dict]) -> Tuple[dict, dict]:
     return graph, stats
 
 
+# ============================================================
+# STREAMING BUILDER
+# ============================================================
+
+# One directed edge in a run, fields in merge order: by source product,
+# target slot, score descending, then pair order (the in-memory build's
+# stable sort), so merged runs come out exactly as the graph lists them
+RUN_EDGE = np.dtype([
+    ("src", "<i4"), ("slot", "<i2"), ("neg_score", "<f8"), ("seq", "<i8"), ("dst", "<i4"),
+])
+
+
+class StreamingStats:
+    """
+    The build_scored_graph statistics from one pass over the merged graph.
+
+    Pair scores go into a histogram of thousandths (scores have 3
+    decimals), so memory does not grow with the edge count; per-product
+    figures are folded into running sums in graph order.
+    """
+
+    def __init__(self):
+        self.histogram = np.zeros(1001, dtype=np.int64)
+        self.top5_sum = 0.0
+        self.top5_count = 0
+        # "<source> -> <target>": [score sum, edge count]
+        self.slot_scores: Dict[str, list] = {}
+
+    def add_product(self, source_slot: str, slots: Dict[str, List[dict]]):
+        product_top5 = []
+        for target_slot, items in slots.items():
+            product_top5.extend([item["score"] for item in items[:5]])
+            totals = self.slot_scores.setdefault(f"{source_slot} -> {target_slot}", [0.0, 0])
+            for item in items:
+                totals[0] += item["score"]
+            totals[1] += len(items)
+        if product_top5:
+            self.top5_sum += sum(sorted(product_top5, reverse=True)[:5]) / min(5, len(product_top5))
+            self.top5_count += 1
+
+    def add_pair_scores(self, scores: List[float]):
+        thousandths = np.minimum(np.rint(np.array(scores) * 1000).astype(np.int64), 1000)
+        self.histogram += np.bincount(thousandths, minlength=1001)
+
+    def stats(self, total_products: int) -> dict:
+        total = int(self.histogram.sum())
+        cumulative = np.concatenate([[0], np.cumsum(self.histogram)])
+
+        def count(low: int, high: int = 1001) -> int:
+            """Scores of low/1000 up to (not including) high/1000."""
+            return int(cumulative[high] - cumulative[low])
+
+        score_buckets = {
+            "0.9-1.0": count(900), "0.8-0.9": count(800, 900), "0.7-0.8": count(700, 800),
+            "0.6-0.7": count(600, 700), "0.5-0.6": count(500, 600), "0.0-0.5": count(0, 500),
+        }
+        score_sum = int(np.dot(np.arange(1001), self.histogram)) / 1000
+        slot_averages = {k: round(v[0] / v[1], 3) for k, v in self.slot_scores.items() if v[1]}
+
+        return {
+            "total_products": total_products,
+            "total_edges": total,
+            "avg_score": round(score_sum / total if total else 0, 3),
+            "avg_top5_score": round(self.top5_sum / self.top5_count if self.top5_count else 0, 3),
+            "high_score_pct": round(count(700) / total * 100 if total else 0, 1),
+            "score_distribution": score_buckets,
+            "slot_averages": dict(sorted(slot_averages.items(), key=lambda x: x[1], reverse=True)[:20])
+        }
+
+
+def _write_runs(products: List[dict], pairs: Iterator[Tuple[str, str]], run_dir: Path) -> Tuple[List[Path], List[str]]:
+    """Score pairs into sorted runs of directed edges; returns the run files and slot names."""
+    index = {p["sku_id"]: i for i, p in enumerate(products)}
+    slot_codes: Dict[str, int] = {}
+    runs = []
+    buffer = np.empty(STREAM_RUN_EDGES, dtype=RUN_EDGE)
+    filled = 0
+
+    def flush():
+        run = buffer[:filled]
+        run = run[np.lexsort((run["seq"], run["neg_score"], run["slot"], run["src"]))]
+        path = run_dir / f"run-{len(runs):05d}.npy"
+        np.save(path, run)
+        runs.append(path)
+
+    for seq, (sku_a, sku_b) in enumerate(pairs):
+        i, j = index[sku_a], index[sku_b]
+        product_a, product_b = products[i], products[j]
+        score = compute_pair_score(product_a, product_b)
+
+        slot_a = product_a["visual_features"].get("functional_slot", "Accessory")
+        slot_b = product_b["visual_features"].get("functional_slot", "Accessory")
+        code_a = slot_codes.setdefault(slot_a, len(slot_codes))
+        code_b = slot_codes.setdefault(slot_b, len(slot_codes))
+
+        if filled + 2 > STREAM_RUN_EDGES:
+            flush()
+            filled = 0
+        buffer[filled] = (i, code_b, -score, seq, j)
+        buffer[filled + 1] = (j, code_a, -score, seq, i)
+        filled += 2
+
+        if seq % 1000000 == 0 and seq:
+            print(f"  {seq:,} pairs scored, {len(runs)} runs...")
+
+    if filled:
+        flush()
+    return runs, list(slot_codes)
+
+
+def _read_run(path: Path, chunk: int) -> Iterator[tuple]:
+    run = np.load(path, mmap_mode="r")
+    for start in range(0, len(run), chunk):
+        yield from np.array(run[start:start + chunk]).tolist()
+
+
+def build_scored_graph_streaming(
+    products: List[dict],
+    f: TextIO,
+    pairs: Iterator[Tuple[str, str]] = None,
+    metadata: dict = None,
+) -> dict:
+    """
+    build_scored_graph, writing {"graph": ..., "metadata": ...} JSON to f.
+
+    Scored edges are sorted in runs of STREAM_RUN_EDGES into temporary
+    files, then heapq-merged back into per-product lists in product order
+    and written one product at a time. Repeated pairs (iter_ann_pairs with
+    unique=False) are dropped while merging. Peak memory is one run plus
+    one product's edges, whatever the edge count (plus the product list
+    and the pair iterator's own state).
+
+    metadata is added to the statistics, with build_time_seconds covering
+    everything but writing the metadata itself. Returns the statistics.
+    """
+    start_time = time.time()
+    if pairs is None:
+        pairs = iter_compatible_pairs(products)
+
+    skus = [p["sku_id"] for p in products]
+    stats = StreamingStats()
+
+    with tempfile.TemporaryDirectory(prefix="scored-graph-runs-") as run_dir:
+        runs, slot_names = _write_runs(products, pairs, Path(run_dir))
+        print(f"  Merging {len(runs)} sorted runs...")
+
+        # Read buffers add up to about one run
+        chunk = max(STREAM_MIN_READ, STREAM_RUN_EDGES // max(len(runs), 1))
+        merged = groupby(heapq.merge(*[_read_run(path, chunk) for path in runs]), key=itemgetter(0))
+        next_product = next(merged, None)
+
+        f.write('{"graph": {')
+        for i, sku in enumerate(skus):
+            slots: Dict[str, List[dict]] = {}
+            if next_product is not None and next_product[0] == i:
+                first_seq = {}
+                seen = set()
+                pair_scores = []
+                for _, slot, neg_score, seq, dst in next_product[1]:
+                    if (slot, dst) in seen:
+                        continue
+                    seen.add((slot, dst))
+                    first_seq[slot] = min(seq, first_seq.get(slot, seq))
+                    slots.setdefault(slot, []).append({"sku": skus[dst], "score": -neg_score})
+                    if i < dst:
+                        pair_scores.append(-neg_score)
+                stats.add_pair_scores(pair_scores)
+                # Slots in the order their first edge was added, as in the in-memory graph
+                slots = {slot_names[s]: slots[s] for s in sorted(slots, key=first_seq.get)}
+                next_product = next(merged, None)
+
+            stats.add_product(products[i]["visual_features"].get("functional_slot", "Accessory"), slots)
+            if i:
+                f.write(", ")
+            f.write(json.dumps(sku))
+            f.write(": ")
+            f.write(json.dumps(slots))
+
+    result = stats.stats(len(products))
+    f.write('}, "metadata": ')
+    json.dump({
+        **result,
+        "build_time_seconds": round(time.time() - start_time, 2),
+        **(metadata or {}),
+    }, f)
+    f.write("}")
+    return result
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Build the scored compatibility graph")
+    parser.add_argument("--ann", action="store_true", help="Score ANN candidates instead of all pairs")
+    parser.add_argument("--ann-k", type=int, default=ANN_K, help="Candidates per product and slot")
+    parser.add_argument("--ann-probe", type=int, default=ANN_PROBE, help="IVF lists searched per query")
+    parser.add_argument("--stream", action="store_true", help="Merge sorted runs from disk to bound memory")
+    args = parser.parse_args()
+
+    output_path = "D:/jobmaxing/compatibility_graph_scored.json"
+
     print("=" * 60)
     print("Building SCORED Compatibility Graph")
     print("=" * 60)
@@ -438,7 +980,22 @@ def main():
     # Build scored graph
     print("\n2. Building scored compatibility graph...")
     start_time = time.time()
-    graph, stats = build_scored_graph(products)
+    if args.ann:
+        print(f"   ANN candidates: top {args.ann_k} per slot, {args.ann_probe} lists probed")
+        # The streaming build drops repeats itself, without a set of every pair
+        pairs = iter_ann_pairs(products, k=args.ann_k, n_probe=args.ann_probe, unique=not args.stream)
+    else:
+        pairs = None
+    metadata = {
+        "weights": WEIGHTS,
+        **({"ann": {"k": args.ann_k, "n_probe": args.ann_probe}} if args.ann else {}),
+    }
+    if args.stream:
+        print(f"   Streaming to {output_path} (runs of {STREAM_RUN_EDGES:,} edges)")
+        with open(output_path, "w", encoding="utf-8") as f:
+            stats = build_scored_graph_streaming(products, f, pairs, metadata)
+    else:
+        graph, stats = build_scored_graph(products, pairs)
     elapsed = time.time() - start_time
 
     print(f"\n   Completed in {elapsed:.2f} seconds")
@@ -463,19 +1020,20 @@ def main():
 
     # Save graph
     print("\n4. Saving scored graph...")
-    output = {
-        "metadata": {
-            **stats,
-            "build_time_seconds": round(elapsed, 2),
-            "weights": WEIGHTS
-        },
-        "graph": graph
-    }
-
-    with open("D:/jobmaxing/compatibility_graph_scored.json", "w", encoding="utf-8") as f:
-        json.dump(output, f)
-
-    print("   Saved to: D:/jobmaxing/compatibility_graph_scored.json")
+    if not args.stream:
+        output = {
+            "metadata": {
+                **stats,
+                "build_time_seconds": round(elapsed, 2),
+                **metadata,
+            },
+            "graph": graph
+        }
+
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(output, f)
+
+    print(f"   Saved to: {output_path}")
 
     # Save stats separately
     with open("D:/jobmaxing/graph_stats_scored.json", "w", encoding="utf-8") as f:
@@ -1,67 +1,346 @@
+"""
+Product Image Downloader
+========================
+Downloads the featured image of every product in the export CSV.
+
+Features:
+- Thread pool with a pooled HTTP session per worker thread
+- Per-host concurrency limit, so one CDN is not hammered
+- Retries with exponential backoff (connection errors, 429 and 5xx,
+  honouring Retry-After)
+- JSONL manifest for resume: SKUs recorded as downloaded are skipped
+- Dedupe by SHA-256: identical images are stored once and hard-linked,
+  also when they are downloaded at the same time
+
+Usage:
+    python scripts/download_images.py
+    python scripts/download_images.py --workers 16 --per-host 4
+    python scripts/download_images.py --csv products.csv --out images --limit 100
+    python scripts/download_images.py --skip-failed
+"""
+
+import argparse
 import csv
-import requests
+import hashlib
+import json
 import os
+import random
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Optional
 from urllib.parse import urlparse
 
-# Create directory for images
-os.makedirs('downloaded_images', exist_ok=True)
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_CSV = "Sample Products - exported_products_by_popularity.csv"
+DEFAULT_OUT = "downloaded_images"
+IMAGE_EXTENSIONS = [".jpg", ".jpeg", ".png", ".gif", ".webp"]
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_BACKOFF_SECONDS = 30.0
+
+
+# -----------------------------------------------------------------------------
+# JOBS AND MANIFEST
+# -----------------------------------------------------------------------------
+
+@dataclass
+class Job:
+    sku: str
+    url: str
+
+
+def image_extension(url: str) -> str:
+    """File extension from the URL path (.jpg if missing or unknown)."""
+    ext = os.path.splitext(urlparse(url).path)[1].lower()
+    return ext if ext in IMAGE_EXTENSIONS else ".jpg"
+
+
+def read_jobs(csv_file: str) -> list[Job]:
+    """One job per CSV row with a featured image (first row wins per SKU)."""
+    jobs = []
+    seen = set()
+    with open(csv_file, "r", encoding="utf-8") as file:
+        for i, row in enumerate(csv.DictReader(file), start=1):
+            url = (row.get("featured_image") or "").strip()
+            sku = (row.get("sku_id") or "").strip() or f"image_{i}"
+            if url and sku not in seen:
+                seen.add(sku)
+                jobs.append(Job(sku=sku, url=url))
+    return jobs
+
+
+class Manifest:
+    """
+    Append-only JSONL record of download outcomes.
+
+    The last line per SKU wins, so a failed SKU that later succeeds is
+    recorded as downloaded.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: dict[str, dict] = {}
+        self._lock = threading.Lock()
 
-# Read CSV and download next 5 images (skip first 48)
-csv_file = 'Sample Products - exported_products_by_popularity.csv'
-downloaded_count = 0
-attempted_count = 0
-skip_count = 435  # Skip previous attempts
-max_images = 500  # Download all remaining
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Partial last line from an interrupted run
+                    self.entries[entry["sku"]] = entry
 
-print(f"Starting download of next {max_images} images (skipping first {skip_count})...")
+        self._file = open(path, "a", encoding="utf-8")
 
-with open(csv_file, 'r', encoding='utf-8') as file:
-    reader = csv.DictReader(file)
+    def done(self, sku: str, out_dir: str) -> bool:
+        entry = self.entries.get(sku)
+        return (
+            entry is not None
+            and entry["status"] == "ok"
+            and os.path.exists(os.path.join(out_dir, entry["file"]))
+        )
 
-    for row in reader:
-        attempted_count += 1
+    def failed(self, sku: str) -> bool:
+        entry = self.entries.get(sku)
+        return entry is not None and entry["status"] == "failed"
 
-        # Skip the first batch
-        if attempted_count <= skip_count:
-            continue
+    def hashes(self) -> dict[str, str]:
+        """sha256 -> file of every successful download."""
+        return {
+            e["sha256"]: e["file"]
+            for e in self.entries.values()
+            if e["status"] == "ok"
+        }
 
-        if downloaded_count >= max_images:
-            break
+    def record(self, entry: dict):
+        with self._lock:
+            self.entries[entry["sku"]] = entry
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
 
-        image_url = row.get('featured_image', '').strip()
+    def close(self):
+        self._file.close()
 
-        if image_url:
+
+# -----------------------------------------------------------------------------
+# DOWNLOADER
+# -----------------------------------------------------------------------------
+
+class Downloader:
+    """Concurrent, retrying, deduplicating image downloader."""
+
+    def __init__(
+        self,
+        out_dir: str,
+        manifest: Manifest,
+        workers: int = 8,
+        per_host: int = 4,
+        retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = 30.0,
+    ):
+        self.out_dir = out_dir
+        self.manifest = manifest
+        self.workers = workers
+        self.per_host = per_host
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        self._local = threading.local()
+        self._host_limits: dict[str, threading.Semaphore] = {}
+        self._lock = threading.Lock()
+        self._files_by_hash = manifest.hashes()
+        # sha256 -> set once the image being written with that hash is in place
+        self._writing: dict[str, threading.Event] = {}
+
+    def _session(self) -> requests.Session:
+        """Pooled session for the current worker thread."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.per_host, pool_maxsize=self.per_host)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._local.session = session
+        return session
+
+    def _host_limit(self, url: str) -> threading.Semaphore:
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.Semaphore(self.per_host)
+            return self._host_limits[host]
+
+    def _delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), MAX_BACKOFF_SECONDS)
+        delay = self.backoff * (2 ** attempt)
+        return min(delay + random.uniform(0, delay), MAX_BACKOFF_SECONDS)
+
+    def fetch(self, url: str) -> tuple[bytes, int]:
+        """GET url with retries; returns (content, attempts)."""
+        limit = self._host_limit(url)
+        for attempt in range(self.retries + 1):
+            response = None
             try:
-                # Get SKU for filename
-                sku = row.get('sku_id', f'image_{downloaded_count+1}')
+                with limit:
+                    response = self._session().get(url, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response.content, attempt + 1
+                error = requests.HTTPError(f"HTTP {response.status_code}", response=response)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+
+            if attempt == self.retries:
+                raise error
+            time.sleep(self._delay(attempt, response))
+
+    def _store(self, sku: str, url: str, content: bytes) -> dict:
+        """Write content for sku, hard-linking to an identical earlier image."""
+        digest = hashlib.sha256(content).hexdigest()
+        filename = f"{sku}{image_extension(url)}"
+        path = os.path.join(self.out_dir, filename)
+        tmp = f"{path}.part"
+
+        while True:
+            with self._lock:
+                writing = self._writing.get(digest)
+                if writing is None:
+                    existing = self._files_by_hash.get(digest)
+                    existing_path = os.path.join(self.out_dir, existing) if existing else None
+                    duplicate = existing_path is not None and existing_path != path and os.path.exists(existing_path)
+                    if not duplicate:
+                        writing = self._writing[digest] = threading.Event()
+                    break
+            # An identical image is being written: link to it once it's in place
+            writing.wait()
+
+        try:
+            if duplicate:
+                try:
+                    os.link(existing_path, tmp)
+                except OSError:
+                    shutil.copyfile(existing_path, tmp)
+                os.replace(tmp, path)
+            else:
+                with open(tmp, "wb") as f:
+                    f.write(content)
+                os.replace(tmp, path)
+                # Registered only once the file exists
+                with self._lock:
+                    self._files_by_hash[digest] = filename
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            if not duplicate:
+                # Waiters link to the file, or retry if this write failed
+                with self._lock:
+                    del self._writing[digest]
+                writing.set()
+
+        return {
+            "file": filename,
+            "sha256": digest,
+            "bytes": len(content),
+            "duplicate_of": existing if duplicate else None,
+        }
+
+    def download(self, job: Job) -> dict:
+        start = time.perf_counter()
+        entry = {"sku": job.sku, "url": job.url}
+        try:
+            content, attempts = self.fetch(job.url)
+            entry.update(status="ok", attempts=attempts, **self._store(job.sku, job.url, content))
+        except Exception as e:
+            entry.update(status="failed", error=str(e))
+        entry["seconds"] = round(time.perf_counter() - start, 3)
+        self.manifest.record(entry)
+        return entry
+
+    def run(self, jobs: list[Job]) -> dict:
+        """Download all jobs; returns outcome counts."""
+        counts = {"ok": 0, "duplicate": 0, "failed": 0}
+        total = len(jobs)
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="download") as pool:
+            futures = [pool.submit(self.download, job) for job in jobs]
+            for i, future in enumerate(as_completed(futures), start=1):
+                entry = future.result()
+                if entry["status"] == "ok":
+                    counts["ok"] += 1
+                    if entry["duplicate_of"]:
+                        counts["duplicate"] += 1
+                    print(f"[{i}/{total}] [OK] {entry['sku']} -> {entry['file']}"
+                          + (f" (same as {entry['duplicate_of']})" if entry["duplicate_of"] else ""))
+                else:
+                    counts["failed"] += 1
+                    print(f"[{i}/{total}] [ERROR] {entry['sku']}: {entry['error']}")
+        return counts
+
+
+# -----------------------------------------------------------------------------
+# MAIN
+# -----------------------------------------------------------------------------
 
-                # Parse URL to get file extension
-                parsed_url = urlparse(image_url)
-                path = parsed_url.path
-                ext = os.path.splitext(path)[1]
+def main():
+    parser = argparse.ArgumentParser(description="Download product images")
+    parser.add_argument("--csv", default=DEFAULT_CSV, help="Product export CSV")
+    parser.add_argument("--out", default=DEFAULT_OUT, help="Output directory")
+    parser.add_argument("--manifest", help="Manifest path (default: <out>/manifest.jsonl)")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent downloads")
+    parser.add_argument("--per-host", type=int, default=4, help="Concurrent downloads per host")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per image")
+    parser.add_argument("--backoff", type=float, default=0.5, help="Initial retry backoff (seconds)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Request timeout (seconds)")
+    parser.add_argument("--limit", type=int, help="Download at most this many images")
+    parser.add_argument("--skip-failed", action="store_true",
+                        help="Don't retry SKUs the manifest records as failed")
+    args = parser.parse_args()
 
-                # If no extension found, default to .jpg
-                if not ext or ext not in ['.jpg', '.jpeg', '.png', '.gif', '.webp']:
-                    ext = '.jpg'
+    os.makedirs(args.out, exist_ok=True)
+    manifest = Manifest(args.manifest or os.path.join(args.out, "manifest.jsonl"))
 
-                # Create filename
-                filename = f'downloaded_images/{sku}{ext}'
+    jobs = read_jobs(args.csv)
+    pending = [
+        job for job in jobs
+        if not manifest.done(job.sku, args.out)
+        and not (args.skip_failed and manifest.failed(job.sku))
+    ]
+    if args.limit is not None:
+        pending = pending[:args.limit]
 
-                # Download image
-                print(f"[{attempted_count}] Downloading {downloaded_count+1}/{max_images}: {sku}...")
-                response = requests.get(image_url, timeout=30)
-                response.raise_for_status()
+    print(f"{len(jobs)} products with images, {len(jobs) - len(pending)} skipped (manifest), "
+          f"{len(pending)} to download")
 
-                # Save image
-                with open(filename, 'wb') as img_file:
-                    img_file.write(response.content)
+    downloader = Downloader(
+        args.out,
+        manifest,
+        workers=args.workers,
+        per_host=args.per_host,
+        retries=args.retries,
+        backoff=args.backoff,
+        timeout=args.timeout,
+    )
+    start = time.time()
+    try:
+        counts = downloader.run(pending)
+    finally:
+        manifest.close()
 
-                print(f"  [OK] Saved as {filename}")
-                downloaded_count += 1
+    print(f"\nDownload complete in {time.time() - start:.1f}s: {counts['ok']} downloaded "
+          f"({counts['duplicate']} duplicates linked), {counts['failed']} failed.")
 
-            except Exception as e:
-                print(f"  [ERROR] Error downloading {image_url}: {str(e)}")
-                continue
 
-print(f"\nDownload complete! Successfully downloaded {downloaded_count} images to 'downloaded_images' folder.")
-print(f"Attempted {attempted_count} products to get {downloaded_count} successful downloads.")
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,30 @@
 """
 Product Metadata Ingestion Script
 =================================
-Loads product_metadata.json and inserts into Supabase PostgreSQL.
+Loads product_metadata.json and upserts it into Supabase PostgreSQL.
 
 Features:
-- Batch insert using execute_values
-- ON CONFLICT DO NOTHING for idempotency
+- Delta ingest: a content hash per normalized row is compared with the
+  hash stored at the last ingest, and only new or changed rows are sent
+- COPY into a temp staging table, then one INSERT ... ON CONFLICT DO UPDATE
+- Writes the changed SKUs (one per line) for downstream refreshes, e.g.
+  precompute_looks.py --skus-file
+- Bumps the "products" data version, so running APIs reload their catalog
 - Text normalization (lowercase, strip whitespace)
 - Safe type coercion
 - Detailed logging
+
+Usage:
+    python scripts/ingest_products.py
+    python scripts/ingest_products.py --json product_metadata.json --changed-out changed_skus.txt
+    python scripts/ingest_products.py --dry-run
+    python scripts/ingest_products.py --full    # Resend every row
 """
 
+import argparse
+import csv
+import hashlib
+import io
 import json
 import os
 import sys
@@ -30,6 +44,10 @@ try:
 except ImportError:
     pass  # dotenv not installed, use system env vars
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from app.services.data_version import DATA_VERSION_SQL
+
 # -----------------------------------------------------------------------------
 # LOGGING SETUP
 # -----------------------------------------------------------------------------
@@ -171,6 +189,12 @@ def extract_row(product: dict) -> tuple:
         normalize_list(vf.get("season")),
     )
 
+
+def row_hash(row: tuple) -> str:
+    """SHA-256 of a normalized row (stable across runs and Python versions)."""
+    encoded = json.dumps(row, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
 # -----------------------------------------------------------------------------
 # VALIDATION
 # -----------------------------------------------------------------------------
@@ -201,6 +225,33 @@ def validate_row(row: tuple, sku_id: str) -> Optional[str]:
 # DATABASE OPERATIONS
 # -----------------------------------------------------------------------------
 
+COLUMNS = [
+    "sku_id",
+    "image_url",
+    "title",
+    "brand",
+    "type",
+    "category",
+    "sub_category",
+    "primary_color",
+    "secondary_colors",
+    "pattern",
+    "material_appearance",
+    "fit",
+    "gender",
+    "design_elements",
+    "formality_level",
+    "versatility",
+    "statement_piece",
+    "functional_slot",
+    "style",
+    "fashion_aesthetics",
+    "occasion",
+    "formality_score",
+    "season",
+]
+
+
 def get_connection():
     """Create database connection."""
     log.info(f"Connecting to {DB_HOST}:{DB_PORT}/{DB_NAME}")
@@ -209,48 +260,124 @@ def get_connection():
         port=DB_PORT,
         database=DB_NAME,
         user=DB_USER,
-        password=DB_PASS
+        password=DB_PASS,
+        client_encoding="utf8"
     )
 
 
-def insert_batch(conn, rows: List[tuple]) -> int:
+def ensure_tables(conn):
+    """Create the content hash table and the data_version table and function if needed."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS product_content_hashes (
+                sku_id TEXT PRIMARY KEY REFERENCES products(sku_id) ON DELETE CASCADE,
+                content_hash TEXT NOT NULL,
+                ingested_at TIMESTAMPTZ DEFAULT NOW()
+            )
+        """)
+        cur.execute(DATA_VERSION_SQL)
+    conn.commit()
+
+
+def fetch_stored_hashes(conn, backfill: bool = True) -> dict:
+    """
+    sku_id -> content hash of every product in the database.
+
+    Products without a stored hash (ingested before hashes were kept) are
+    hashed from their current column values, so an unchanged catalog is not
+    resent on the first delta run. With backfill, those hashes are stored.
     """
-    Insert rows using execute_values with ON CONFLICT DO NOTHING.
-    Returns number of rows actually inserted.
+    with conn.cursor() as cur:
+        cur.execute("SELECT sku_id, content_hash FROM product_content_hashes")
+        hashes = dict(cur.fetchall())
+
+        cur.execute(f"""
+            SELECT {", ".join("p." + c for c in COLUMNS)}
+            FROM products p
+            LEFT JOIN product_content_hashes h ON h.sku_id = p.sku_id
+            WHERE h.sku_id IS NULL
+        """)
+        derived = [(row[0], row_hash(tuple(row))) for row in cur.fetchall()]
+        hashes.update(derived)
+
+        if backfill and derived:
+            execute_values(
+                cur,
+                "INSERT INTO product_content_hashes (sku_id, content_hash) VALUES %s",
+                derived,
+                page_size=1000,
+            )
+            log.info(f"Backfilled content hashes: {len(derived)}")
+    conn.commit()
+    return hashes
+
+
+def pg_array(values: List[str]) -> str:
+    """Postgres array literal for a list of strings."""
+    quoted = (
+        '"' + v.replace("\\", "\\\\").replace('"', '\\"') + '"'
+        for v in values
+    )
+    return "{" + ",".join(quoted) + "}"
+
+
+def copy_rows(cur, table: str, rows: List[tuple]):
+    """COPY rows (+ content hash as the last column) into table as CSV."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow([
+            pg_array(v) if isinstance(v, list) else v
+            for v in row
+        ])
+    buf.seek(0)
+    columns = ", ".join(COLUMNS + ["content_hash"])
+    cur.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)", buf)
+
+
+def upsert_rows(conn, rows: List[tuple]) -> tuple:
     """
-    sql = """
-        INSERT INTO products (
-            sku_id,
-            image_url,
-            title,
-            brand,
-            type,
-            category,
-            sub_category,
-            primary_color,
-            secondary_colors,
-            pattern,
-            material_appearance,
-            fit,
-            gender,
-            design_elements,
-            formality_level,
-            versatility,
-            statement_piece,
-            functional_slot,
-            style,
-            fashion_aesthetics,
-            occasion,
-            formality_score,
-            season
-        ) VALUES %s
-        ON CONFLICT (sku_id) DO NOTHING
+    Upsert rows (each with its content hash appended) via a staging table.
+
+    Returns (inserted SKUs, updated SKUs). Everything runs in one
+    transaction, so products and stored hashes never disagree; it also bumps
+    the "products" data version, so running APIs reload their catalog.
     """
+    assignments = ",\n                ".join(
+        f"{c} = EXCLUDED.{c}" for c in COLUMNS if c != "sku_id"
+    )
+    columns = ", ".join(COLUMNS)
     with conn.cursor() as cur:
-        execute_values(cur, sql, rows, page_size=100)
-        inserted = cur.rowcount
-        conn.commit()
-    return inserted
+        cur.execute("""
+            CREATE TEMP TABLE products_staging
+            (LIKE products INCLUDING DEFAULTS) ON COMMIT DROP
+        """)
+        cur.execute("ALTER TABLE products_staging ADD COLUMN content_hash TEXT")
+        copy_rows(cur, "products_staging", rows)
+
+        cur.execute(f"""
+            INSERT INTO products ({columns})
+            SELECT {columns} FROM products_staging
+            ON CONFLICT (sku_id) DO UPDATE SET
+                {assignments},
+                updated_at = NOW()
+            RETURNING sku_id, (xmax = 0) AS inserted
+        """)
+        results = cur.fetchall()
+
+        cur.execute("""
+            INSERT INTO product_content_hashes (sku_id, content_hash)
+            SELECT sku_id, content_hash FROM products_staging
+            ON CONFLICT (sku_id) DO UPDATE SET
+                content_hash = EXCLUDED.content_hash,
+                ingested_at = NOW()
+        """)
+        cur.execute("SELECT bump_data_version('products')")
+    conn.commit()
+
+    inserted = [sku for sku, is_new in results if is_new]
+    updated = [sku for sku, is_new in results if not is_new]
+    return inserted, updated
 
 # -----------------------------------------------------------------------------
 # MAIN INGESTION LOGIC
@@ -266,28 +393,50 @@ def load_json(filepath: str) -> List[dict]:
     return products
 
 
-def ingest(json_path: str):
-    """Main ingestion function."""
+def write_changed_skus(path: str, skus: List[str]):
+    """Write one SKU per line (an empty file when nothing changed)."""
+    with open(path, "w", encoding="utf-8") as f:
+        for sku in skus:
+            f.write(sku + "\n")
+    log.info(f"Changed SKUs written to: {path}")
+
+
+def ingest(
+    json_path: str,
+    changed_out: Optional[str] = None,
+    full: bool = False,
+    dry_run: bool = False,
+) -> List[str]:
+    """
+    Main ingestion function.
+
+    Returns the SKUs that were inserted or updated (or would be, with
+    dry_run), sorted.
+    """
     # Load data
     products = load_json(json_path)
     if not products:
         log.error("No products found in JSON file")
-        return
+        return []
 
     # Process rows
     valid_rows = []
     skipped = []
     failures = []
+    seen = set()
 
     for idx, product in enumerate(products):
         sku = product.get("sku_id", f"row_{idx}")
         try:
             row = extract_row(product)
             error = validate_row(row, sku)
+            if not error and row[0] in seen:
+                error = "duplicate sku_id in JSON"
             if error:
                 skipped.append((sku, error))
                 log.warning(f"Skipped {sku}: {error}")
             else:
+                seen.add(row[0])
                 valid_rows.append(row)
         except Exception as e:
             failures.append((sku, str(e)))
@@ -299,15 +448,29 @@ def ingest(json_path: str):
 
     if not valid_rows:
         log.error("No valid rows to insert")
-        return
+        return []
 
-    # Insert into database
+    # Diff against the database and upsert the delta
     conn = None
-    inserted = 0
+    inserted, updated = [], []
     try:
         conn = get_connection()
         log.info("Connected to database")
-        inserted = insert_batch(conn, valid_rows)
+        ensure_tables(conn)
+
+        stored = fetch_stored_hashes(conn, backfill=not dry_run)
+        delta = []
+        for row in valid_rows:
+            digest = row_hash(row)
+            if full or stored.get(row[0]) != digest:
+                delta.append(row + (digest,))
+        log.info(f"New or changed rows: {len(delta)}")
+
+        if dry_run:
+            inserted = [r[0] for r in delta if r[0] not in stored]
+            updated = [r[0] for r in delta if r[0] in stored]
+        elif delta:
+            inserted, updated = upsert_rows(conn, delta)
     except psycopg2.Error as e:
         log.error(f"Database error: {e}")
         if conn:
@@ -317,15 +480,19 @@ def ingest(json_path: str):
         if conn:
             conn.close()
 
+    changed = sorted(inserted + updated)
+    if changed_out:
+        write_changed_skus(changed_out, changed)
+
     # Final summary
-    duplicates = len(valid_rows) - inserted
     log.info("=" * 60)
-    log.info("INGESTION SUMMARY")
+    log.info("INGESTION SUMMARY" + (" (DRY RUN)" if dry_run else ""))
     log.info("=" * 60)
     log.info(f"  Records read from JSON:    {len(products)}")
     log.info(f"  Valid rows prepared:       {len(valid_rows)}")
-    log.info(f"  Rows inserted:             {inserted}")
-    log.info(f"  Duplicates skipped (DB):   {duplicates}")
+    log.info(f"  Rows inserted:             {len(inserted)}")
+    log.info(f"  Rows updated:              {len(updated)}")
+    log.info(f"  Unchanged (hash match):    {len(valid_rows) - len(changed)}")
     log.info(f"  Validation skipped:        {len(skipped)}")
     log.info(f"  Processing failures:       {len(failures)}")
     log.info("=" * 60)
@@ -344,15 +511,23 @@ def ingest(json_path: str):
         if len(failures) > 10:
             log.info(f"  ... and {len(failures) - 10} more")
 
+    return changed
 
-def main():
-    json_path = os.getenv("PRODUCT_JSON_PATH", "D:/jobmaxing/product_metadata.json")
 
-    if not os.path.exists(json_path):
-        log.error(f"JSON file not found: {json_path}")
+def main():
+    parser = argparse.ArgumentParser(description="Ingest product metadata (delta upsert)")
+    parser.add_argument("--json", default=os.getenv("PRODUCT_JSON_PATH", "D:/jobmaxing/product_metadata.json"),
+                        help="Product metadata JSON (default: $PRODUCT_JSON_PATH)")
+    parser.add_argument("--changed-out", help="Write the changed SKUs to this file, one per line")
+    parser.add_argument("--full", action="store_true", help="Ignore stored hashes and resend every row")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.json):
+        log.error(f"JSON file not found: {args.json}")
         sys.exit(1)
 
-    ingest(json_path)
+    ingest(args.json, changed_out=args.changed_out, full=args.full, dry_run=args.dry_run)
 
 
 if __name__ == "__main__":
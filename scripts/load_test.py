@@ -0,0 +1,411 @@
+"""
+API Load Test
+=============
+
+End-to-end load generator for the FastAPI app with Zipfian SKU popularity.
+
+Replays a weighted mix of the hot endpoints:
+- GET /api/v1/products                    (paged listing, some slot filters)
+- GET /api/v1/products/{sku}
+- GET /api/v1/outfits/{sku}/compatible
+- GET /api/v1/outfits/generate-looks
+
+and reports per endpoint throughput and latency percentiles, plus database
+pool saturation (connections in use, acquire wait) from /metrics.
+
+Runs in-process through an ASGI client by default, or against a running
+server with --url. Either way the app needs a database, e.g. a local
+Postgres seeded with seed_db.py (DATABASE_URL).
+
+Usage:
+    python scripts/load_test.py --duration 30 --concurrency 32
+    python scripts/load_test.py --url http://localhost:8000 --isolate
+    python scripts/load_test.py --mix products=0 product=1 compatible=1 looks=2
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from bisect import bisect
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+
+ROOT_DIR = Path(__file__).parent.parent
+
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+API = "/api/v1"
+
+DEFAULT_MIX = {
+    "products": 0.15,
+    "product": 0.35,
+    "compatible": 0.25,
+    "looks": 0.25,
+}
+
+SLOTS = ["base top", "outerwear", "primary bottom", "footwear", "accessory"]
+
+
+# ============================================================
+# TRAFFIC MODEL
+# ============================================================
+
+class Zipf:
+    """Draws items with probability proportional to 1 / rank^s."""
+
+    def __init__(self, items: list, s: float, rng: random.Random):
+        self.items = items
+        self.rng = rng
+        self.cumulative = list(accumulate(1.0 / (rank ** s) for rank in range(1, len(items) + 1)))
+
+    def sample(self):
+        x = self.rng.random() * self.cumulative[-1]
+        return self.items[min(bisect(self.cumulative, x), len(self.items) - 1)]
+
+
+class Traffic:
+    """Builds the next request of the endpoint mix."""
+
+    def __init__(self, skus: List[str], total_pages: int, mix: Dict[str, float], zipf_s: float, seed: int):
+        self.rng = random.Random(seed)
+        ranked = list(skus)
+        self.rng.shuffle(ranked)  # popularity rank independent of SKU order
+        self.skus = Zipf(ranked, zipf_s, self.rng)
+        self.pages = Zipf(list(range(1, total_pages + 1)), zipf_s, self.rng)
+        self.endpoints = [name for name, weight in mix.items() if weight > 0]
+        self.weights = [mix[name] for name in self.endpoints]
+
+    def next(self) -> Tuple[str, str, dict]:
+        endpoint = self.rng.choices(self.endpoints, self.weights)[0]
+        if endpoint == "products":
+            params = {"page": self.pages.sample(), "page_size": 20}
+            if self.rng.random() < 0.3:
+                params = {"functional_slot": self.rng.choice(SLOTS), "page_size": 20}
+            return endpoint, f"{API}/products", params
+        sku = self.skus.sample()
+        if endpoint == "product":
+            return endpoint, f"{API}/products/{sku}", {}
+        if endpoint == "compatible":
+            return endpoint, f"{API}/outfits/{sku}/compatible", {"limit": 20}
+        return endpoint, f"{API}/outfits/generate-looks", {"base_sku": sku, "num_looks": 10}
+
+
+# ============================================================
+# METRICS SCRAPING
+# ============================================================
+
+def parse_metrics(text: str) -> Dict[str, list]:
+    return {family.name: family.samples for family in text_string_to_metric_families(text)}
+
+
+def pool_gauges(metrics: Dict[str, list]) -> Dict[str, float]:
+    return {s.labels["state"]: s.value for s in metrics.get("db_pool_connections", [])}
+
+
+def acquire_wait_buckets(metrics: Dict[str, list]) -> Tuple[List[Tuple[float, float]], float, float]:
+    """Cumulative (le, count) buckets, count and sum of the pool acquire wait histogram."""
+    buckets, count, total = [], 0.0, 0.0
+    for s in metrics.get("db_pool_acquire_wait_seconds", []):
+        if s.name.endswith("_bucket"):
+            buckets.append((float(s.labels["le"]), s.value))
+        elif s.name.endswith("_count"):
+            count = s.value
+        elif s.name.endswith("_sum"):
+            total = s.value
+    return sorted(buckets), count, total
+
+
+def histogram_quantile(q: float, buckets: List[Tuple[float, float]]) -> Optional[float]:
+    """Estimate a quantile from cumulative buckets, as Prometheus' histogram_quantile does."""
+    if not buckets or buckets[-1][1] == 0:
+        return None
+    rank = q * buckets[-1][1]
+    prev_le, prev_count = 0.0, 0.0
+    for le, count in buckets:
+        if count >= rank:
+            if le == float("inf"):
+                return prev_le
+            if count == prev_count:
+                return le
+            return prev_le + (le - prev_le) * (rank - prev_count) / (count - prev_count)
+        prev_le, prev_count = le, count
+    return prev_le
+
+
+class PoolMonitor:
+    """Samples pool gauges from /metrics while the load runs."""
+
+    def __init__(self, client: httpx.AsyncClient, interval: float):
+        self.client = client
+        self.interval = interval
+        self.samples: List[Dict[str, float]] = []
+
+    async def scrape(self) -> Dict[str, list]:
+        response = await self.client.get("/metrics")
+        response.raise_for_status()
+        return parse_metrics(response.text)
+
+    async def run(self, stop: asyncio.Event):
+        while not stop.is_set():
+            try:
+                gauges = pool_gauges(await self.scrape())
+                if gauges:
+                    self.samples.append(gauges)
+            except httpx.HTTPError:
+                pass
+            try:
+                await asyncio.wait_for(stop.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def summary(self, before: Dict[str, list], after: Dict[str, list]) -> dict:
+        b_buckets, b_count, b_sum = acquire_wait_buckets(before)
+        a_buckets, a_count, a_sum = acquire_wait_buckets(after)
+        before_by_le = dict(b_buckets)
+        delta = [(le, count - before_by_le.get(le, 0.0)) for le, count in a_buckets]
+        acquires = a_count - b_count
+
+        in_use = [s.get("in_use", 0) for s in self.samples]
+        max_size = max((s.get("max", 0) for s in self.samples), default=0)
+
+        def ms(value):
+            return round(value * 1000, 3) if value is not None else None
+
+        return {
+            "max_size": max_size,
+            "in_use_mean": round(sum(in_use) / len(in_use), 2) if in_use else None,
+            "in_use_max": max(in_use, default=None),
+            "saturated_pct": (
+                round(sum(1 for n in in_use if max_size and n >= max_size) / len(in_use) * 100, 1)
+                if in_use else None
+            ),
+            "acquires": int(acquires),
+            "acquire_wait_ms": {
+                "mean": ms((a_sum - b_sum) / acquires) if acquires else None,
+                "p50": ms(histogram_quantile(0.5, delta)),
+                "p99": ms(histogram_quantile(0.99, delta)),
+            },
+        }
+
+
+# ============================================================
+# LOAD GENERATION
+# ============================================================
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return round(ordered[rank], 3)
+
+
+async def worker(client: httpx.AsyncClient, traffic: Traffic, deadline: float, results: Dict[str, dict]):
+    while time.perf_counter() < deadline:
+        endpoint, path, params = traffic.next()
+        start = time.perf_counter()
+        try:
+            response = await client.get(path, params=params)
+            status = response.status_code
+        except httpx.HTTPError:
+            status = None
+        elapsed = (time.perf_counter() - start) * 1000
+
+        stats = results[endpoint]
+        stats["latencies"].append(elapsed)
+        if status is None or status >= 500:
+            stats["errors"] += 1
+        elif status >= 400:
+            stats["client_errors"] += 1
+
+
+async def run_phase(client: httpx.AsyncClient, traffic: Traffic, args) -> dict:
+    """Drive `concurrency` closed-loop workers for `duration` seconds."""
+    results: Dict[str, dict] = defaultdict(lambda: {"latencies": [], "errors": 0, "client_errors": 0})
+    monitor = PoolMonitor(client, args.sample_interval)
+
+    before = await monitor.scrape()
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(monitor.run(stop))
+
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(
+        worker(client, traffic, deadline, results) for _ in range(args.concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await sampler
+    after = await monitor.scrape()
+
+    endpoints = {}
+    total = 0
+    for endpoint, stats in sorted(results.items()):
+        latencies = stats["latencies"]
+        total += len(latencies)
+        endpoints[endpoint] = {
+            "requests": len(latencies),
+            "throughput_rps": round(len(latencies) / elapsed, 1),
+            "errors": stats["errors"],
+            "client_errors": stats["client_errors"],
+            "latency_ms": {
+                "p50": percentile(latencies, 50),
+                "p90": percentile(latencies, 90),
+                "p99": percentile(latencies, 99),
+                "p999": percentile(latencies, 99.9),
+                "max": round(max(latencies), 3),
+            },
+        }
+
+    return {
+        "duration_s": round(elapsed, 2),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 1),
+        "endpoints": endpoints,
+        "pool": monitor.summary(before, after),
+    }
+
+
+async def fetch_catalog(client: httpx.AsyncClient) -> Tuple[List[str], int]:
+    """All SKUs (via the paged listing) and the number of listing pages."""
+    skus, page, total_pages = [], 1, 1
+    while page <= total_pages:
+        response = await client.get(f"{API}/products", params={"page": page, "page_size": 100})
+        response.raise_for_status()
+        data = response.json()
+        skus.extend(item["sku_id"] for item in data["items"])
+        total_pages = data["total_pages"]
+        page += 1
+    return skus, max(1, -(-len(skus) // 20))
+
+
+@asynccontextmanager
+async def make_client(args):
+    if args.url:
+        limits = httpx.Limits(max_connections=args.concurrency + 2)
+        async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+            yield client
+        return
+
+    sys.path.insert(0, str(ROOT_DIR / "backend"))
+    from app.main import app
+
+    # Run the app's lifespan (pool, caches) around the in-process client
+    async with app.router.lifespan_context(app):
+        # Unhandled app errors become 500s, as they would behind a server
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=args.timeout) as client:
+            yield client
+
+
+def print_phase(name: str, result: dict):
+    print(f"\n{name}: {result['requests']:,} requests in {result['duration_s']}s "
+          f"({result['throughput_rps']} req/s)")
+    print(f"  {'endpoint':<12} {'req/s':>8} {'p50':>9} {'p90':>9} {'p99':>9} {'p99.9':>9} {'errors':>7}")
+    for endpoint, stats in result["endpoints"].items():
+        lat = stats["latency_ms"]
+        print(f"  {endpoint:<12} {stats['throughput_rps']:>8} {lat['p50']:>9} {lat['p90']:>9} "
+              f"{lat['p99']:>9} {lat['p999']:>9} {stats['errors']:>7}")
+    pool = result["pool"]
+    wait = pool["acquire_wait_ms"]
+    print(f"  pool: in use mean {pool['in_use_mean']} / max {pool['in_use_max']} of {pool['max_size']}, "
+          f"saturated {pool['saturated_pct']}% of samples, acquire wait p50 {wait['p50']} ms, p99 {wait['p99']} ms")
+
+
+async def run(args):
+    async with make_client(args) as client:
+        skus, total_pages = await fetch_catalog(client)
+        if not skus:
+            print("No products found - seed the database first (seed_db.py)")
+            sys.exit(1)
+        print(f"Catalog: {len(skus)} products, Zipf s={args.zipf_s}, "
+              f"concurrency {args.concurrency}, {args.duration}s per phase")
+
+        phases = {"mixed": args.mix}
+        if args.isolate:
+            # Each endpoint alone, so pool saturation can be attributed to it
+            for endpoint in args.mix:
+                if args.mix[endpoint] > 0:
+                    phases[endpoint] = {endpoint: 1.0}
+
+        results = {}
+        for name, mix in phases.items():
+            traffic = Traffic(skus, total_pages, mix, args.zipf_s, args.seed)
+            if args.warmup:
+                warmup = argparse.Namespace(**{**vars(args), "duration": args.warmup})
+                await run_phase(client, traffic, warmup)
+            results[name] = await run_phase(client, traffic, args)
+            print_phase(name, results[name])
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "target": args.url or "in-process ASGI",
+            "products": len(skus),
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "zipf_s": args.zipf_s,
+            "mix": args.mix,
+            "seed": args.seed,
+        },
+        "phases": results,
+    }
+
+
+def parse_mix(values: Optional[List[str]]) -> Dict[str, float]:
+    if not values:
+        return dict(DEFAULT_MIX)
+    mix = dict.fromkeys(DEFAULT_MIX, 0.0)
+    for value in values:
+        name, _, weight = value.partition("=")
+        if name not in mix:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint '{name}' (expected one of {', '.join(mix)})")
+        mix[name] = float(weight)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the outfit API with Zipfian SKU traffic")
+    parser.add_argument("--url", help="Base URL of a running server (default: in-process ASGI)")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per phase")
+    parser.add_argument("--warmup", type=float, default=3, help="Untimed seconds before each phase")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent closed-loop clients")
+    parser.add_argument("--zipf-s", type=float, default=1.1, help="Zipf exponent for SKU popularity")
+    parser.add_argument("--mix", nargs="+", metavar="ENDPOINT=WEIGHT",
+                        help=f"Endpoint weights (endpoints: {', '.join(DEFAULT_MIX)})")
+    parser.add_argument("--isolate", action="store_true", help="Also run each endpoint alone")
+    parser.add_argument("--sample-interval", type=float, default=0.25, help="Pool sampling interval (s)")
+    parser.add_argument("--timeout", type=float, default=30, help="Request timeout (s)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--output", default="load_test.json", help="Results JSON path")
+    args = parser.parse_args()
+    args.mix = parse_mix(args.mix)
+
+    print("=" * 60)
+    print("API LOAD TEST")
+    print("=" * 60)
+
+    output = asyncio.run(run(args))
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2, sort_keys=True)
+    print(f"\nResults saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()